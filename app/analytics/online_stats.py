@@ -0,0 +1,295 @@
+"""
+Estadísticas online por casa de cambio
+Media y varianza (Welford), mínimos/máximos y variaciones 1h/24h/7d mantenidos
+con ventanas deslizantes: cada fila nueva se agrega y las que salen de la ventana
+se descuentan, así consultar una casa no requiere releer el historial.
+"""
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from app.analytics.price_store import epoch, from_epoch
+from app.core.config import settings
+
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+# Horizontes de variación: nombre -> segundos
+VARIATION_HORIZONS = {
+    "variation_1h": HOUR,
+    "variation_24h": DAY,
+    "variation_7d": 7 * DAY,
+}
+
+# Campos acumulados por ventana
+_COMPRA, _VENTA, _SPREAD = range(3)
+
+
+class RollingWindow:
+    """
+    Ventana deslizante de una casa sobre los últimos `seconds` segundos.
+
+    Welford con altas y bajas para media/varianza, colas monótonas para
+    mínimo/máximo (O(1) amortizado) y el último punto desalojado como
+    referencia para la variación del horizonte.
+    """
+
+    def __init__(self, seconds: int):
+        self.seconds = seconds
+        self.points = deque()  # (seq, ts, compra, venta)
+        self.reference = None  # último punto que salió de la ventana
+        self._seq = 0
+
+        self.n = 0
+        self.mean = [0.0, 0.0, 0.0]
+        self.m2 = [0.0, 0.0, 0.0]
+
+        # (seq, valor) por campo: compra y venta
+        self._mins = [deque(), deque()]
+        self._maxs = [deque(), deque()]
+
+    def add(self, ts: int, compra: float, venta: float):
+        self.evict(ts)
+
+        self._seq += 1
+        self.points.append((self._seq, ts, compra, venta))
+        self._welford_add((compra, venta, venta - compra))
+
+        for field, value in ((_COMPRA, compra), (_VENTA, venta)):
+            mins, maxs = self._mins[field], self._maxs[field]
+            while mins and mins[-1][1] >= value:
+                mins.pop()
+            mins.append((self._seq, value))
+            while maxs and maxs[-1][1] <= value:
+                maxs.pop()
+            maxs.append((self._seq, value))
+
+    def evict(self, now: int):
+        """Descarta los puntos anteriores a now - seconds."""
+        cutoff = now - self.seconds
+        while self.points and self.points[0][1] < cutoff:
+            point = self.points.popleft()
+            seq, _, compra, venta = point
+            self._welford_remove((compra, venta, venta - compra))
+
+            for queues in (self._mins, self._maxs):
+                for q in queues:
+                    if q and q[0][0] == seq:
+                        q.popleft()
+
+            self.reference = point
+
+    def variance(self, field: int) -> Optional[float]:
+        if self.n < 2:
+            return None
+        return max(self.m2[field], 0.0) / (self.n - 1)
+
+    def minimum(self, field: int) -> Optional[float]:
+        q = self._mins[field]
+        return q[0][1] if q else None
+
+    def maximum(self, field: int) -> Optional[float]:
+        q = self._maxs[field]
+        return q[0][1] if q else None
+
+    def _welford_add(self, values):
+        self.n += 1
+        for i, x in enumerate(values):
+            delta = x - self.mean[i]
+            self.mean[i] += delta / self.n
+            self.m2[i] += delta * (x - self.mean[i])
+
+    def _welford_remove(self, values):
+        self.n -= 1
+        if self.n == 0:
+            self.mean = [0.0, 0.0, 0.0]
+            self.m2 = [0.0, 0.0, 0.0]
+            return
+        for i, x in enumerate(values):
+            delta = x - self.mean[i]
+            self.mean[i] -= delta / self.n
+            self.m2[i] -= delta * (x - self.mean[i])
+
+
+class CasaStats:
+    """Ventanas de una casa: una por horizonte de variación y una por ventana de análisis."""
+
+    def __init__(self, window_days: Iterable[int]):
+        seconds = set(VARIATION_HORIZONS.values()) | {d * DAY for d in window_days}
+        self.windows = {s: RollingWindow(s) for s in seconds}
+        self.last = None  # (ts, compra, venta)
+
+    def add(self, ts: int, compra: float, venta: float):
+        # Filas fuera de orden (ej: relectura de la BD) no retroceden la ventana
+        if self.last and ts <= self.last[0]:
+            return
+        self.last = (ts, compra, venta)
+        for window in self.windows.values():
+            window.add(ts, compra, venta)
+
+    def summary(self, days: int, now: int) -> Optional[Dict]:
+        for window in self.windows.values():
+            window.evict(now)
+
+        window = self.windows[days * DAY]
+        if not window.n:
+            return None
+
+        var_compra = window.variance(_COMPRA)
+        var_venta = window.variance(_VENTA)
+        _, compra, venta = self.last
+
+        result = {
+            "count": window.n,
+            "mean_compra": window.mean[_COMPRA],
+            "mean_venta": window.mean[_VENTA],
+            "volatility_compra": var_compra ** 0.5 if var_compra is not None else None,
+            "volatility_venta": var_venta ** 0.5 if var_venta is not None else None,
+            "min_compra": window.minimum(_COMPRA),
+            "max_compra": window.maximum(_COMPRA),
+            "min_venta": window.minimum(_VENTA),
+            "max_venta": window.maximum(_VENTA),
+            "avg_spread": window.mean[_SPREAD],
+            "last_compra": compra,
+            "last_venta": venta,
+            "last_timestamp": from_epoch(self.last[0]).isoformat(),
+        }
+
+        # Variación contra el último precio conocido antes del horizonte
+        for name, seconds in VARIATION_HORIZONS.items():
+            reference = self.windows[seconds].reference
+            result[f"{name}_compra"] = round(compra - reference[2], 4) if reference else None
+            result[f"{name}_venta"] = round(venta - reference[3], 4) if reference else None
+
+        return result
+
+
+class OnlineStats:
+    """Estadísticas online de todas las casas."""
+
+    def __init__(self, window_days: Iterable[int]):
+        self.window_days = sorted(set(window_days))
+        self.casas: Dict[str, CasaStats] = {}
+        self.last_ts: Optional[int] = None  # timestamp más reciente agregado
+        self._lock = threading.Lock()
+
+    def update(self, rows: List[Dict]):
+        """
+        Agrega filas con la forma de dolar_hourly, en orden de timestamp.
+        Se omiten las filas sin precio de compra o venta.
+        """
+        with self._lock:
+            for row in rows:
+                if row.get("precio_compra") is None or row.get("precio_venta") is None:
+                    continue
+                casa = self.casas.get(row["origen"])
+                if casa is None:
+                    casa = self.casas[row["origen"]] = CasaStats(self.window_days)
+                ts = epoch(_parse_timestamp(row["timestamp"]))
+                casa.add(ts, float(row["precio_compra"]), float(row["precio_venta"]))
+                if self.last_ts is None or ts > self.last_ts:
+                    self.last_ts = ts
+
+    def analyze(self, days: int, now: Optional[datetime] = None) -> List[Dict]:
+        """
+        Estadísticas de cada casa en la ventana de `days` días, O(1) amortizado por casa.
+
+        Args:
+            days: Ventana; debe ser una de las configuradas (window_days)
+            now: Instante de referencia (por defecto ahora)
+
+        Returns:
+            Lista de dicts por casa con origen, conteo, media, volatilidad, min/max,
+            spread promedio, último precio y variaciones 1h/24h/7d
+        """
+        if days not in self.window_days:
+            raise ValueError(f"Ventana de {days} días no mantenida (disponibles: {self.window_days})")
+
+        now_ts = epoch(now or datetime.now())
+        with self._lock:
+            analysis = []
+            for origen, casa in self.casas.items():
+                summary = casa.summary(days, now_ts)
+                if summary:
+                    analysis.append({"origen": origen, **summary})
+        return analysis
+
+
+def _parse_timestamp(value) -> datetime:
+    return value if isinstance(value, datetime) else datetime.fromisoformat(value)
+
+
+# ===== INSTANCIA DEL PROCESO =====
+
+_online_stats: Optional[OnlineStats] = None
+_online_stats_lock = threading.Lock()
+
+
+def get_online_stats(days: Optional[int] = None) -> OnlineStats:
+    """
+    Estadísticas online del proceso, al día con dolar_hourly.
+
+    La primera llamada (o una ventana `days` que no se mantiene) las reconstruye
+    desde la ventana más larga; las siguientes solo leen las filas posteriores al
+    último timestamp cargado. El scraping horario corre en otro proceso
+    (GitHub Actions), por eso se sincronizan desde la BD en cada llamada.
+    La lectura de la BD se hace fuera del lock del módulo: el lock solo protege
+    el reemplazo de la instancia.
+
+    Args:
+        days: Ventana que se va a consultar (opcional)
+
+    Returns:
+        OnlineStats del proceso
+    """
+    global _online_stats
+    from app.db.repositories.hourly_repository import get_hourly_rows
+
+    now = datetime.now()
+    with _online_stats_lock:
+        current = _online_stats
+
+    if current is not None and (days is None or days in current.window_days):
+        # Se relee desde last_ts inclusive (una captura comparte timestamp entre casas):
+        # CasaStats.add omite las filas que cada casa ya tenía
+        start_ts = current.last_ts if current.last_ts is not None else _window_start(current, now)
+        current.update(get_hourly_rows(from_epoch(start_ts), now))
+        return current
+
+    # La ventana de 7 días la usa el resumen semanal
+    window_days = set(settings.SNAPSHOT_WINDOWS) | {7}
+    if current is not None:
+        window_days |= set(current.window_days)
+    if days is not None:
+        window_days.add(days)
+
+    stats = OnlineStats(window_days)
+    stats.update(get_hourly_rows(from_epoch(_window_start(stats, now)), now))
+
+    with _online_stats_lock:
+        # Otra llamada pudo reconstruirlas mientras tanto: se conserva si ya cubre la ventana
+        latest = _online_stats
+        if latest is not current and latest is not None and (days is None or days in latest.window_days):
+            return latest
+        _online_stats = stats
+    return stats
+
+
+def _window_start(stats: OnlineStats, now: datetime) -> int:
+    # Ventana más larga más un día de margen
+    return epoch(now) - max(stats.window_days) * DAY - DAY
+
+
+def analyze_all_casas(days: int = 7) -> List[Dict]:
+    """
+    Análisis de todas las casas en la ventana de `days` días, desde las estadísticas online.
+
+    Args:
+        days: Ventana en días
+
+    Returns:
+        Lista de dicts por casa (ver OnlineStats.analyze)
+    """
+    return get_online_stats(days).analyze(days)
@@ -0,0 +1,306 @@
+"""
+Store columnar en memoria de precios de casas de cambio
+Un array de NumPy por campo, origen como código entero y timestamps int64 (segundos).
+Se carga una vez desde Supabase y luego solo se le agregan las filas nuevas;
+las estadísticas por casa son reducciones agrupadas vectorizadas.
+"""
+import calendar
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import settings
+
+
+class PriceStore:
+    """
+    Precios de compra/venta por casa en arrays paralelos.
+
+    Los timestamps se guardan como segundos del reloj local tratado como UTC,
+    igual que hourly_repository compara timestamps sin zona.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self._codes: Dict[str, int] = {}
+        self.names: List[str] = []
+
+        self._origen = np.empty(capacity, dtype=np.int32)
+        self._ts = np.empty(capacity, dtype=np.int64)
+        self._compra = np.empty(capacity, dtype=np.float64)
+        self._venta = np.empty(capacity, dtype=np.float64)
+        self.size = 0
+
+        self._lock = threading.RLock()
+
+    def code(self, origen: str) -> int:
+        """Código entero de una casa (se asigna la primera vez que aparece)."""
+        code = self._codes.get(origen)
+        if code is None:
+            code = self._codes[origen] = len(self.names)
+            self.names.append(origen)
+        return code
+
+    def append(
+        self,
+        origenes: Iterable[str],
+        timestamps: np.ndarray,
+        compra: np.ndarray,
+        venta: np.ndarray,
+    ):
+        """
+        Agrega filas al final del store.
+
+        Args:
+            origenes: Nombre de la casa por fila
+            timestamps: Segundos (int64) por fila
+            compra: Precio de compra por fila
+            venta: Precio de venta por fila
+        """
+        with self._lock:
+            codes = np.fromiter((self.code(o) for o in origenes), dtype=np.int32, count=len(timestamps))
+            n = len(codes)
+            if not n:
+                return
+
+            self._reserve(self.size + n)
+            end = self.size + n
+            self._origen[self.size:end] = codes
+            self._ts[self.size:end] = timestamps
+            self._compra[self.size:end] = compra
+            self._venta[self.size:end] = venta
+            self.size = end
+
+    def append_rows(self, rows: List[Dict], time_field: str = "timestamp"):
+        """
+        Agrega filas con la forma de dolar_hourly (o dolar con time_field="fecha").
+        Se omiten las filas sin precio de compra o venta.
+        """
+        rows = [r for r in rows if r.get("precio_compra") is not None and r.get("precio_venta") is not None]
+        if not rows:
+            return
+
+        self.append(
+            [r["origen"] for r in rows],
+            to_epoch([r[time_field] for r in rows]),
+            np.array([r["precio_compra"] for r in rows], dtype=np.float64),
+            np.array([r["precio_venta"] for r in rows], dtype=np.float64),
+        )
+
+    @property
+    def last_ts(self) -> Optional[int]:
+        """Timestamp más reciente guardado (None si está vacío)."""
+        with self._lock:
+            return int(self._ts[:self.size].max()) if self.size else None
+
+    def origenes_at(self, ts: int) -> set:
+        """Casas con una fila en el timestamp dado."""
+        with self._lock:
+            mask = self._ts[:self.size] == ts
+            return {self.names[c] for c in np.unique(self._origen[:self.size][mask])}
+
+    def evict_before(self, ts_min: int):
+        """Descarta las filas anteriores a ts_min."""
+        with self._lock:
+            keep = self._ts[:self.size] >= ts_min
+            n = int(keep.sum())
+            if n == self.size:
+                return
+            for arr in (self._origen, self._ts, self._compra, self._venta):
+                arr[:n] = arr[:self.size][keep]
+            self.size = n
+
+    def view(self, since: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """
+        Columnas del store (copias), opcionalmente desde un timestamp.
+
+        Returns:
+            Dict con origen (códigos), ts, compra, venta y spread
+        """
+        with self._lock:
+            origen = self._origen[:self.size]
+            ts = self._ts[:self.size]
+            compra = self._compra[:self.size]
+            venta = self._venta[:self.size]
+
+            if since is not None:
+                mask = ts >= since
+                origen, ts, compra, venta = origen[mask], ts[mask], compra[mask], venta[mask]
+            else:
+                origen, ts, compra, venta = origen.copy(), ts.copy(), compra.copy(), venta.copy()
+
+        return {"origen": origen, "ts": ts, "compra": compra, "venta": venta, "spread": venta - compra}
+
+    def group_stats(self, days: Optional[int] = None, now: Optional[datetime] = None) -> Dict[str, Dict]:
+        """
+        Estadísticas por casa en una sola pasada vectorizada.
+
+        Args:
+            days: Ventana en días (por defecto todo el store)
+            now: Instante de referencia para la ventana (por defecto ahora)
+
+        Returns:
+            Dict origen -> {count, mean/volatility/min/max de compra y venta,
+            avg/min/max spread, last_compra, last_venta, last_timestamp}
+        """
+        since = epoch(now or datetime.now()) - days * 86400 if days else None
+        cols = self.view(since)
+        codes = cols["origen"]
+        if not len(codes):
+            return {}
+
+        n_groups = len(self.names)
+        count = np.bincount(codes, minlength=n_groups)
+
+        # Orden por casa y tiempo: cada grupo es un tramo contiguo
+        order = np.lexsort((cols["ts"], codes))
+        sorted_codes = codes[order]
+        starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+        ends = np.r_[starts[1:], len(order)] - 1
+        group_codes = sorted_codes[starts]
+
+        stats = {self.names[c]: {"count": int(count[c])} for c in group_codes}
+
+        for field in ("compra", "venta"):
+            values = cols[field]
+            mean, std = _grouped_mean_std(values, codes, count)
+            ordered = values[order]
+            mins = np.minimum.reduceat(ordered, starts)
+            maxs = np.maximum.reduceat(ordered, starts)
+            lasts = ordered[ends]
+
+            for i, c in enumerate(group_codes):
+                entry = stats[self.names[c]]
+                entry[f"mean_{field}"] = float(mean[c])
+                entry[f"volatility_{field}"] = float(std[c])
+                entry[f"min_{field}"] = float(mins[i])
+                entry[f"max_{field}"] = float(maxs[i])
+                entry[f"last_{field}"] = float(lasts[i])
+
+        spread_mean, _ = _grouped_mean_std(cols["spread"], codes, count)
+        spread_sorted = cols["spread"][order]
+        spread_min = np.minimum.reduceat(spread_sorted, starts)
+        spread_max = np.maximum.reduceat(spread_sorted, starts)
+        last_ts = cols["ts"][order][ends]
+
+        for i, c in enumerate(group_codes):
+            entry = stats[self.names[c]]
+            entry["avg_spread"] = float(spread_mean[c])
+            entry["min_spread"] = float(spread_min[i])
+            entry["max_spread"] = float(spread_max[i])
+            entry["last_timestamp"] = from_epoch(int(last_ts[i])).isoformat()
+
+        return stats
+
+    def ranking(
+        self,
+        metric: str,
+        days: Optional[int] = None,
+        ascending: bool = True,
+        limit: Optional[int] = None,
+    ) -> List[Tuple[str, float]]:
+        """
+        Casas ordenadas por una métrica de group_stats (ej: volatility_compra).
+        Las casas sin valor (NaN, ej: una sola fila para volatilidad) van al final.
+        """
+        stats = self.group_stats(days)
+        items = [(name, s[metric]) for name, s in stats.items()]
+        items.sort(key=lambda item: (np.isnan(item[1]), item[1] if ascending else -item[1]))
+        return items[:limit] if limit else items
+
+    def _reserve(self, needed: int):
+        capacity = len(self._ts)
+        if needed <= capacity:
+            return
+
+        # Crecimiento geométrico: append amortizado O(1)
+        new_capacity = max(needed, capacity * 2)
+        for name in ("_origen", "_ts", "_compra", "_venta"):
+            old = getattr(self, name)
+            new = np.empty(new_capacity, dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+
+
+def _grouped_mean_std(values: np.ndarray, codes: np.ndarray, count: np.ndarray):
+    """Media y desviación estándar muestral por grupo (dos pasadas con bincount)."""
+    n_groups = len(count)
+    sums = np.bincount(codes, weights=values, minlength=n_groups)
+    mean = np.divide(sums, count, out=np.full(n_groups, np.nan), where=count > 0)
+
+    dev = values - mean[codes]
+    sq = np.bincount(codes, weights=dev * dev, minlength=n_groups)
+    var = np.divide(sq, count - 1, out=np.full(n_groups, np.nan), where=count > 1)
+    return mean, np.sqrt(var)
+
+
+def to_epoch(values: List[str]) -> np.ndarray:
+    """Timestamps ISO (o fechas 'YYYY-MM-DD') a segundos int64."""
+    parsed = pd.to_datetime(pd.Series(values), format="ISO8601", utc=True)
+    return (parsed.astype("int64") // 10**9).to_numpy(dtype=np.int64)
+
+
+def epoch(dt: datetime) -> int:
+    """Datetime a segundos; uno sin zona se toma como reloj local tratado como UTC."""
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc)
+    return calendar.timegm(dt.timetuple())
+
+
+def from_epoch(ts: int) -> datetime:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).replace(tzinfo=None)
+
+
+# ===== STORES DEL PROCESO =====
+
+_stores: Dict[str, PriceStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_price_store(source: str = "hourly") -> PriceStore:
+    """
+    Store del proceso para una fuente: "hourly" (dolar_hourly) o "daily" (dolar).
+    La primera llamada carga PRICE_STORE_DAYS desde Supabase; las siguientes
+    solo traen las filas posteriores al último timestamp cargado.
+    """
+    with _stores_lock:
+        store = _stores.get(source)
+        if store is None:
+            store = _stores[source] = PriceStore()
+
+    sync_price_store(store, source)
+    return store
+
+
+def sync_price_store(store: PriceStore, source: str = "hourly"):
+    """Agrega las filas nuevas de la fuente y descarta las que salieron de la ventana."""
+    now = datetime.now()
+    window_start = now - timedelta(days=settings.PRICE_STORE_DAYS)
+    last_ts = store.last_ts
+
+    if source == "hourly":
+        from app.db.repositories.hourly_repository import get_hourly_rows
+
+        start = from_epoch(last_ts) if last_ts is not None else window_start
+        rows = get_hourly_rows(start, now)
+        time_field = "timestamp"
+    elif source == "daily":
+        from app.db.repositories.casas_repository import get_casas_range
+
+        start = from_epoch(last_ts) if last_ts is not None else window_start
+        rows = get_casas_range(start.strftime("%Y-%m-%d"), now.strftime("%Y-%m-%d"))
+        time_field = "fecha"
+    else:
+        raise ValueError(f"Fuente desconocida: {source}")
+
+    # Se relee desde last_ts inclusive (una captura comparte timestamp entre casas):
+    # se omiten las casas que ya estaban cargadas en ese instante
+    if last_ts is not None and rows:
+        loaded = store.origenes_at(last_ts)
+        row_ts = to_epoch([r[time_field] for r in rows])
+        rows = [r for r, ts in zip(rows, row_ts) if ts > last_ts or r["origen"] not in loaded]
+
+    store.append_rows(rows, time_field=time_field)
+    store.evict_before(epoch(window_start))
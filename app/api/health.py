@@ -16,18 +16,19 @@ def health_check():
 
 
 @router.get("/health/db")
-def database_health():
-    """Verifica conexión a Supabase"""
+async def database_health():
+    """Verifica conexión a Supabase y reporta el uso del pool de conexiones"""
+    from app.db.supabase.client import get_async_supabase_client, get_pool_stats
+    
     try:
-        from app.db.supabase.client import get_supabase_client
-        
-        supabase = get_supabase_client()
+        supabase = await get_async_supabase_client()
         # Intenta hacer una query simple
-        result = supabase.table("bcrp_data").select("id").limit(1).execute()
+        await supabase.table("bcrp_data").select("id").limit(1).execute()
         
         return {
             "status": "healthy",
             "database": "connected",
+            "pool": get_pool_stats(),
             "timestamp": datetime.now().isoformat()
         }
     except Exception as e:
@@ -35,6 +36,7 @@ def database_health():
             "status": "unhealthy",
             "database": "disconnected",
             "error": str(e),
+            "pool": get_pool_stats(),
             "timestamp": datetime.now().isoformat()
         }
 
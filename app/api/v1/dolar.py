@@ -1,188 +1,361 @@
+import asyncio
+
 from fastapi import APIRouter, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from datetime import date, datetime, timedelta
-from typing import Optional
-from app.db.supabase.client import get_supabase_client
-from app.analytics.price_analysis import (
-    analyze_all_casas,
-    get_best_opportunities,
-    get_casa_history
+from typing import Literal, Optional
+from app.core.cache import cached
+from app.core.config import settings
+from app.core.responses import JSONResponse, dumps
+from app.db.supabase.client import get_async_supabase_client
+from app.db.repositories import analytics_repository, history_repository
+from app.db.repositories.snapshot_repository import (
+    claim_snapshot_refresh,
+    get_latest_snapshot,
+    snapshots_available,
 )
+from app.celery.task import calculate_analytics, detect_arbitrage
+
+router = APIRouter(default_response_class=JSONResponse)
+
+# TTL por endpoint (segundos): las casas se scrapean cada pocas horas,
+# BCRP y mercado una vez al día. La ingesta invalida la caché al guardar datos nuevos.
+TTL_CASAS_LATEST = 300
+TTL_BCRP_LATEST = 900
+TTL_MARKET_LATEST = 900
+TTL_DASHBOARD_SUMMARY = 120
+
+# Los handlers son async: las lecturas puntuales usan el cliente async de Supabase;
+# los repositories y el análisis son bloqueantes, así que se ejecutan en el threadpool.
+# Los que no pasan por la caché devuelven JSONResponse (orjson) directamente
+# para saltarse el jsonable_encoder de FastAPI
+
+
+async def _latest_row(table: str):
+    """Último registro por fecha de una tabla (None si está vacía), con el cliente async"""
+    supabase = await get_async_supabase_client()
+    result = await supabase.table(table)\
+        .select("*")\
+        .order("fecha", desc=True)\
+        .limit(1)\
+        .execute()
+    return result.data[0] if result.data else None
+
+
+def _snapshot(kind: str, window, task, compute, *task_args):
+    """
+    Último snapshot calculado por Celery (una lectura en Redis).
+    Si falta o está vencido se encola su cálculo, una sola vez entre todos los requests.
+    Sin Redis, o si falta el snapshot y Redis/Celery no responden, se calcula en el request.
+    """
+    if not snapshots_available():
+        return _live_snapshot(compute, *task_args)
+    
+    snapshot = None
+    try:
+        snapshot = get_latest_snapshot(kind, window)
+        
+        if snapshot is None or _is_stale(snapshot):
+            if claim_snapshot_refresh(kind, window):
+                # Sin reintentos de conexión: un broker caído no debe bloquear la lectura
+                task.apply_async(task_args, retry=False)
+    except Exception as e:
+        print(f"⚠️  Snapshot {kind}:{window} no se pudo leer o encolar: {e}")
+        if snapshot is None:
+            return _live_snapshot(compute, *task_args)
+    
+    return snapshot
+
+
+async def _summary_snapshot(kind: str, window, task, compute, *task_args):
+    """
+    Snapshot para el resumen del dashboard: si no se puede leer ni calcular
+    (ej: falla el cálculo en vivo) se responde null, igual que mientras se calcula.
+    """
+    try:
+        return await run_in_threadpool(_snapshot, kind, window, task, compute, *task_args)
+    except Exception as e:
+        print(f"⚠️  Snapshot {kind}:{window} no disponible para el resumen: {e}")
+        return None
+
 
-router = APIRouter()
+def _live_snapshot(compute, *args):
+    """Calcula el resultado en el request, con la misma forma que un snapshot (sin versión)"""
+    return {"version": None, "computed_at": datetime.now().isoformat(), "data": compute(*args)}
+
+
+def _compute_analytics(days: int):
+    from app.analytics.online_stats import analyze_all_casas
+    return analyze_all_casas(days=days)
+
+
+def _compute_opportunities():
+    from app.analytics.price_analysis import get_best_opportunities
+    return get_best_opportunities()
+
+
+def _is_stale(snapshot) -> bool:
+    computed_at = datetime.fromisoformat(snapshot["computed_at"])
+    return datetime.now() - computed_at > timedelta(seconds=2 * settings.SNAPSHOT_REFRESH_SECONDS)
+
+
+def _snapshot_pending(kind: str) -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail=f"Snapshot de {kind} en cálculo, reintenta en unos segundos",
+        headers={"Retry-After": "30"},
+    )
+
+
+async def _paginated_history(
+    table: str,
+    start_date: Optional[date],
+    end_date: Optional[date],
+    limit: int,
+    cursor: Optional[str],
+    format: str,
+    time_field: str = "fecha",
+    origen: Optional[str] = None,
+    extra: Optional[dict] = None,
+):
+    """
+    Historial paginado por keyset (json) o el rango completo como NDJSON.
+    En modo ndjson se ignora limit: las filas se emiten a medida que se leen
+    las páginas, con memoria constante en el servidor.
+    """
+    if cursor:
+        try:
+            history_repository.decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    if format == "ndjson":
+        rows = history_repository.iter_history(
+            table, start_date, end_date, cursor, time_field=time_field, origen=origen
+        )
+        # Starlette consume el generador síncrono en el threadpool
+        return StreamingResponse(_ndjson_lines(rows), media_type="application/x-ndjson")
+    
+    data, next_cursor = await run_in_threadpool(
+        history_repository.get_history_page,
+        table, start_date, end_date, limit, cursor, True, time_field, origen
+    )
+    return JSONResponse({**(extra or {}), "data": data, "count": len(data), "next_cursor": next_cursor})
+
+
+def _ndjson_lines(rows):
+    """Una línea JSON por fila; si la lectura falla a mitad se emite una línea de error"""
+    try:
+        for row in rows:
+            yield dumps(row) + b"\n"
+    except Exception as e:
+        print(f"❌ Error en streaming de historial: {e}")
+        yield dumps({"error": str(e)}) + b"\n"
 
 
 @router.get("/casas/latest")
-def get_latest_casas_prices():
+@cached(ttl=TTL_CASAS_LATEST, tags=("casas",), response_class=JSONResponse)
+async def get_latest_casas_prices():
     """Obtiene los precios más recientes de todas las casas de cambio"""
     try:
-        supabase = get_supabase_client()
-        
-        # Obtener el último registro de cada casa
-        result = supabase.rpc('get_latest_prices_by_casa').execute()
-        
-        if not result.data:
-            # Fallback: obtener últimos registros manualmente
-            result = supabase.table("dolar_hourly")\
-                .select("*")\
-                .order("timestamp", desc=True)\
-                .limit(20)\
-                .execute()
-        
-        return {"data": result.data, "count": len(result.data)}
+        data = await run_in_threadpool(analytics_repository.get_latest_prices_by_casa)
+        return {"data": data, "count": len(data)}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/casas/history/{casa_name}")
-def get_casa_price_history(
+async def get_casa_price_history(
     casa_name: str,
-    days: int = Query(7, ge=1, le=90, description="Días de historial (1-90)")
+    days: int = Query(7, ge=1, le=730, description="Días de historial (1-730)"),
+    limit: int = Query(500, ge=1, le=history_repository.PAGE_SIZE),
+    cursor: Optional[str] = None,
+    format: Literal["json", "ndjson"] = "json"
 ):
-    """Obtiene el historial de precios de una casa específica"""
+    """Obtiene el historial de precios de una casa específica (paginado por cursor o NDJSON)"""
     try:
-        history = get_casa_history(casa_name, days)
-        return {"casa": casa_name, "days": days, "data": history}
+        start = date.today() - timedelta(days=days)
+        return await _paginated_history(
+            "dolar_hourly", start, None, limit, cursor, format,
+            time_field="timestamp", origen=casa_name, extra={"casa": casa_name, "days": days}
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/casas/analytics")
-def get_casas_analytics(
+async def get_casas_analytics(
     days: int = Query(7, ge=1, le=30, description="Días para análisis (1-30)")
 ):
-    """Análisis estratégico de todas las casas de cambio"""
+    """Análisis estratégico de todas las casas de cambio (último snapshot calculado)"""
     try:
-        analysis = analyze_all_casas(days)
-        return {"days": days, "total_casas": len(analysis), "data": analysis}
+        snapshot = await run_in_threadpool(_snapshot, "analytics", days, calculate_analytics, _compute_analytics, days)
+        
+        if snapshot is None:
+            raise _snapshot_pending("analytics")
+        
+        analysis = snapshot["data"]
+        return JSONResponse({
+            "days": days,
+            "total_casas": len(analysis),
+            "data": analysis,
+            "version": snapshot["version"],
+            "computed_at": snapshot["computed_at"]
+        })
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/casas/opportunities")
-def get_trading_opportunities():
-    """Obtiene las mejores oportunidades de compra/venta y arbitraje"""
+async def get_trading_opportunities():
+    """Obtiene las mejores oportunidades de compra/venta y arbitraje (último snapshot calculado)"""
+    try:
+        snapshot = await run_in_threadpool(_snapshot, "opportunities", "latest", detect_arbitrage, _compute_opportunities)
+        
+        if snapshot is None:
+            raise _snapshot_pending("oportunidades")
+        
+        return JSONResponse({
+            **snapshot["data"],
+            "version": snapshot["version"],
+            "computed_at": snapshot["computed_at"]
+        })
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/casas/stats")
+@cached(ttl=TTL_CASAS_LATEST, tags=("casas",), response_class=JSONResponse)
+async def get_casas_stats(
+    days: int = Query(7, ge=1, le=90, description="Días de la ventana (1-90)")
+):
+    """Volatilidad, rango y spread por casa, agregados en la base de datos"""
     try:
-        opportunities = get_best_opportunities()
-        return opportunities
+        data = await run_in_threadpool(analytics_repository.get_casa_stats, days)
+        return {"days": days, "data": data, "count": len(data)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/casas/ohlc")
+async def get_casas_ohlc(
+    days: int = Query(30, ge=1, le=365, description="Días de historial (1-365)"),
+    casa: Optional[str] = None
+):
+    """OHLC diario de compra/venta por casa con volatilidad móvil de 7 y 30 días"""
+    try:
+        start = date.today() - timedelta(days=days)
+        ohlc, volatility = await asyncio.gather(
+            run_in_threadpool(analytics_repository.get_daily_ohlc, start, None, casa),
+            run_in_threadpool(analytics_repository.get_rolling_volatility, start, None, casa),
+        )
+        
+        volatility_by_key = {(v["origen"], v["fecha"]): v for v in volatility}
+        data = []
+        for row in ohlc:
+            v = volatility_by_key.get((row["origen"], row["fecha"]), {})
+            data.append({
+                **row,
+                "volatility_7d_venta": v.get("volatility_7d_venta"),
+                "volatility_30d_venta": v.get("volatility_30d_venta"),
+            })
+        
+        return JSONResponse({"days": days, "data": data, "count": len(data)})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/bcrp/latest")
-def get_latest_bcrp_data():
+@cached(ttl=TTL_BCRP_LATEST, tags=("bcrp",), response_class=JSONResponse)
+async def get_latest_bcrp_data():
     """Obtiene los datos más recientes del BCRP"""
     try:
-        supabase = get_supabase_client()
-        result = supabase.table("bcrp_data")\
-            .select("*")\
-            .order("fecha", desc=True)\
-            .limit(1)\
-            .execute()
+        row = await _latest_row("bcrp_data")
         
-        if not result.data:
+        if row is None:
             raise HTTPException(status_code=404, detail="No hay datos del BCRP")
         
-        return result.data[0]
+        return row
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/bcrp/history")
-def get_bcrp_history(
+async def get_bcrp_history(
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
-    limit: int = Query(30, ge=1, le=365)
+    limit: int = Query(30, ge=1, le=history_repository.PAGE_SIZE),
+    cursor: Optional[str] = None,
+    format: Literal["json", "ndjson"] = "json"
 ):
-    """Obtiene historial de datos del BCRP"""
+    """Obtiene historial de datos del BCRP (paginado por cursor o NDJSON)"""
     try:
-        supabase = get_supabase_client()
-        query = supabase.table("bcrp_data").select("*")
-        
-        if start_date:
-            query = query.gte("fecha", start_date.isoformat())
-        if end_date:
-            query = query.lte("fecha", end_date.isoformat())
-        
-        result = query.order("fecha", desc=True).limit(limit).execute()
-        
-        return {"data": result.data, "count": len(result.data)}
+        return await _paginated_history("bcrp_data", start_date, end_date, limit, cursor, format)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/market/latest")
-def get_latest_market_data():
+@cached(ttl=TTL_MARKET_LATEST, tags=("market",), response_class=JSONResponse)
+async def get_latest_market_data():
     """Obtiene los datos más recientes del mercado internacional (Cobre, DXY)"""
     try:
-        supabase = get_supabase_client()
-        result = supabase.table("market_data")\
-            .select("*")\
-            .order("fecha", desc=True)\
-            .limit(1)\
-            .execute()
+        row = await _latest_row("market_data")
         
-        if not result.data:
+        if row is None:
             raise HTTPException(status_code=404, detail="No hay datos de mercado")
         
-        return result.data[0]
+        return row
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/market/history")
-def get_market_history(
+async def get_market_history(
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
-    limit: int = Query(30, ge=1, le=365)
+    limit: int = Query(30, ge=1, le=history_repository.PAGE_SIZE),
+    cursor: Optional[str] = None,
+    format: Literal["json", "ndjson"] = "json"
 ):
-    """Obtiene historial de datos del mercado internacional"""
+    """Obtiene historial de datos del mercado internacional (paginado por cursor o NDJSON)"""
     try:
-        supabase = get_supabase_client()
-        query = supabase.table("market_data").select("*")
-        
-        if start_date:
-            query = query.gte("fecha", start_date.isoformat())
-        if end_date:
-            query = query.lte("fecha", end_date.isoformat())
-        
-        result = query.order("fecha", desc=True).limit(limit).execute()
-        
-        return {"data": result.data, "count": len(result.data)}
+        return await _paginated_history("market_data", start_date, end_date, limit, cursor, format)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/dashboard/summary")
-def get_dashboard_summary():
+@cached(ttl=TTL_DASHBOARD_SUMMARY, tags=("bcrp", "market", "casas", "analytics"), response_class=JSONResponse)
+async def get_dashboard_summary():
     """Resumen completo para dashboard: BCRP, Market, Casas y Oportunidades"""
     try:
-        supabase = get_supabase_client()
-        
-        # BCRP latest
-        bcrp = supabase.table("bcrp_data")\
-            .select("*")\
-            .order("fecha", desc=True)\
-            .limit(1)\
-            .execute()
-        
-        # Market latest
-        market = supabase.table("market_data")\
-            .select("*")\
-            .order("fecha", desc=True)\
-            .limit(1)\
-            .execute()
-        
-        # Casas analytics
-        casas_analysis = analyze_all_casas(days=7)
-        
-        # Opportunities
-        opportunities = get_best_opportunities()
+        # Las cuatro lecturas en paralelo: la latencia es la de la más lenta.
+        # Analytics y oportunidades salen de los snapshots de Celery (null mientras se calculan
+        # o si fallan; sin Redis se calculan en el request)
+        bcrp, market, analytics, opportunities = await asyncio.gather(
+            _latest_row("bcrp_data"),
+            _latest_row("market_data"),
+            _summary_snapshot("analytics", 7, calculate_analytics, _compute_analytics, 7),
+            _summary_snapshot("opportunities", "latest", detect_arbitrage, _compute_opportunities),
+        )
         
         return {
-            "bcrp": bcrp.data[0] if bcrp.data else None,
-            "market": market.data[0] if market.data else None,
-            "casas_count": len(casas_analysis),
-            "opportunities": opportunities,
+            "bcrp": bcrp,
+            "market": market,
+            "casas_count": len(analytics["data"]) if analytics else None,
+            "opportunities": opportunities["data"] if opportunities else None,
             "timestamp": datetime.now().isoformat()
         }
     except Exception as e:
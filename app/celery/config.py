@@ -1,4 +1,5 @@
 from celery import Celery
+from celery.signals import worker_process_init
 from app.core.config import settings
 
 # Configuración de Celery para tareas de data analytics
@@ -15,6 +16,35 @@ celery_app.conf.result_serializer = "json"
 celery_app.conf.accept_content = ["json"]
 celery_app.conf.result_expires = 3600  # 1 hora
 
+# Snapshots de analytics que sirve la API y vistas materializadas de la BD
+celery_app.conf.beat_schedule = {
+    "calculate-analytics-snapshots": {
+        "task": "tasks.calculate_all_analytics",
+        "schedule": settings.SNAPSHOT_REFRESH_SECONDS,
+    },
+    "detect-arbitrage-snapshot": {
+        "task": "tasks.detect_arbitrage",
+        "schedule": settings.SNAPSHOT_REFRESH_SECONDS,
+    },
+    "refresh-analytics-views": {
+        "task": "tasks.refresh_analytics_views",
+        "schedule": settings.ANALYTICS_VIEWS_REFRESH_SECONDS,
+    },
+    "maintain-hourly-partitions": {
+        "task": "tasks.maintain_hourly_partitions",
+        "schedule": settings.HOURLY_PARTITION_MAINTENANCE_SECONDS,
+    },
+}
+
+
+
+@worker_process_init.connect
+def reset_connections_after_fork(**kwargs):
+    """Cada worker prefork abre su propio pool de SQLAlchemy en lugar de heredar el del padre"""
+    from app.db.core.database import reset_engine_after_fork
+    reset_engine_after_fork()
+
+
 # Autodiscover tasks
 celery_app.autodiscover_tasks(["app.celery"])
 
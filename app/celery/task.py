@@ -3,7 +3,7 @@ Celery tasks para Data Analytics Pipeline
 Tareas asíncronas para scraping, análisis y reportes
 """
 from app.celery.config import celery_app
-from datetime import datetime, timedelta
+from datetime import datetime
 
 
 # ===== TAREAS DE SCRAPING =====
@@ -36,37 +36,69 @@ def ingest_daily_data():
 
 @celery_app.task(name="tasks.calculate_analytics")
 def calculate_analytics(days: int = 7):
-    """Calcula métricas de analytics para todas las casas"""
-    from app.analytics.price_analysis import analyze_all_casas
+    """Calcula métricas de analytics para todas las casas y guarda el snapshot de la ventana"""
+    from app.analytics.online_stats import analyze_all_casas
+    from app.db.repositories.snapshot_repository import save_snapshot
     
     try:
         analysis = analyze_all_casas(days=days)
+        snapshot = save_snapshot("analytics", days, analysis)
         return {
             "status": "success",
             "casas_analyzed": len(analysis),
-            "data": analysis
+            "version": snapshot["version"] if snapshot else None
         }
     except Exception as e:
         return {"status": "error", "error": str(e)}
 
 
+@celery_app.task(name="tasks.calculate_all_analytics")
+def calculate_all_analytics():
+    """Encola el cálculo de analytics para cada ventana de SNAPSHOT_WINDOWS"""
+    from app.core.config import settings
+    
+    for days in settings.SNAPSHOT_WINDOWS:
+        calculate_analytics.delay(days)
+    return {"status": "success", "windows": settings.SNAPSHOT_WINDOWS}
+
+
 @celery_app.task(name="tasks.detect_arbitrage")
 def detect_arbitrage():
-    """Detecta oportunidades de arbitraje"""
+    """Detecta oportunidades de arbitraje y guarda el snapshot"""
     from app.analytics.price_analysis import get_best_opportunities
+    from app.db.repositories.snapshot_repository import save_snapshot
     
     try:
         opportunities = get_best_opportunities()
+        snapshot = save_snapshot("opportunities", "latest", opportunities)
         
         # Si hay arbitraje, podría enviar alerta
         if opportunities.get("arbitrage", {}).get("possible"):
             print(f"🚀 ARBITRAJE DETECTADO: {opportunities['arbitrage']}")
         
-        return {"status": "success", "opportunities": opportunities}
+        return {
+            "status": "success",
+            "arbitrage": opportunities.get("arbitrage", {}).get("possible", False),
+            "version": snapshot["version"] if snapshot else None
+        }
     except Exception as e:
         return {"status": "error", "error": str(e)}
 
 
+@celery_app.task(name="tasks.refresh_analytics_views")
+def refresh_analytics_views():
+    """Refresca las vistas materializadas de analytics (OHLC diario y derivadas)"""
+    from app.db.repositories.analytics_repository import refresh_analytics_views as refresh
+    
+    # Si falla la tarea queda en FAILURE: sin refresco /casas/ohlc sirve datos viejos
+    try:
+        refresh()
+    except Exception as e:
+        print(f"❌ Refresco de vistas de analytics falló: {e}")
+        raise
+    return {"status": "success", "message": "Vistas de analytics refrescadas"}
+
+
 # ===== TAREAS DE REPORTES =====
 
 @celery_app.task(name="tasks.generate_daily_report")
@@ -84,17 +116,18 @@ def generate_daily_report():
 @celery_app.task(name="tasks.generate_weekly_summary")
 def generate_weekly_summary():
     """Genera resumen semanal con insights profundos"""
-    from app.analytics.price_analysis import analyze_all_casas
+    from app.analytics.online_stats import analyze_all_casas
     
     try:
+        # Estadísticas online del worker: solo se leen las filas nuevas, no la semana completa
         analysis = analyze_all_casas(days=7)
         
         # Aquí podrías generar un PDF o enviar un email especial
         summary = {
             "period": "weekly",
             "casas_count": len(analysis),
-            "most_volatile": sorted(analysis, key=lambda x: x.get("volatility_compra", 0), reverse=True)[:3],
-            "most_stable": sorted(analysis, key=lambda x: x.get("volatility_compra", 0))[:3],
+            "most_volatile": sorted(analysis, key=lambda x: x.get("volatility_compra") or 0, reverse=True)[:3],
+            "most_stable": sorted(analysis, key=lambda x: x.get("volatility_compra") or 0)[:3],
             "timestamp": datetime.now().isoformat()
         }
         
@@ -105,28 +138,39 @@ def generate_weekly_summary():
 
 # ===== TAREAS DE LIMPIEZA =====
 
+@celery_app.task(name="tasks.maintain_hourly_partitions")
+def maintain_hourly_partitions():
+    """Crea las particiones futuras de dolar_hourly y elimina las que salieron de la retención"""
+    from app.db.repositories.hourly_repository import create_hourly_partitions, drop_expired_hourly_partitions
+    
+    # Si falla (ej: falta SUPABASE_SERVICE_ROLE_KEY) la tarea queda en FAILURE.
+    # Tragarse el error dejaría los inserts en dolar_hourly_default y la retención detenida.
+    try:
+        created = create_hourly_partitions()
+        dropped = drop_expired_hourly_partitions()
+    except Exception as e:
+        print(f"❌ Mantenimiento de particiones de dolar_hourly falló: {e}")
+        raise
+    return {"status": "success", "created": created, "dropped": dropped}
+
+
 @celery_app.task(name="tasks.cleanup_old_data")
 def cleanup_old_data(days_to_keep: int = 90):
     """Limpia datos antiguos para optimizar storage"""
-    from app.db.supabase.client import get_supabase_client
+    from app.db.repositories.hourly_repository import drop_expired_hourly_partitions
     
     try:
-        supabase = get_supabase_client()
-        cutoff_date = (datetime.now() - timedelta(days=days_to_keep)).strftime("%Y-%m-%d")
-        
-        # Eliminar datos horarios antiguos (mantener solo últimos 90 días)
-        result = supabase.table("dolar_hourly")\
-            .delete()\
-            .lt("fecha", cutoff_date)\
-            .execute()
-        
-        return {
-            "status": "success",
-            "message": f"Datos anteriores a {cutoff_date} eliminados",
-            "deleted_count": len(result.data) if result.data else 0
-        }
+        # dolar_hourly está particionada por mes: se eliminan meses completos, sin DELETE
+        dropped = drop_expired_hourly_partitions(days_to_keep)
     except Exception as e:
-        return {"status": "error", "error": str(e)}
+        print(f"❌ Limpieza de dolar_hourly falló: {e}")
+        raise
+    
+    return {
+        "status": "success",
+        "message": f"Particiones con datos de hace más de {days_to_keep} días eliminadas",
+        "dropped_partitions": dropped
+    }
 
 
 # ===== TAREAS DE PRUEBA =====
@@ -0,0 +1,269 @@
+"""
+Caché en memoria con TTL y stale-while-revalidate para endpoints de lectura
+Las claves se arman con los parámetros del request y cada entrada queda asociada
+a las fuentes de datos (tags) de las que depende, para invalidarla cuando se ingestan datos nuevos.
+Con response_class se guarda el cuerpo ya serializado en lugar del objeto Python.
+"""
+import asyncio
+import functools
+import inspect
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple, Type
+
+from starlette.responses import Response
+
+from app.core.config import settings
+from app.core.redis_client import get_redis
+
+
+GENERATION_KEY = "api_cache:generation:{tag}"
+
+_store: Dict[str, Dict] = {}
+_known_tags = set()
+_refreshing = set()
+_background_tasks = set()
+_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="api-cache")
+
+# Generación por tag: local (mismo proceso) y remota (Redis, otros procesos)
+_local_generations: Dict[str, int] = {}
+_remote_generations: Dict[str, int] = {}
+_remote_checked_at = 0.0
+
+
+def cached(
+    ttl: int,
+    tags: Tuple[str, ...] = (),
+    stale_ttl: Optional[int] = None,
+    response_class: Optional[Type[Response]] = None,
+):
+    """
+    Decorador de caché para handlers de lectura.
+
+    Dentro de ttl se responde desde memoria; entre ttl y ttl + stale_ttl se responde
+    el valor anterior y se recalcula en segundo plano; después se recalcula en el request.
+    Las excepciones (ej: HTTPException 404) no se guardan.
+    Acepta handlers sync y async (en estos el refresco es una tarea del event loop).
+
+    Args:
+        ttl: Segundos que una entrada se considera fresca
+        tags: Fuentes de datos de las que depende (ej: ("casas",))
+        stale_ttl: Segundos extra en que se sirve el valor vencido
+                   (por defecto API_CACHE_STALE_SECONDS)
+        response_class: Si se indica, el valor se serializa una vez al guardarlo y cada
+                        hit devuelve una response nueva con esos bytes (ej: JSONResponse)
+    """
+    def encode(value):
+        if response_class is None or isinstance(value, Response):
+            return value
+        return response_class(value).body
+
+    def decode(stored):
+        if response_class is None or not isinstance(stored, bytes):
+            return stored
+        # Una response por request: los middlewares (ej: GZip) modifican sus headers
+        return response_class(stored)
+
+    def decorator(func: Callable) -> Callable:
+        namespace = f"{func.__module__}.{func.__name__}"
+        _known_tags.update(tags)
+
+        def lookup(args: tuple, kwargs: Dict, poll: bool = True):
+            key = make_key(namespace, args, kwargs)
+            generations = _current_generations(tags, poll)
+            stale = settings.API_CACHE_STALE_SECONDS if stale_ttl is None else stale_ttl
+
+            entry = _store.get(key)
+            if entry and entry["generations"] == generations:
+                age = time.monotonic() - entry["stored_at"]
+                if age < ttl:
+                    return key, generations, entry, False
+                if age < ttl + stale:
+                    return key, generations, entry, True
+            return key, generations, None, False
+
+        if inspect.iscoroutinefunction(func):
+            async def compute(*args, **kwargs):
+                return encode(await func(*args, **kwargs))
+
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                if not settings.API_CACHE_ENABLED:
+                    return decode(await compute(*args, **kwargs))
+
+                # La lectura de Redis (hasta REDIS_TIMEOUT) corre en un thread, no en el event loop
+                if tags and _remote_poll_due():
+                    await asyncio.get_running_loop().run_in_executor(None, _poll_remote_generations)
+
+                key, generations, entry, revalidate = lookup(args, kwargs, poll=False)
+                if entry is None:
+                    value = await compute(*args, **kwargs)
+                    _store_value(key, value, generations)
+                    return decode(value)
+                if revalidate:
+                    _refresh_async(key, compute, args, kwargs, generations)
+                return decode(entry["value"])
+        else:
+            def compute(*args, **kwargs):
+                return encode(func(*args, **kwargs))
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not settings.API_CACHE_ENABLED:
+                    return decode(compute(*args, **kwargs))
+
+                key, generations, entry, revalidate = lookup(args, kwargs)
+                if entry is None:
+                    value = compute(*args, **kwargs)
+                    _store_value(key, value, generations)
+                    return decode(value)
+                if revalidate:
+                    _refresh_in_background(key, compute, args, kwargs, generations)
+                return decode(entry["value"])
+
+        wrapper.cache_namespace = namespace
+        return wrapper
+
+    return decorator
+
+
+def make_key(namespace: str, args: tuple, kwargs: Dict) -> str:
+    """Clave de caché: handler + parámetros del request."""
+    params = json.dumps([args, kwargs], sort_keys=True, default=str)
+    return f"{namespace}:{params}"
+
+
+def invalidate(*tags: str):
+    """
+    Invalida las entradas que dependen de los tags dados.
+    Con REDIS_URL configurado también invalida la caché de los demás procesos
+    (la API los detecta en a lo más API_CACHE_REDIS_POLL_SECONDS).
+
+    Args:
+        tags: Fuentes de datos actualizadas (ej: "casas", "bcrp", "market")
+    """
+    with _lock:
+        for tag in tags:
+            _local_generations[tag] = _local_generations.get(tag, 0) + 1
+
+    client = get_redis()
+    if client is None:
+        return
+
+    try:
+        pipe = client.pipeline()
+        for tag in tags:
+            pipe.incr(GENERATION_KEY.format(tag=tag))
+        pipe.execute()
+    except Exception as e:
+        print(f"⚠️  No se pudo invalidar la caché en Redis: {e}")
+
+
+def clear():
+    """Vacía la caché del proceso."""
+    global _remote_checked_at
+
+    with _lock:
+        _store.clear()
+        _local_generations.clear()
+        _remote_generations.clear()
+        _remote_checked_at = 0.0
+
+
+def _store_value(key: str, value: Any, generations: Tuple):
+    with _lock:
+        _store.pop(key, None)
+        _store[key] = {"value": value, "stored_at": time.monotonic(), "generations": generations}
+        # Dict en orden de inserción: la primera entrada es la más antigua
+        while len(_store) > settings.API_CACHE_MAX_ENTRIES:
+            _store.pop(next(iter(_store)))
+
+
+def _claim_refresh(key: str) -> bool:
+    with _lock:
+        if key in _refreshing:
+            return False
+        _refreshing.add(key)
+        return True
+
+
+def _release_refresh(key: str):
+    with _lock:
+        _refreshing.discard(key)
+
+
+def _refresh_in_background(key: str, func: Callable, args: tuple, kwargs: Dict, generations: Tuple):
+    if not _claim_refresh(key):
+        return
+
+    def refresh():
+        try:
+            _store_value(key, func(*args, **kwargs), generations)
+        except Exception as e:
+            # Se sigue sirviendo el valor anterior hasta que venza stale_ttl
+            print(f"⚠️  Error refrescando caché {key}: {e}")
+        finally:
+            _release_refresh(key)
+
+    _executor.submit(refresh)
+
+
+def _refresh_async(key: str, func: Callable, args: tuple, kwargs: Dict, generations: Tuple):
+    """Igual que _refresh_in_background, como tarea del event loop actual."""
+    if not _claim_refresh(key):
+        return
+
+    async def refresh():
+        try:
+            _store_value(key, await func(*args, **kwargs), generations)
+        except Exception as e:
+            print(f"⚠️  Error refrescando caché {key}: {e}")
+        finally:
+            _release_refresh(key)
+
+    # El loop solo guarda referencias débiles a sus tareas
+    task = asyncio.get_running_loop().create_task(refresh())
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+def _current_generations(tags: Tuple[str, ...], poll: bool = True) -> Tuple:
+    if not tags:
+        return ()
+
+    if poll:
+        _poll_remote_generations()
+    return tuple(
+        (tag, _local_generations.get(tag, 0), _remote_generations.get(tag, 0))
+        for tag in tags
+    )
+
+
+def _poll_remote_generations():
+    """Lee las generaciones de Redis como máximo cada API_CACHE_REDIS_POLL_SECONDS."""
+    global _remote_checked_at
+
+    if not _remote_poll_due():
+        return
+    _remote_checked_at = time.monotonic()
+
+    client = get_redis()
+    if client is None or not _known_tags:
+        return
+
+    tags = sorted(_known_tags)
+    try:
+        values = client.mget([GENERATION_KEY.format(tag=tag) for tag in tags])
+    except Exception as e:
+        print(f"⚠️  No se pudo leer la generación de caché en Redis: {e}")
+        return
+
+    for tag, value in zip(tags, values):
+        _remote_generations[tag] = int(value or 0)
+
+
+def _remote_poll_due() -> bool:
+    return time.monotonic() - _remote_checked_at >= settings.API_CACHE_REDIS_POLL_SECONDS
@@ -0,0 +1,39 @@
+"""
+Cliente Redis compartido (el mismo REDIS_URL que usa Celery)
+"""
+import os
+import threading
+from typing import Optional
+
+import redis
+
+from app.core.config import settings
+
+
+_client: Optional[redis.Redis] = None
+_client_pid: Optional[int] = None
+_lock = threading.Lock()
+
+
+def get_redis() -> Optional[redis.Redis]:
+    """
+    Retorna el cliente Redis del proceso, o None si REDIS_URL no está configurado.
+    Se recrea tras un fork para no compartir conexiones entre procesos.
+    """
+    global _client, _client_pid
+
+    if not settings.REDIS_URL:
+        return None
+
+    pid = os.getpid()
+    if _client is None or _client_pid != pid:
+        with _lock:
+            if _client is None or _client_pid != pid:
+                _client = redis.Redis.from_url(
+                    settings.REDIS_URL,
+                    socket_timeout=settings.REDIS_TIMEOUT,
+                    socket_connect_timeout=settings.REDIS_TIMEOUT,
+                )
+                _client_pid = pid
+
+    return _client
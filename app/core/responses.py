@@ -0,0 +1,35 @@
+"""
+Respuestas JSON serializadas con orjson
+Los handlers que devuelven una Response evitan el jsonable_encoder de FastAPI,
+y la caché guarda el cuerpo ya serializado para no volver a codificarlo en cada hit.
+"""
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from fastapi.responses import ORJSONResponse
+
+
+OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+class JSONResponse(ORJSONResponse):
+    """ORJSONResponse que además acepta un cuerpo ya serializado (bytes)."""
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
+
+
+def dumps(value: Any) -> bytes:
+    """Serializa a JSON (fechas, NumPy y Decimal incluidos)."""
+    return orjson.dumps(value, default=_default, option=OPTIONS)
+
+
+def _default(value: Any):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Tipo no serializable: {type(value).__name__}")
@@ -1,9 +1,21 @@
 # Database core configuration
-from .database import engine, SessionLocal, Base, get_db, create_tables, drop_tables
+from .database import (
+    get_engine,
+    dispose_engine,
+    reset_engine_after_fork,
+    SessionLocal,
+    Base,
+    get_db,
+    create_tables,
+    drop_tables,
+)
 from .session import get_db_session, get_db_session_manual, DatabaseManager
 
 __all__ = [
     'engine',
+    'get_engine',
+    'dispose_engine',
+    'reset_engine_after_fork',
     'SessionLocal', 
     'Base',
     'get_db',
@@ -13,3 +25,10 @@ __all__ = [
     'get_db_session_manual',
     'DatabaseManager'
 ]
+
+
+def __getattr__(name):
+    # `engine` se crea en el primer uso (ver database.get_engine)
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
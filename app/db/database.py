@@ -1,6 +1,8 @@
 # Database module - Main entry point
 from app.db.core.database import (
-    engine,
+    get_engine,
+    dispose_engine,
+    reset_engine_after_fork,
     SessionLocal,
     Base,
     get_db,
@@ -13,6 +15,9 @@ from app.db.models import Evento, RecordatorioDolar, Dolar
 # Re-export everything for backward compatibility
 __all__ = [
     "engine",
+    "get_engine",
+    "dispose_engine",
+    "reset_engine_after_fork",
     "SessionLocal",
     "Base",
     "get_db",
@@ -25,3 +30,10 @@ __all__ = [
     "RecordatorioDolar",
     "Dolar",
 ]
+
+
+def __getattr__(name):
+    # `engine` se crea en el primer uso (ver core.database.get_engine)
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,24 @@
+-- Índice para el último precio por casa (DolarRepository.get_latest_all_origins y get_latest_n_per_origin)
+-- Se reutiliza la restricción única uq_dolar_origen_fecha (add_dolar_unique_origen_fecha.sql) en vez
+-- de un segundo índice sobre las mismas columnas: se recrea con INCLUDE de las columnas que leen las
+-- consultas, así cada escritura mantiene un solo índice (origen, fecha).
+-- El CTE recursivo salta de casa en casa con min(origen) y el LATERAL lee las últimas
+-- fechas de cada una recorriendo el índice hacia atrás: ~2 lecturas por casa; con INCLUDE no visita la tabla.
+-- La tabla tiene una fila por casa y día: reconstruir la restricción en una transacción toma poco.
+
+BEGIN;
+
+-- Versión anterior de esta migración: índice aparte (origen, fecha DESC)
+DROP INDEX IF EXISTS idx_dolar_origen_fecha_desc;
+
+ALTER TABLE dolar DROP CONSTRAINT IF EXISTS uq_dolar_origen_fecha;
+ALTER TABLE dolar
+    ADD CONSTRAINT uq_dolar_origen_fecha UNIQUE (origen, fecha)
+    INCLUDE (id, precio_compra, precio_venta, scraped_at);
+
+COMMENT ON CONSTRAINT uq_dolar_origen_fecha ON dolar IS 'Un precio por casa de cambio y día; clave de conflicto para inserts en batch y índice cubriente del último precio por casa';
+
+COMMIT;
+
+-- Estadísticas actualizadas y visibility map al día para el index-only scan
+VACUUM (ANALYZE) dolar;
@@ -0,0 +1,14 @@
+-- Restricción única (origen, fecha) en la tabla dolar
+-- Necesaria para el upsert multi-fila de insert_casas_batch (ON CONFLICT (origen, fecha))
+
+-- Eliminar duplicados previos conservando el primer registro
+DELETE FROM dolar a
+USING dolar b
+WHERE a.origen = b.origen
+  AND a.fecha = b.fecha
+  AND a.id > b.id;
+
+ALTER TABLE dolar
+    ADD CONSTRAINT uq_dolar_origen_fecha UNIQUE (origen, fecha);
+
+COMMENT ON CONSTRAINT uq_dolar_origen_fecha ON dolar IS 'Un precio por casa de cambio y día; clave de conflicto para inserts en batch';
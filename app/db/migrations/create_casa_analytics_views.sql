@@ -0,0 +1,165 @@
+-- Agregaciones de casas de cambio en el servidor (funciones RPC y vistas materializadas)
+-- La API y analytics llaman a estos objetos en vez de traer filas crudas de dolar_hourly.
+-- Idempotente: se puede re-ejecutar para actualizar funciones y vistas.
+-- Para cambiar la definición de una vista materializada: DROP MATERIALIZED VIEW ... CASCADE y re-ejecutar.
+
+
+-- ============================================================
+-- 1. Último precio por casa
+-- ============================================================
+-- Skip scan sobre el índice (origen, timestamp DESC): una búsqueda por casa para saltar a la
+-- siguiente y otra para su última fila. No depende de una ventana de tiempo, así una casa sin
+-- capturas recientes (ej: sin heartbeats del modo delta) sigue apareciendo con su último precio
+DROP FUNCTION IF EXISTS get_latest_prices_by_casa();
+
+CREATE FUNCTION get_latest_prices_by_casa()
+RETURNS TABLE (
+    origen VARCHAR,
+    "timestamp" TIMESTAMPTZ,
+    precio_compra NUMERIC,
+    precio_venta NUMERIC,
+    spread NUMERIC,
+    url TEXT
+)
+LANGUAGE sql STABLE AS $$
+    WITH RECURSIVE casas AS (
+        (SELECT h.origen FROM dolar_hourly h ORDER BY h.origen LIMIT 1)
+        UNION ALL
+        SELECT (SELECT h.origen FROM dolar_hourly h WHERE h.origen > c.origen ORDER BY h.origen LIMIT 1)
+        FROM casas c
+        WHERE c.origen IS NOT NULL
+    )
+    SELECT l.origen, l.timestamp, l.precio_compra, l.precio_venta, l.spread, l.url
+    FROM casas c
+    CROSS JOIN LATERAL (
+        SELECT h.origen, h.timestamp, h.precio_compra, h.precio_venta, h.spread, h.url
+        FROM dolar_hourly h
+        WHERE h.origen = c.origen
+        ORDER BY h.timestamp DESC
+        LIMIT 1
+    ) l
+    ORDER BY l.origen;
+$$;
+
+COMMENT ON FUNCTION get_latest_prices_by_casa() IS 'Último precio capturado de cada casa de cambio';
+
+
+-- ============================================================
+-- 2. OHLC diario por casa
+-- ============================================================
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_casa_daily_ohlc AS
+SELECT
+    origen,
+    fecha,
+    (array_agg(precio_compra ORDER BY timestamp))[1]      AS open_compra,
+    max(precio_compra)                                     AS high_compra,
+    min(precio_compra)                                     AS low_compra,
+    (array_agg(precio_compra ORDER BY timestamp DESC))[1] AS close_compra,
+    (array_agg(precio_venta ORDER BY timestamp))[1]       AS open_venta,
+    max(precio_venta)                                      AS high_venta,
+    min(precio_venta)                                      AS low_venta,
+    (array_agg(precio_venta ORDER BY timestamp DESC))[1]  AS close_venta,
+    avg(spread)                                            AS avg_spread,
+    min(spread)                                            AS min_spread,
+    max(spread)                                            AS max_spread,
+    count(*)                                               AS capturas
+FROM dolar_hourly
+GROUP BY origen, fecha;
+
+-- Requerido por REFRESH MATERIALIZED VIEW CONCURRENTLY
+CREATE UNIQUE INDEX IF NOT EXISTS uq_mv_casa_daily_ohlc ON mv_casa_daily_ohlc (origen, fecha);
+CREATE INDEX IF NOT EXISTS idx_mv_casa_daily_ohlc_fecha ON mv_casa_daily_ohlc (fecha DESC);
+
+COMMENT ON MATERIALIZED VIEW mv_casa_daily_ohlc IS 'Apertura, máximo, mínimo y cierre diario de compra/venta por casa; se refresca con refresh_casa_analytics()';
+
+
+-- ============================================================
+-- 3. Volatilidad móvil (sobre cierres diarios)
+-- ============================================================
+CREATE OR REPLACE VIEW v_casa_rolling_volatility AS
+SELECT
+    origen,
+    fecha,
+    close_compra,
+    close_venta,
+    stddev_samp(close_compra) OVER w7  AS volatility_7d_compra,
+    stddev_samp(close_venta)  OVER w7  AS volatility_7d_venta,
+    stddev_samp(close_compra) OVER w30 AS volatility_30d_compra,
+    stddev_samp(close_venta)  OVER w30 AS volatility_30d_venta
+FROM mv_casa_daily_ohlc
+WINDOW
+    w7  AS (PARTITION BY origen ORDER BY fecha RANGE BETWEEN INTERVAL '6 days' PRECEDING AND CURRENT ROW),
+    w30 AS (PARTITION BY origen ORDER BY fecha RANGE BETWEEN INTERVAL '29 days' PRECEDING AND CURRENT ROW);
+
+COMMENT ON VIEW v_casa_rolling_volatility IS 'Desviación estándar móvil de 7 y 30 días del cierre diario por casa';
+
+
+-- ============================================================
+-- 4. Volatilidad y spread por casa en una ventana
+-- ============================================================
+DROP FUNCTION IF EXISTS get_casa_stats(INTEGER);
+
+CREATE FUNCTION get_casa_stats(p_days INTEGER DEFAULT 7)
+RETURNS TABLE (
+    origen VARCHAR,
+    capturas BIGINT,
+    mean_compra NUMERIC,
+    mean_venta NUMERIC,
+    volatility_compra NUMERIC,
+    volatility_venta NUMERIC,
+    min_compra NUMERIC,
+    max_compra NUMERIC,
+    min_venta NUMERIC,
+    max_venta NUMERIC,
+    avg_spread NUMERIC,
+    min_spread NUMERIC,
+    max_spread NUMERIC,
+    last_timestamp TIMESTAMPTZ
+)
+LANGUAGE sql STABLE AS $$
+    SELECT
+        h.origen,
+        count(*),
+        round(avg(h.precio_compra), 6),
+        round(avg(h.precio_venta), 6),
+        round(stddev_samp(h.precio_compra), 6),
+        round(stddev_samp(h.precio_venta), 6),
+        min(h.precio_compra),
+        max(h.precio_compra),
+        min(h.precio_venta),
+        max(h.precio_venta),
+        round(avg(h.spread), 6),
+        min(h.spread),
+        max(h.spread),
+        max(h.timestamp)
+    FROM dolar_hourly h
+    WHERE h.timestamp >= now() - make_interval(days => p_days)
+    GROUP BY h.origen
+    ORDER BY h.origen;
+$$;
+
+COMMENT ON FUNCTION get_casa_stats(INTEGER) IS 'Volatilidad (desviación estándar), rango y spread por casa en los últimos p_days días';
+
+
+-- ============================================================
+-- Refresco de las vistas materializadas (tarea programada de Celery)
+-- ============================================================
+CREATE OR REPLACE FUNCTION refresh_casa_analytics()
+RETURNS VOID
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    REFRESH MATERIALIZED VIEW CONCURRENTLY mv_casa_daily_ohlc;
+END;
+$$;
+
+-- Solo service_role: la tarea tasks.refresh_analytics_views usa el cliente admin (SUPABASE_SERVICE_ROLE_KEY)
+REVOKE EXECUTE ON FUNCTION refresh_casa_analytics() FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION refresh_casa_analytics() TO service_role;
+
+GRANT SELECT ON mv_casa_daily_ohlc, v_casa_rolling_volatility TO anon, authenticated, service_role;
+
+-- PostgREST recarga el esquema para exponer las funciones nuevas
+NOTIFY pgrst, 'reload schema';
@@ -1,7 +1,7 @@
 # crea_tablas.py
-from app.db.database import engine, Base
+from app.db.database import get_engine, Base
 from app.db.models import *
 
 print("Creando tablas...")
-Base.metadata.create_all(bind=engine)
+Base.metadata.create_all(bind=get_engine())
 print("Tablas creadas")
@@ -0,0 +1,233 @@
+-- dolar_hourly particionada por mes (RANGE sobre timestamp)
+-- La retención pasa a ser DETACH/DROP de particiones completas (sin DELETE ni bloat)
+-- y las consultas por rango de timestamp solo leen los meses que tocan.
+-- Ejecutar una sola vez, después de create_dolar_hourly_table.sql y create_casa_analytics_views.sql.
+-- Corre en una transacción: si algo falla la tabla original queda intacta.
+
+BEGIN;
+
+
+-- ============================================================
+-- 1. Vistas que dependen de la tabla
+-- ============================================================
+-- Las vistas se ligan a la tabla (no al nombre): se recrean al final sobre la tabla nueva.
+-- get_latest_prices_by_casa y get_casa_stats son funciones SQL y resuelven el nombre al ejecutarse.
+DROP VIEW IF EXISTS v_casa_rolling_volatility;
+DROP MATERIALIZED VIEW IF EXISTS mv_casa_daily_ohlc;
+
+
+-- ============================================================
+-- 2. Tabla actual -> dolar_hourly_legacy
+-- ============================================================
+ALTER TABLE dolar_hourly RENAME TO dolar_hourly_legacy;
+ALTER INDEX IF EXISTS dolar_hourly_pkey                 RENAME TO dolar_hourly_legacy_pkey;
+ALTER INDEX IF EXISTS idx_dolar_hourly_origen           RENAME TO idx_dolar_hourly_legacy_origen;
+ALTER INDEX IF EXISTS idx_dolar_hourly_fecha            RENAME TO idx_dolar_hourly_legacy_fecha;
+ALTER INDEX IF EXISTS idx_dolar_hourly_timestamp        RENAME TO idx_dolar_hourly_legacy_timestamp;
+ALTER INDEX IF EXISTS idx_dolar_hourly_origen_timestamp RENAME TO idx_dolar_hourly_legacy_origen_timestamp;
+ALTER INDEX IF EXISTS idx_dolar_hourly_analysis         RENAME TO idx_dolar_hourly_legacy_analysis;
+
+
+-- ============================================================
+-- 3. Tabla particionada
+-- ============================================================
+-- La clave primaria debe incluir la clave de partición; id sigue usando la misma secuencia
+CREATE TABLE dolar_hourly (
+    id BIGINT NOT NULL DEFAULT nextval('dolar_hourly_id_seq'),
+    origen VARCHAR(100) NOT NULL,
+    fecha DATE NOT NULL,
+    hora TIME NOT NULL,
+    timestamp TIMESTAMPTZ NOT NULL,
+    precio_compra DECIMAL(10, 4) NOT NULL,
+    precio_venta DECIMAL(10, 4) NOT NULL,
+    spread DECIMAL(10, 4),
+    url TEXT,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    PRIMARY KEY (id, timestamp)
+) PARTITION BY RANGE (timestamp);
+
+ALTER SEQUENCE dolar_hourly_id_seq OWNED BY dolar_hourly.id;
+
+-- Índices del padre: cada partición crea los suyos.
+-- (origen, timestamp) cubre las consultas por casa; los índices solo por origen o fecha sobran.
+CREATE INDEX idx_dolar_hourly_timestamp ON dolar_hourly (timestamp DESC);
+CREATE INDEX idx_dolar_hourly_origen_timestamp ON dolar_hourly (origen, timestamp DESC);
+CREATE INDEX idx_dolar_hourly_analysis ON dolar_hourly (origen, fecha, timestamp);
+
+-- Red de seguridad: si la tarea de mantenimiento no corre, los inserts no fallan
+CREATE TABLE dolar_hourly_default PARTITION OF dolar_hourly DEFAULT;
+
+COMMENT ON TABLE dolar_hourly IS 'Almacena capturas horarias del tipo de cambio de casas de cambio para análisis de variaciones (particionada por mes)';
+COMMENT ON COLUMN dolar_hourly.spread IS 'Diferencia entre precio de venta y compra (venta - compra)';
+COMMENT ON COLUMN dolar_hourly.timestamp IS 'Timestamp exacto de la captura (incluye hora, minuto, segundo); clave de partición';
+
+-- Mismos privilegios que Supabase da por defecto a las tablas nuevas de public
+GRANT ALL ON dolar_hourly TO anon, authenticated, service_role;
+
+
+-- ============================================================
+-- 4. Gestión de particiones (tarea tasks.maintain_hourly_partitions)
+-- ============================================================
+-- Crea las particiones mensuales dolar_hourly_pYYYY_MM de los meses dados (primer día de cada mes;
+-- los calcula hourly_repository.partition_months). Idempotente. Si la partición DEFAULT tiene
+-- filas de un mes nuevo, las mueve a su partición.
+CREATE OR REPLACE FUNCTION create_dolar_hourly_partitions(p_months DATE[])
+RETURNS TABLE (partition_name TEXT)
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_month DATE;
+    v_lower TIMESTAMPTZ;
+    v_upper TIMESTAMPTZ;
+BEGIN
+    FOREACH v_month IN ARRAY p_months LOOP
+        v_month := date_trunc('month', v_month)::date;
+        partition_name := format('dolar_hourly_p%s', to_char(v_month, 'YYYY_MM'));
+        v_lower := v_month::timestamp AT TIME ZONE 'UTC';
+        v_upper := (v_month + INTERVAL '1 month')::timestamp AT TIME ZONE 'UTC';
+
+        IF to_regclass(partition_name) IS NULL THEN
+            CREATE TEMP TABLE dolar_hourly_moved (LIKE dolar_hourly) ON COMMIT DROP;
+
+            WITH moved AS (
+                DELETE FROM dolar_hourly_default
+                WHERE timestamp >= v_lower AND timestamp < v_upper
+                RETURNING *
+            )
+            INSERT INTO dolar_hourly_moved SELECT * FROM moved;
+
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF dolar_hourly FOR VALUES FROM (%L) TO (%L)',
+                partition_name, v_lower, v_upper
+            );
+
+            INSERT INTO dolar_hourly SELECT * FROM dolar_hourly_moved;
+            DROP TABLE dolar_hourly_moved;
+
+            RETURN NEXT;
+        END IF;
+    END LOOP;
+END;
+$$;
+
+-- Separa (y por defecto elimina) las particiones de los meses anteriores a p_before_month y borra
+-- de la partición DEFAULT las filas anteriores a p_cutoff (los límites los calcula
+-- hourly_repository.retention_bounds). Separar una partición es un cambio de catálogo: no recorre
+-- filas ni deja tuplas muertas. DEFAULT solo tiene filas si el mantenimiento dejó de correr.
+CREATE OR REPLACE FUNCTION drop_expired_dolar_hourly_partitions(
+    p_before_month DATE,
+    p_cutoff TIMESTAMPTZ,
+    p_drop BOOLEAN DEFAULT TRUE
+)
+RETURNS TABLE (partition_name TEXT)
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    FOR partition_name IN
+        SELECT c.relname::text
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'dolar_hourly'::regclass
+          AND c.relname ~ '^dolar_hourly_p[0-9]{4}_[0-9]{2}$'
+          AND to_date(right(c.relname, 7), 'YYYY_MM') < date_trunc('month', p_before_month)::date
+        ORDER BY c.relname
+    LOOP
+        EXECUTE format('ALTER TABLE dolar_hourly DETACH PARTITION %I', partition_name);
+        IF p_drop THEN
+            EXECUTE format('DROP TABLE %I', partition_name);
+        END IF;
+        RETURN NEXT;
+    END LOOP;
+
+    DELETE FROM dolar_hourly_default WHERE timestamp < p_cutoff;
+END;
+$$;
+
+-- Solo service_role: las tareas las llaman con el cliente admin (SUPABASE_SERVICE_ROLE_KEY)
+REVOKE EXECUTE ON FUNCTION create_dolar_hourly_partitions(DATE[]) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION drop_expired_dolar_hourly_partitions(DATE, TIMESTAMPTZ, BOOLEAN) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION create_dolar_hourly_partitions(DATE[]) TO service_role;
+GRANT EXECUTE ON FUNCTION drop_expired_dolar_hourly_partitions(DATE, TIMESTAMPTZ, BOOLEAN) TO service_role;
+
+
+-- ============================================================
+-- 5. Copia de los datos
+-- ============================================================
+-- Particiones (meses UTC) desde el mes más antiguo guardado hasta 3 meses adelante
+SELECT create_dolar_hourly_partitions(ARRAY(
+    SELECT generate_series(
+        date_trunc('month', coalesce((SELECT min(timestamp) FROM dolar_hourly_legacy), now()) AT TIME ZONE 'UTC'),
+        date_trunc('month', now() AT TIME ZONE 'UTC') + INTERVAL '3 months',
+        INTERVAL '1 month'
+    )::date
+));
+
+INSERT INTO dolar_hourly (id, origen, fecha, hora, timestamp, precio_compra, precio_venta, spread, url, created_at)
+SELECT id, origen, fecha, hora, timestamp, precio_compra, precio_venta, spread, url, created_at
+FROM dolar_hourly_legacy;
+
+DO $$
+BEGIN
+    IF (SELECT count(*) FROM dolar_hourly) <> (SELECT count(*) FROM dolar_hourly_legacy) THEN
+        RAISE EXCEPTION 'La copia a dolar_hourly particionada no coincide con la tabla original';
+    END IF;
+END;
+$$;
+
+DROP TABLE dolar_hourly_legacy;
+
+
+-- ============================================================
+-- 6. Vistas de create_casa_analytics_views.sql sobre la tabla nueva
+-- ============================================================
+CREATE MATERIALIZED VIEW mv_casa_daily_ohlc AS
+SELECT
+    origen,
+    fecha,
+    (array_agg(precio_compra ORDER BY timestamp))[1]      AS open_compra,
+    max(precio_compra)                                     AS high_compra,
+    min(precio_compra)                                     AS low_compra,
+    (array_agg(precio_compra ORDER BY timestamp DESC))[1] AS close_compra,
+    (array_agg(precio_venta ORDER BY timestamp))[1]       AS open_venta,
+    max(precio_venta)                                      AS high_venta,
+    min(precio_venta)                                      AS low_venta,
+    (array_agg(precio_venta ORDER BY timestamp DESC))[1]  AS close_venta,
+    avg(spread)                                            AS avg_spread,
+    min(spread)                                            AS min_spread,
+    max(spread)                                            AS max_spread,
+    count(*)                                               AS capturas
+FROM dolar_hourly
+GROUP BY origen, fecha;
+
+CREATE UNIQUE INDEX uq_mv_casa_daily_ohlc ON mv_casa_daily_ohlc (origen, fecha);
+CREATE INDEX idx_mv_casa_daily_ohlc_fecha ON mv_casa_daily_ohlc (fecha DESC);
+
+COMMENT ON MATERIALIZED VIEW mv_casa_daily_ohlc IS 'Apertura, máximo, mínimo y cierre diario de compra/venta por casa; se refresca con refresh_casa_analytics()';
+
+CREATE VIEW v_casa_rolling_volatility AS
+SELECT
+    origen,
+    fecha,
+    close_compra,
+    close_venta,
+    stddev_samp(close_compra) OVER w7  AS volatility_7d_compra,
+    stddev_samp(close_venta)  OVER w7  AS volatility_7d_venta,
+    stddev_samp(close_compra) OVER w30 AS volatility_30d_compra,
+    stddev_samp(close_venta)  OVER w30 AS volatility_30d_venta
+FROM mv_casa_daily_ohlc
+WINDOW
+    w7  AS (PARTITION BY origen ORDER BY fecha RANGE BETWEEN INTERVAL '6 days' PRECEDING AND CURRENT ROW),
+    w30 AS (PARTITION BY origen ORDER BY fecha RANGE BETWEEN INTERVAL '29 days' PRECEDING AND CURRENT ROW);
+
+COMMENT ON VIEW v_casa_rolling_volatility IS 'Desviación estándar móvil de 7 y 30 días del cierre diario por casa';
+
+GRANT SELECT ON mv_casa_daily_ohlc, v_casa_rolling_volatility TO anon, authenticated, service_role;
+
+COMMIT;
+
+-- PostgREST recarga el esquema para exponer las funciones nuevas
+NOTIFY pgrst, 'reload schema';
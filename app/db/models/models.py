@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Date, Time, Float, DateTime
+from sqlalchemy import Column, Integer, String, Date, Time, Float, DateTime, Index
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
 
@@ -32,6 +32,18 @@ class RecordatorioDolar(Base):
 
 class Dolar(Base):
     __tablename__ = "dolar"
+    # Un precio por casa y día: clave de los upserts en batch y, con INCLUDE, índice cubriente
+    # del último precio por casa (add_dolar_unique_origen_fecha.sql y add_dolar_latest_index.sql).
+    # En la base es una restricción UNIQUE ... INCLUDE; UniqueConstraint no acepta INCLUDE
+    __table_args__ = (
+        Index(
+            "uq_dolar_origen_fecha",
+            "origen",
+            "fecha",
+            unique=True,
+            postgresql_include=["id", "precio_compra", "precio_venta", "scraped_at"],
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     origen = Column(String, nullable=False)  # Ej: SBS, BCRP
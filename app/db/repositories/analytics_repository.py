@@ -0,0 +1,114 @@
+"""
+Repository de analytics agregados en el servidor
+Llama a las funciones y vistas de create_casa_analytics_views.sql:
+solo viajan resultados agregados, nunca filas crudas de dolar_hourly.
+"""
+from datetime import date
+from typing import Dict, List, Optional
+
+from app.db.supabase.client import get_supabase_admin_client, get_supabase_client
+
+
+# PostgREST corta cada respuesta en max-rows (1000 por defecto en Supabase)
+PAGE_SIZE = 1000
+
+
+def get_latest_prices_by_casa() -> List[Dict]:
+    """
+    Último precio de cada casa (RPC get_latest_prices_by_casa).
+
+    Returns:
+        Lista de dicts con origen, timestamp, precio_compra, precio_venta, spread y url
+    """
+    supabase = get_supabase_client()
+    result = supabase.rpc("get_latest_prices_by_casa").execute()
+    return result.data or []
+
+
+def get_casa_stats(days: int = 7) -> List[Dict]:
+    """
+    Volatilidad, rango y spread por casa en los últimos `days` días (RPC get_casa_stats).
+
+    Args:
+        days: Ventana en días
+
+    Returns:
+        Lista de dicts por casa
+    """
+    supabase = get_supabase_client()
+    result = supabase.rpc("get_casa_stats", {"p_days": days}).execute()
+    return result.data or []
+
+
+def get_daily_ohlc(
+    start_date: date,
+    end_date: Optional[date] = None,
+    origen: Optional[str] = None,
+) -> List[Dict]:
+    """
+    OHLC diario de compra/venta por casa (vista mv_casa_daily_ohlc).
+
+    Args:
+        start_date: Fecha inicio
+        end_date: Fecha fin (opcional)
+        origen: Casa de cambio (opcional, por defecto todas)
+
+    Returns:
+        Lista de filas ordenadas por fecha y casa
+    """
+    return _select_range("mv_casa_daily_ohlc", start_date, end_date, origen)
+
+
+def get_rolling_volatility(
+    start_date: date,
+    end_date: Optional[date] = None,
+    origen: Optional[str] = None,
+) -> List[Dict]:
+    """
+    Volatilidad móvil de 7 y 30 días del cierre diario (vista v_casa_rolling_volatility).
+
+    Args:
+        start_date: Fecha inicio
+        end_date: Fecha fin (opcional)
+        origen: Casa de cambio (opcional, por defecto todas)
+
+    Returns:
+        Lista de filas ordenadas por fecha y casa
+    """
+    return _select_range("v_casa_rolling_volatility", start_date, end_date, origen)
+
+
+def refresh_analytics_views():
+    """
+    Refresca las vistas materializadas (RPC refresh_casa_analytics).
+    Solo service_role puede ejecutarla: usa el cliente admin (SUPABASE_SERVICE_ROLE_KEY).
+    """
+    supabase = get_supabase_admin_client()
+    supabase.rpc("refresh_casa_analytics").execute()
+
+
+def _select_range(
+    relation: str,
+    start_date: date,
+    end_date: Optional[date],
+    origen: Optional[str],
+) -> List[Dict]:
+    supabase = get_supabase_client()
+
+    rows = []
+    while True:
+        query = supabase.table(relation)\
+            .select("*")\
+            .gte("fecha", start_date.isoformat())
+
+        if end_date:
+            query = query.lte("fecha", end_date.isoformat())
+        if origen:
+            query = query.eq("origen", origen)
+
+        result = query.order("fecha").order("origen").range(len(rows), len(rows) + PAGE_SIZE - 1).execute()
+        page = result.data or []
+        rows.extend(page)
+
+        if len(page) < PAGE_SIZE:
+            return rows
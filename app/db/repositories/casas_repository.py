@@ -52,6 +52,10 @@ def insert_casas_batch(casas: List[Dict], fecha: str) -> Dict[str, int]:
     """
     Inserta múltiples casas de cambio en batch.
     
+    Envía todo el scrape en un único upsert multi-fila con
+    ON CONFLICT (origen, fecha) DO NOTHING: las filas que ya existen
+    se ignoran en el servidor y solo las insertadas vuelven en la respuesta.
+    
     Args:
         casas: Lista de casas scrapeadas
         fecha: Fecha en formato 'YYYY-MM-DD'
@@ -59,22 +63,38 @@ def insert_casas_batch(casas: List[Dict], fecha: str) -> Dict[str, int]:
     Returns:
         Dict con contadores de insertados y omitidos
     """
-    inserted = 0
-    skipped = 0
-    
+    # Un mismo origen repetido en el lote no puede afectar dos veces la misma fila
+    rows = {}
     for casa in casas:
-        casa_data = {
+        rows.setdefault(casa["nombre"], {
             "origen": casa["nombre"],
             "fecha": fecha,
             "precio_compra": casa["compra"],
             "precio_venta": casa["venta"],
-        }
+        })
+    
+    if not rows:
+        return {"inserted": 0, "skipped": 0}
+    
+    try:
+        supabase = get_supabase_client()
+        
+        result = supabase.table("dolar")\
+            .upsert(
+                list(rows.values()),
+                on_conflict="origen,fecha",
+                ignore_duplicates=True,
+            )\
+            .execute()
         
-        if insert_casa_precio(casa_data):
-            inserted += 1
-        else:
-            skipped += 1
+    except Exception as e:
+        print(f"❌ Error insertando batch de {len(rows)} casas para {fecha}: {e}")
+        return {"inserted": 0, "skipped": len(casas)}
+    
+    inserted = len(result.data) if result.data else 0
+    skipped = len(casas) - inserted
     
+    print(f"✅ Batch {fecha}: {inserted} insertadas, {skipped} omitidas")
     return {"inserted": inserted, "skipped": skipped}
 
 
@@ -126,6 +146,38 @@ def get_casas_by_date(fecha: str) -> List[Dict]:
         return []
 
 
+def get_casas_range(start_fecha: str, end_fecha: str, page_size: int = 1000) -> List[Dict]:
+    """
+    Obtiene los precios diarios de todas las casas en un rango, paginando
+    (PostgREST corta cada respuesta en max-rows).
+    
+    Args:
+        start_fecha: Fecha inicio 'YYYY-MM-DD'
+        end_fecha: Fecha fin 'YYYY-MM-DD'
+        page_size: Filas por request
+        
+    Returns:
+        Lista de dicts con origen, fecha, precio_compra y precio_venta
+    """
+    supabase = get_supabase_client()
+    
+    rows = []
+    while True:
+        result = supabase.table("dolar")\
+            .select("origen, fecha, precio_compra, precio_venta")\
+            .gte("fecha", start_fecha)\
+            .lte("fecha", end_fecha)\
+            .order("fecha")\
+            .order("origen")\
+            .range(len(rows), len(rows) + page_size - 1)\
+            .execute()
+        page = result.data or []
+        rows.extend(page)
+        
+        if len(page) < page_size:
+            return rows
+
+
 if __name__ == "__main__":
     # Prueba
     from datetime import datetime
@@ -0,0 +1,131 @@
+"""
+Repository de historiales paginados por keyset
+Cada página continúa desde el último (fecha, id) entregado en lugar de usar OFFSET:
+el costo por página es constante aunque se recorran años de historia.
+"""
+import base64
+import json
+from datetime import date, datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from app.db.supabase.client import get_supabase_client
+
+
+# PostgREST corta cada respuesta en max-rows (1000 por defecto en Supabase)
+PAGE_SIZE = 1000
+
+
+def encode_cursor(row: Dict, time_field: str = "fecha") -> str:
+    """Cursor opaco con la clave (time_field, id) de la última fila entregada."""
+    key = json.dumps([row[time_field], row["id"]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(key.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    """
+    Clave (valor, id) de un cursor generado por encode_cursor.
+    El valor va dentro de un filtro de PostgREST: solo se aceptan fechas o
+    timestamps ISO y se re-serializan, así no puede inyectar condiciones.
+
+    Raises:
+        ValueError: Si el cursor no es válido
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(value, str) or type(row_id) is not int:
+            raise ValueError
+        return _iso_value(value), row_id
+    except Exception:
+        raise ValueError(f"Cursor inválido: {cursor}")
+
+
+def _iso_value(value: str) -> str:
+    try:
+        return date.fromisoformat(value).isoformat()
+    except ValueError:
+        return datetime.fromisoformat(value).isoformat()
+
+
+def get_history_page(
+    table: str,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    limit: int = 30,
+    cursor: Optional[str] = None,
+    desc: bool = True,
+    time_field: str = "fecha",
+    origen: Optional[str] = None,
+) -> Tuple[List[Dict], Optional[str]]:
+    """
+    Una página del historial de una tabla ordenada por (time_field, id).
+
+    Args:
+        table: Tabla (bcrp_data, market_data, dolar_hourly)
+        start_date: Fecha inicio (opcional)
+        end_date: Fecha fin (opcional)
+        limit: Filas por página
+        cursor: Cursor de la página anterior (None para la primera)
+        desc: Más recientes primero
+        time_field: Columna de orden ("fecha" o "timestamp")
+        origen: Casa de cambio (opcional, solo tablas con origen)
+
+    Returns:
+        Tupla (filas, cursor de la página siguiente o None si no hay más)
+    """
+    supabase = get_supabase_client()
+    query = supabase.table(table).select("*")
+
+    if start_date:
+        query = query.gte(time_field, start_date.isoformat())
+    if end_date:
+        # Para timestamp se incluye el día completo de end_date
+        if time_field == "fecha":
+            query = query.lte(time_field, end_date.isoformat())
+        else:
+            query = query.lt(time_field, date.fromordinal(end_date.toordinal() + 1).isoformat())
+    if origen:
+        query = query.eq("origen", origen)
+
+    if cursor:
+        value, row_id = decode_cursor(cursor)
+        op = "lt" if desc else "gt"
+        # (time_field, id) < (value, id) expandido: PostgREST no compara tuplas
+        query = query.or_(
+            f'{time_field}.{op}."{value}",and({time_field}.eq."{value}",id.{op}.{row_id})'
+        )
+
+    rows = query.order(time_field, desc=desc).order("id", desc=desc).limit(limit).execute().data or []
+
+    next_cursor = encode_cursor(rows[-1], time_field) if len(rows) == limit else None
+    return rows, next_cursor
+
+
+def iter_history(
+    table: str,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    cursor: Optional[str] = None,
+    desc: bool = True,
+    time_field: str = "fecha",
+    origen: Optional[str] = None,
+    page_size: int = PAGE_SIZE,
+) -> Iterator[Dict]:
+    """
+    Recorre el historial completo página a página.
+    Solo una página vive en memoria a la vez.
+
+    Args:
+        Los mismos de get_history_page; page_size son las filas por request
+
+    Returns:
+        Iterador de filas en orden (time_field, id)
+    """
+    while True:
+        rows, cursor = get_history_page(
+            table, start_date, end_date, page_size, cursor, desc, time_field, origen
+        )
+        yield from rows
+
+        if cursor is None:
+            return
@@ -0,0 +1,233 @@
+"""
+Repository de lectura para dolar_hourly
+Reconstruye series escalonadas (step-function) cuando la tabla se guarda en modo delta
+"""
+from bisect import bisect_right
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.db.supabase.client import get_supabase_admin_client, get_supabase_client
+
+
+HOURLY_COLUMNS = "origen, timestamp, precio_compra, precio_venta, spread, url"
+
+# PostgREST corta cada respuesta en max-rows (1000 por defecto en Supabase)
+PAGE_SIZE = 1000
+
+
+def get_hourly_rows(
+    start: datetime,
+    end: datetime,
+    origen: Optional[str] = None,
+) -> List[Dict]:
+    """
+    Obtiene las filas guardadas en dolar_hourly para un rango, ordenadas por timestamp.
+
+    Args:
+        start: Inicio del rango (inclusive)
+        end: Fin del rango (inclusive)
+        origen: Casa de cambio (opcional, por defecto todas)
+
+    Returns:
+        Lista de filas tal como están en la tabla
+    """
+    supabase = get_supabase_client()
+
+    rows = []
+    while True:
+        query = supabase.table("dolar_hourly")\
+            .select(HOURLY_COLUMNS)\
+            .gte("timestamp", start.isoformat())\
+            .lte("timestamp", end.isoformat())
+
+        if origen:
+            query = query.eq("origen", origen)
+
+        result = query.order("timestamp").order("id").range(len(rows), len(rows) + PAGE_SIZE - 1).execute()
+        page = result.data or []
+        rows.extend(page)
+
+        if len(page) < PAGE_SIZE:
+            return rows
+
+
+def get_latest_hourly_by_origen(lookback_hours: int = settings.HOURLY_HEARTBEAT_HOURS) -> Dict[str, Dict]:
+    """
+    Último precio guardado de cada casa.
+    Con heartbeats cada HOURLY_HEARTBEAT_HOURS basta con mirar esa ventana.
+
+    Args:
+        lookback_hours: Horas hacia atrás a revisar
+
+    Returns:
+        Dict origen -> última fila
+    """
+    end = datetime.now()
+    rows = get_hourly_rows(end - timedelta(hours=lookback_hours), end)
+
+    latest = {}
+    for row in rows:
+        latest[row["origen"]] = row
+    return latest
+
+
+def expand_step_series(rows: List[Dict], timestamps: List[datetime]) -> List[Dict]:
+    """
+    Reconstruye la serie completa de una casa: en cada timestamp pedido
+    se repite el último precio conocido (forward fill).
+
+    Args:
+        rows: Filas de una sola casa ordenadas por timestamp
+        timestamps: Instantes a reconstruir, en orden ascendente
+
+    Returns:
+        Lista de puntos {timestamp, precio_compra, precio_venta, spread};
+        se omiten los instantes anteriores a la primera fila conocida
+    """
+    if not rows:
+        return []
+
+    row_times = [_parse_timestamp(row["timestamp"]) for row in rows]
+
+    series = []
+    for ts in timestamps:
+        idx = bisect_right(row_times, ts) - 1
+        if idx < 0:
+            continue
+        row = rows[idx]
+        series.append({
+            "timestamp": ts.isoformat(),
+            "precio_compra": row["precio_compra"],
+            "precio_venta": row["precio_venta"],
+            "spread": row["spread"],
+        })
+
+    return series
+
+
+def get_hourly_series(
+    start: datetime,
+    end: datetime,
+    step_minutes: int = 120,
+    origen: Optional[str] = None,
+) -> Dict[str, List[Dict]]:
+    """
+    Series escalonadas por casa sobre una grilla regular.
+    Lee HOURLY_HEARTBEAT_HOURS antes de start para conocer el precio vigente al inicio.
+
+    Args:
+        start: Inicio de la grilla
+        end: Fin de la grilla
+        step_minutes: Paso de la grilla en minutos
+        origen: Casa de cambio (opcional, por defecto todas)
+
+    Returns:
+        Dict origen -> serie reconstruida
+    """
+    lookback = start - timedelta(hours=settings.HOURLY_HEARTBEAT_HOURS)
+    rows = get_hourly_rows(lookback, end, origen)
+
+    grid = []
+    ts = start
+    while ts <= end:
+        grid.append(ts)
+        ts += timedelta(minutes=step_minutes)
+
+    by_origen: Dict[str, List[Dict]] = {}
+    for row in rows:
+        by_origen.setdefault(row["origen"], []).append(row)
+
+    return {
+        casa: expand_step_series(casa_rows, grid)
+        for casa, casa_rows in by_origen.items()
+    }
+
+
+def partition_months(today: date, months_ahead: int) -> List[date]:
+    """
+    Meses (primer día, UTC) que deben tener partición: el de `today` y los `months_ahead` siguientes.
+    """
+    months = []
+    year, month = today.year, today.month
+    for _ in range(months_ahead + 1):
+        months.append(date(year, month, 1))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+def retention_bounds(now: datetime, keep_days: int) -> Tuple[date, datetime]:
+    """
+    Límites de la retención de dolar_hourly.
+    Una partición se elimina solo cuando su mes completo quedó antes del corte:
+    se conservan el mes del corte y los siguientes.
+
+    Args:
+        now: Instante de referencia (UTC)
+        keep_days: Días de historia a conservar
+
+    Returns:
+        Tupla (primer mes que se conserva, corte para las filas de la partición DEFAULT)
+    """
+    cutoff = now - timedelta(days=keep_days)
+    return cutoff.date().replace(day=1), cutoff
+
+
+def create_hourly_partitions(
+    months_ahead: int = settings.HOURLY_PARTITION_MONTHS_AHEAD,
+    today: Optional[date] = None,
+) -> List[str]:
+    """
+    Crea las particiones mensuales de dolar_hourly que falten hasta `months_ahead` meses
+    adelante (RPC create_dolar_hourly_partitions). Idempotente.
+    La RPC solo la puede ejecutar service_role: usa el cliente admin.
+
+    Args:
+        months_ahead: Meses futuros a tener creados
+        today: Fecha de referencia (por defecto hoy en UTC)
+
+    Returns:
+        Nombres de las particiones creadas
+    """
+    months = partition_months(today or datetime.now(timezone.utc).date(), months_ahead)
+
+    supabase = get_supabase_admin_client()
+    result = supabase.rpc(
+        "create_dolar_hourly_partitions",
+        {"p_months": [m.isoformat() for m in months]},
+    ).execute()
+    return [row["partition_name"] for row in result.data or []]
+
+
+def drop_expired_hourly_partitions(
+    keep_days: int = settings.HOURLY_RETENTION_DAYS,
+    drop: bool = True,
+    now: Optional[datetime] = None,
+) -> List[str]:
+    """
+    Separa de dolar_hourly las particiones cuyo mes completo es anterior a `keep_days`
+    y borra de la partición DEFAULT las filas anteriores al corte
+    (RPC drop_expired_dolar_hourly_partitions). Separar una partición es un cambio
+    de catálogo, no un DELETE. Requiere service_role (cliente admin).
+
+    Args:
+        keep_days: Días de historia a conservar
+        drop: Eliminar las particiones separadas (False las deja como tablas sueltas)
+        now: Instante de referencia (por defecto ahora en UTC)
+
+    Returns:
+        Nombres de las particiones separadas
+    """
+    before_month, cutoff = retention_bounds(now or datetime.now(timezone.utc), keep_days)
+
+    supabase = get_supabase_admin_client()
+    result = supabase.rpc(
+        "drop_expired_dolar_hourly_partitions",
+        {"p_before_month": before_month.isoformat(), "p_cutoff": cutoff.isoformat(), "p_drop": drop},
+    ).execute()
+    return [row["partition_name"] for row in result.data or []]
+
+
+def _parse_timestamp(value: str) -> datetime:
+    # Se comparan timestamps locales sin zona, igual que los escribe el scraper
+    return datetime.fromisoformat(value).replace(tzinfo=None)
@@ -0,0 +1,56 @@
+"""
+Repository de lectura para market_data
+"""
+from typing import Dict, Iterable, Optional
+
+from app.db.supabase.client import get_supabase_client
+
+
+# Filas recientes leídas en la consulta única (un mes de sesiones cubre feriados largos)
+RECENT_ROWS = 31
+
+
+def get_latest_market_dates(columns: Iterable[str]) -> Dict[str, Optional[str]]:
+    """
+    Última fecha con dato guardado para cada columna de market_data.
+    Una sola consulta sobre las filas recientes con alguna columna no nula; solo una
+    columna sin dato en esas filas (ej: serie recién agregada) se consulta aparte,
+    porque no tiene historia aunque la tabla sí tenga filas recientes.
+
+    Args:
+        columns: Columnas de market_data
+
+    Returns:
+        Dict columna -> fecha 'YYYY-MM-DD' (None si la columna no tiene datos)
+    """
+    columns = list(columns)
+    if not columns:
+        return {}
+
+    supabase = get_supabase_client()
+
+    result = supabase.table("market_data")\
+        .select(", ".join(["fecha", *columns]))\
+        .or_(",".join(f"{column}.not.is.null" for column in columns))\
+        .order("fecha", desc=True)\
+        .limit(RECENT_ROWS)\
+        .execute()
+
+    latest = {column: None for column in columns}
+    for row in result.data or []:
+        for column in columns:
+            if latest[column] is None and row.get(column) is not None:
+                latest[column] = row["fecha"]
+
+    for column in columns:
+        if latest[column] is not None:
+            continue
+        result = supabase.table("market_data")\
+            .select("fecha")\
+            .not_.is_(column, "null")\
+            .order("fecha", desc=True)\
+            .limit(1)\
+            .execute()
+        latest[column] = result.data[0]["fecha"] if result.data else None
+
+    return latest
@@ -0,0 +1,108 @@
+"""
+Repository de snapshots de analytics en Redis
+Los calculan las tareas de Celery y la API los sirve con una sola lectura por clave.
+"""
+import json
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from app.core.cache import invalidate
+from app.core.config import settings
+from app.core.redis_client import get_redis
+
+
+LATEST_KEY = "analytics:snapshot:{kind}:{window}:latest"
+VERSION_KEY = "analytics:snapshot:{kind}:{window}:version"
+VERSIONED_KEY = "analytics:snapshot:{kind}:{window}:v{version}"
+PENDING_KEY = "analytics:snapshot:{kind}:{window}:pending"
+
+
+def snapshots_available() -> bool:
+    """Hay Redis para guardar y leer snapshots (REDIS_URL configurado)."""
+    return get_redis() is not None
+
+
+def save_snapshot(kind: str, window: Any, data: Any) -> Optional[Dict]:
+    """
+    Guarda una nueva versión del snapshot y la marca como la última.
+    Las versiones anteriores se conservan SNAPSHOT_RETENTION_SECONDS.
+
+    Args:
+        kind: Tipo de snapshot (ej: "analytics", "opportunities")
+        window: Ventana del cálculo (ej: days=7)
+        data: Resultado del cálculo (serializable a JSON)
+
+    Returns:
+        El snapshot guardado {version, computed_at, data}, o None sin Redis
+    """
+    client = get_redis()
+    if client is None:
+        print("⚠️  REDIS_URL no configurado: snapshot no guardado")
+        return None
+
+    version = client.incr(VERSION_KEY.format(kind=kind, window=window))
+    snapshot = {
+        "version": version,
+        "computed_at": datetime.now().isoformat(),
+        "data": data,
+    }
+    payload = json.dumps(snapshot, default=str)
+
+    pipe = client.pipeline()
+    pipe.set(
+        VERSIONED_KEY.format(kind=kind, window=window, version=version),
+        payload,
+        ex=settings.SNAPSHOT_RETENTION_SECONDS,
+    )
+    pipe.set(LATEST_KEY.format(kind=kind, window=window), payload)
+    pipe.delete(PENDING_KEY.format(kind=kind, window=window))
+    pipe.execute()
+
+    # Los endpoints cacheados que dependen de analytics deben ver la versión nueva
+    invalidate("analytics")
+
+    print(f"📸 Snapshot {kind}:{window} v{version} guardado")
+    return snapshot
+
+
+def get_latest_snapshot(kind: str, window: Any) -> Optional[Dict]:
+    """
+    Último snapshot de un tipo y ventana.
+
+    Returns:
+        Dict {version, computed_at, data}, o None si no existe o no hay Redis
+    """
+    client = get_redis()
+    if client is None:
+        return None
+
+    payload = client.get(LATEST_KEY.format(kind=kind, window=window))
+    return json.loads(payload) if payload else None
+
+
+def get_snapshot_version(kind: str, window: Any, version: int) -> Optional[Dict]:
+    """Una versión específica del snapshot (None si ya expiró)."""
+    client = get_redis()
+    if client is None:
+        return None
+
+    payload = client.get(VERSIONED_KEY.format(kind=kind, window=window, version=version))
+    return json.loads(payload) if payload else None
+
+
+def claim_snapshot_refresh(kind: str, window: Any) -> bool:
+    """
+    Marca un snapshot como pendiente de cálculo.
+    Solo el primer request que lo pide encola la tarea; los demás reciben False
+    hasta que el snapshot se guarde o pase SNAPSHOT_PENDING_SECONDS.
+    """
+    client = get_redis()
+    if client is None:
+        return False
+
+    return bool(client.set(
+        PENDING_KEY.format(kind=kind, window=window),
+        "1",
+        nx=True,
+        ex=settings.SNAPSHOT_PENDING_SECONDS,
+    ))
@@ -1,14 +1,294 @@
 """
 Cliente de Supabase para uso en servicios.
+Un cliente por proceso (se recrea tras un fork, ej: workers prefork de Celery) sobre un
+pool httpx con keep-alive y HTTP/2: las queries pequeñas reutilizan la conexión TLS
+en lugar de abrir una nueva. El pool registra su uso para detectar saturación.
 """
-from app.db.supabase.config import supabase
+import asyncio
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional
 
-def get_supabase_client():
+import httpx
+from supabase import AsyncClient, AsyncClientOptions, Client, ClientOptions, acreate_client, create_client
+
+from app.core.config import settings
+from app.db.supabase.config import (
+    SUPABASE_KEY,
+    SUPABASE_SERVICE_KEY,
+    SUPABASE_URL,
+    http_limits,
+    http_timeout,
+    is_admin_configured,
+    is_configured,
+)
+
+
+NOT_CONFIGURED = "Supabase client no está configurado. Verifica SUPABASE_URL y SUPABASE_API_KEY en .env"
+ADMIN_NOT_CONFIGURED = "Supabase admin client no está configurado. Verifica SUPABASE_URL y SUPABASE_SERVICE_ROLE_KEY en .env"
+
+_client: Optional[Client] = None
+_client_pid: Optional[int] = None
+_lock = threading.Lock()
+
+_admin_client: Optional[Client] = None
+_admin_client_pid: Optional[int] = None
+
+_async_client: Optional[AsyncClient] = None
+_async_key = None
+_async_lock: Optional[asyncio.Lock] = None
+
+# Transportes del proceso actual: "sync" y "async"
+_transports: Dict[str, "PoolMetrics"] = {}
+_transports_pid: Optional[int] = None
+
+
+class PoolMetrics:
+    """
+    Uso del pool de conexiones: requests en curso, pico y cuántos empezaron
+    con más requests en curso que conexiones (en HTTP/1.1 esperan una libre).
+    Un request termina cuando se cierra su respuesta, no al recibir los headers.
     """
-    Retorna el cliente de Supabase configurado.
+
+    def __init__(self, max_connections: int):
+        self.max_connections = max_connections
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.requests = 0
+        self.saturated = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self._metrics_lock = threading.Lock()
+
+    def start(self) -> Callable[..., None]:
+        """Registra un request; retorna la función que lo da por terminado (idempotente)."""
+        started = time.perf_counter()
+        with self._metrics_lock:
+            self.in_flight += 1
+            self.requests += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            if self.in_flight > self.max_connections:
+                self.saturated += 1
+
+        finished = []
+
+        def done(error: bool = False):
+            if finished:
+                return
+            finished.append(True)
+            with self._metrics_lock:
+                self.in_flight -= 1
+                self.busy_seconds += time.perf_counter() - started
+                if error:
+                    self.errors += 1
+
+        return done
+
+    def stats(self) -> Dict:
+        with self._metrics_lock:
+            stats = {
+                "max_connections": self.max_connections,
+                "in_flight": self.in_flight,
+                "peak_in_flight": self.peak_in_flight,
+                "requests": self.requests,
+                "saturated_requests": self.saturated,
+                "errors": self.errors,
+                "avg_request_ms": round(1000 * self.busy_seconds / self.requests, 2) if self.requests else None,
+            }
+        stats.update(self.connections())
+        return stats
+
+    def connections(self) -> Dict:
+        # Conexiones abiertas del pool de httpcore (API interna: se omite si cambia)
+        pool = getattr(self, "_pool", None)
+        try:
+            connections = list(pool.connections)
+        except Exception:
+            return {}
+        return {
+            "open_connections": len(connections),
+            "idle_connections": sum(1 for c in connections if c.is_idle()),
+        }
+
+
+class MeteredTransport(httpx.HTTPTransport, PoolMetrics):
+    """HTTPTransport que registra el uso del pool."""
+
+    def __init__(self, **kwargs):
+        httpx.HTTPTransport.__init__(self, **kwargs)
+        PoolMetrics.__init__(self, kwargs["limits"].max_connections)
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        done = self.start()
+        try:
+            response = super().handle_request(request)
+        except Exception:
+            done(error=True)
+            raise
+        response.stream = _MeteredStream(response.stream, done)
+        return response
+
+
+class AsyncMeteredTransport(httpx.AsyncHTTPTransport, PoolMetrics):
+    """AsyncHTTPTransport que registra el uso del pool."""
+
+    def __init__(self, **kwargs):
+        httpx.AsyncHTTPTransport.__init__(self, **kwargs)
+        PoolMetrics.__init__(self, kwargs["limits"].max_connections)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        done = self.start()
+        try:
+            response = await super().handle_async_request(request)
+        except Exception:
+            done(error=True)
+            raise
+        response.stream = _AsyncMeteredStream(response.stream, done)
+        return response
+
+
+class _MeteredStream(httpx.SyncByteStream):
+    def __init__(self, stream, done):
+        self._stream = stream
+        self._done = done
+
+    def __iter__(self):
+        yield from self._stream
+
+    def close(self):
+        try:
+            self._stream.close()
+        finally:
+            self._done()
+
+
+class _AsyncMeteredStream(httpx.AsyncByteStream):
+    def __init__(self, stream, done):
+        self._stream = stream
+        self._done = done
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self):
+        try:
+            await self._stream.aclose()
+        finally:
+            self._done()
+
+
+def get_supabase_client() -> Client:
+    """
+    Retorna el cliente de Supabase del proceso.
     Lanza excepción si no está disponible.
     """
-    if supabase is None:
-        raise Exception("Supabase client no está configurado. Verifica SUPABASE_URL y SUPABASE_API_KEY en .env")
-    
-    return supabase
+    global _client, _client_pid
+
+    if not is_configured():
+        raise Exception(NOT_CONFIGURED)
+
+    pid = os.getpid()
+    if _client is None or _client_pid != pid:
+        with _lock:
+            if _client is None or _client_pid != pid:
+                _client = _create_client()
+                _client_pid = pid
+
+    return _client
+
+
+def get_supabase_admin_client() -> Client:
+    """
+    Cliente con la clave service_role, solo para tareas de mantenimiento
+    (RPC de particiones y refresco de vistas materializadas, que anon no puede ejecutar).
+    Lanza excepción si SUPABASE_SERVICE_ROLE_KEY no está configurada.
+    """
+    global _admin_client, _admin_client_pid
+
+    if not is_admin_configured():
+        raise Exception(ADMIN_NOT_CONFIGURED)
+
+    pid = os.getpid()
+    if _admin_client is None or _admin_client_pid != pid:
+        with _lock:
+            if _admin_client is None or _admin_client_pid != pid:
+                _admin_client = _create_admin_client()
+                _admin_client_pid = pid
+
+    return _admin_client
+
+
+async def get_async_supabase_client() -> AsyncClient:
+    """
+    Variante async para los handlers de la API (un cliente por proceso y event loop).
+    Lanza excepción si no está disponible.
+    """
+    global _async_client, _async_key, _async_lock
+
+    if not is_configured():
+        raise Exception(NOT_CONFIGURED)
+
+    key = (os.getpid(), asyncio.get_running_loop())
+    if _async_key != key:
+        # Proceso o event loop nuevo: las conexiones del cliente anterior no sirven aquí
+        _async_key, _async_client, _async_lock = key, None, asyncio.Lock()
+
+    if _async_client is None:
+        async with _async_lock:
+            if _async_client is None:
+                _async_client = await _create_async_client()
+
+    return _async_client
+
+
+def get_pool_stats() -> Dict[str, Dict]:
+    """
+    Métricas de los pools de este proceso.
+
+    Returns:
+        Dict "sync"/"async"/"admin" -> requests en curso, pico, requests saturados,
+        errores, duración promedio y conexiones abiertas/ociosas
+    """
+    if _transports_pid != os.getpid():
+        return {}
+    return {name: transport.stats() for name, transport in _transports.items()}
+
+
+def _register_transport(name: str, transport: PoolMetrics):
+    global _transports, _transports_pid
+
+    if _transports_pid != os.getpid():
+        _transports, _transports_pid = {}, os.getpid()
+    _transports[name] = transport
+
+
+def _create_client() -> Client:
+    client = _build_sync_client(SUPABASE_KEY, "sync")
+    print(f"✅ Supabase client created (pid {os.getpid()}, http2={settings.SUPABASE_HTTP2})")
+    return client
+
+
+def _create_admin_client() -> Client:
+    client = _build_sync_client(SUPABASE_SERVICE_KEY, "admin")
+    print(f"✅ Supabase admin client created (pid {os.getpid()})")
+    return client
+
+
+def _build_sync_client(key: str, name: str) -> Client:
+    transport = MeteredTransport(http2=settings.SUPABASE_HTTP2, limits=http_limits())
+    http_client = httpx.Client(transport=transport, timeout=http_timeout())
+    client = create_client(SUPABASE_URL, key, options=ClientOptions(httpx_client=http_client))
+
+    _register_transport(name, transport)
+    return client
+
+
+async def _create_async_client() -> AsyncClient:
+    transport = AsyncMeteredTransport(http2=settings.SUPABASE_HTTP2, limits=http_limits())
+    http_client = httpx.AsyncClient(transport=transport, timeout=http_timeout())
+    client = await acreate_client(SUPABASE_URL, SUPABASE_KEY, options=AsyncClientOptions(httpx_client=http_client))
+
+    _register_transport("async", transport)
+    return client
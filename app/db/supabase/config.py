@@ -1,27 +1,45 @@
-from supabase import create_client, Client
-from app.core.config import settings
-from typing import Optional
+"""
+Configuración del cliente de Supabase: credenciales y transporte HTTP.
+Los clientes se crean en app/db/supabase/client.py, uno por proceso.
+"""
+import httpx
 
+from app.core.config import settings
 
 
 SUPABASE_URL = settings.SUPABASE_URL
 SUPABASE_KEY = settings.SUPABASE_API_KEY
+SUPABASE_SERVICE_KEY = settings.SUPABASE_SERVICE_ROLE_KEY
+
+
+def is_configured() -> bool:
+    return SUPABASE_URL != "" and SUPABASE_KEY != ""
+
 
-supabase: Optional[Client] = None
+def is_admin_configured() -> bool:
+    return SUPABASE_URL != "" and SUPABASE_SERVICE_KEY != ""
+
+
+def http_limits() -> httpx.Limits:
+    """Tamaño del pool: conexiones totales y las que se mantienen abiertas (keep-alive)."""
+    return httpx.Limits(
+        max_connections=settings.SUPABASE_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.SUPABASE_MAX_KEEPALIVE,
+        keepalive_expiry=settings.SUPABASE_KEEPALIVE_EXPIRY,
+    )
+
+
+def http_timeout() -> httpx.Timeout:
+    """Timeouts: conexión corta, lectura/escritura para queries grandes, espera por el pool."""
+    return httpx.Timeout(
+        settings.SUPABASE_TIMEOUT,
+        connect=settings.SUPABASE_CONNECT_TIMEOUT,
+        pool=settings.SUPABASE_POOL_TIMEOUT,
+    )
 
-if SUPABASE_URL !="" and SUPABASE_KEY != "":
-    try:
-        supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
-        print("✅ Supabase client created successfully.")
-    except Exception as e:
-        print(f"❌ Error creating Supabase client: {e}")
-        supabase = None
-else:
-    print(F"[SUPABASE_URL]: {SUPABASE_URL} ", f"[SUPABASE_KEY]: {SUPABASE_KEY}")
-    print("⚠️ SUPABASE_URL o SUPABASE_API_KEY no están configuradas. Cliente Supabase deshabilitado.")
-    supabase = None
 
 if __name__ == "__main__":
-    print("Supabase client created successfully.")
-    result = supabase.table("dolar").select("*").execute()
-    print("Data from 'dolar' table:", result.data)
\ No newline at end of file
+    from app.db.supabase.client import get_supabase_client
+
+    result = get_supabase_client().table("dolar").select("*").limit(5).execute()
+    print("Data from 'dolar' table:", result.data)
@@ -1,6 +1,9 @@
 # FastAPI entry point - Data Analytics API
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from app.core.config import settings
+from app.core.responses import JSONResponse
 from app.api.health import router as health_router
 from app.api.v1.dolar import router as dolar_router
 
@@ -8,6 +11,7 @@ app = FastAPI(
     title="Dólar Analytics API",
     description="API para análisis de datos del tipo de cambio del dólar en Perú",
     version="2.0.0",
+    default_response_class=JSONResponse,
 )
 
 # CORS para permitir acceso desde frontend
@@ -19,6 +23,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Historiales y analytics son cientos de KB de JSON repetitivo: se comprimen
+app.add_middleware(
+    GZipMiddleware,
+    minimum_size=settings.API_GZIP_MINIMUM_SIZE,
+    compresslevel=settings.API_GZIP_LEVEL,
+)
+
 # Ruta básica
 @app.get("/")
 def root():
@@ -1,7 +1,36 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select, true, update as sql_update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, aliased
 from app.db.models import Dolar
 from app.schemas.dolar import DolarCreate
-from datetime import date
+from collections import namedtuple
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+# Filas por sentencia INSERT: PostgreSQL admite hasta 65535 parámetros
+BATCH_SIZE = 1000
+
+# Columnas que un upsert actualiza cuando (origen, fecha) ya existe
+UPSERT_COLUMNS = ("precio_venta", "precio_compra", "scraped_at")
+
+DolarRow = Union[Dict, DolarCreate]
+
+# Lecturas de solo lectura (iter_rows / to_array): columnas por defecto y filas por lote del cursor
+READ_COLUMNS = ("origen", "fecha", "precio_compra", "precio_venta")
+STREAM_BATCH_SIZE = 5000
+
+NUMPY_DTYPES = {
+    "id": "i8",
+    "origen": "O",
+    "fecha": "datetime64[D]",
+    "precio_venta": "f8",
+    "precio_compra": "f8",
+    "scraped_at": "datetime64[us]",
+}
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
 
 
 class DolarRepository:
@@ -28,25 +57,135 @@ class DolarRepository:
     def get_all(self):
         return self.db.query(Dolar).all()
 
-    def get_latest_all_origins(self):
-        # Obtener el último registro de cada origen
+    def iter_rows(
+        self,
+        columns: Sequence[str] = READ_COLUMNS,
+        origen: Optional[str] = None,
+        fecha: Optional[date] = None,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        batch_size: int = STREAM_BATCH_SIZE,
+    ) -> Iterator[tuple]:
+        """
+        Variante de solo lectura de get_all / get_by_origen / get_by_fecha.
+        Selecciona solo las columnas pedidas y entrega named tuples (sin instancias ORM
+        ni identity map), leyendo de a batch_size filas con un cursor del servidor.
+
+        Args:
+            columns: Columnas de dolar a seleccionar
+            origen: Filtra por casa (opcional)
+            fecha: Filtra por un día (opcional)
+            start: Fecha inicio inclusive (opcional)
+            end: Fecha fin inclusive (opcional)
+            batch_size: Filas por lote (yield_per)
+
+        Returns:
+            Iterador de named tuples con los campos de columns, ordenado por fecha y origen
+        """
+        record = _record_type(tuple(columns))
+        stmt = _projection(columns, origen, fecha, start, end)
+        result = self.db.execute(stmt, execution_options={"yield_per": batch_size})
+
+        for partition in result.partitions():
+            for row in partition:
+                yield record._make(row)
+
+    def to_array(
+        self,
+        columns: Sequence[str] = READ_COLUMNS,
+        origen: Optional[str] = None,
+        fecha: Optional[date] = None,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        batch_size: int = STREAM_BATCH_SIZE,
+    ) -> np.ndarray:
+        """
+        Igual que iter_rows pero como array estructurado de NumPy
+        (fecha como datetime64[D], precios float64). Cada lote del cursor se
+        convierte al llegar: en memoria quedan solo los arrays, no las filas.
+
+        Returns:
+            Array estructurado con un campo por columna
+        """
+        dtype = np.dtype([(c, NUMPY_DTYPES[c]) for c in columns])
+        stmt = _projection(columns, origen, fecha, start, end)
+        result = self.db.execute(stmt, execution_options={"yield_per": batch_size})
+
+        # Una sola copia de cada nombre de casa en los campos de texto
+        interned: Dict[str, str] = {}
+        chunks = []
+        for partition in result.partitions():
+            chunk = np.empty(len(partition), dtype=dtype)
+            for column, values in zip(columns, zip(*partition)):
+                if column == "fecha":
+                    # Ordinales enteros: más rápido que convertir cada date a datetime64
+                    ordinals = np.fromiter((d.toordinal() for d in values), dtype=np.int64, count=len(values))
+                    chunk[column] = (ordinals - EPOCH_ORDINAL).astype("datetime64[D]")
+                elif dtype[column] == np.dtype("O"):
+                    chunk[column] = [interned.setdefault(v, v) for v in values]
+                else:
+                    chunk[column] = values
+            chunks.append(chunk)
+
+        return np.concatenate(chunks) if chunks else np.empty(0, dtype=dtype)
+
+    def get_latest_all_origins(self) -> List[Dolar]:
+        """
+        Último registro de cada origen.
+        En PostgreSQL son ~2 lecturas de índice por casa (ver get_latest_n_per_origin);
+        en otros motores, GROUP BY origen con max(fecha) unido a dolar.
+        """
+        if self.db.get_bind().dialect.name == "postgresql":
+            return self.get_latest_n_per_origin(1)
+
         subquery = (
-            self.db.query(
-                Dolar.origen, self.db.func.max(Dolar.fecha).label("max_fecha")
-            )
+            select(Dolar.origen, func.max(Dolar.fecha).label("max_fecha"))
             .group_by(Dolar.origen)
             .subquery()
         )
-
-        return (
-            self.db.query(Dolar)
+        stmt = (
+            select(Dolar)
             .join(
                 subquery,
                 (Dolar.origen == subquery.c.origen)
                 & (Dolar.fecha == subquery.c.max_fecha),
             )
-            .all()
+            .order_by(Dolar.origen)
         )
+        return list(self.db.scalars(stmt))
+
+    def get_latest_n_per_origin(self, n: int) -> List[Dolar]:
+        """
+        Los últimos n registros de cada origen.
+
+        En PostgreSQL no se recorre la tabla: un CTE recursivo salta de casa en casa
+        por el índice único uq_dolar_origen_fecha (min(origen) > anterior) y un LATERAL toma las
+        n fechas más recientes de cada una con ORDER BY fecha DESC LIMIT n.
+        DISTINCT ON o ROW_NUMBER() leerían todas las filas del índice.
+        En otros motores se usa ROW_NUMBER() por origen.
+
+        Args:
+            n: Registros por origen
+
+        Returns:
+            Filas ordenadas por origen y fecha descendente
+        """
+        if self.db.get_bind().dialect.name == "postgresql":
+            stmt = _latest_per_origin_skip_scan(n)
+        else:
+            rank = func.row_number().over(
+                partition_by=Dolar.origen,
+                order_by=Dolar.fecha.desc(),
+            ).label("rank")
+            ranked = select(Dolar, rank).subquery()
+            latest = aliased(Dolar, ranked)
+            stmt = (
+                select(latest)
+                .where(ranked.c.rank <= n)
+                .order_by(latest.origen, latest.fecha.desc())
+            )
+
+        return list(self.db.scalars(stmt))
 
     def create(
         self,
@@ -68,6 +207,117 @@ class DolarRepository:
         self.db.refresh(dolar)
         return dolar
 
+    def create_many(self, rows: Iterable[DolarRow]) -> List[Dolar]:
+        """
+        Inserta muchas filas en una transacción: un INSERT multi-fila por cada
+        BATCH_SIZE filas con ON CONFLICT (origen, fecha) DO NOTHING.
+
+        Args:
+            rows: Dicts o DolarCreate con origen, fecha, precio_venta y precio_compra
+
+        Returns:
+            Filas insertadas (las que ya existían se omiten)
+        """
+        return self._insert_many(rows, update_existing=False)
+
+    def upsert_many(self, rows: Iterable[DolarRow]) -> List[Dolar]:
+        """
+        Inserta o actualiza muchas filas en una transacción: INSERT multi-fila con
+        ON CONFLICT (origen, fecha) DO UPDATE de precios y scraped_at, y RETURNING.
+
+        Args:
+            rows: Dicts o DolarCreate con origen, fecha, precio_venta y precio_compra
+
+        Returns:
+            Filas insertadas o actualizadas
+        """
+        return self._insert_many(rows, update_existing=True)
+
+    def update_many(self, updates: Iterable[Tuple[int, Dict]]) -> int:
+        """
+        Actualiza muchas filas por id en una transacción (executemany, sin leerlas antes).
+        Los campos en None se omiten, igual que en update().
+
+        Args:
+            updates: Pares (id, {campo: valor})
+
+        Returns:
+            Cantidad de filas enviadas a actualizar
+        """
+        columns = set(Dolar.__table__.columns.keys()) - {"id"}
+        params = []
+        for dolar_id, fields in updates:
+            values = {k: v for k, v in fields.items() if v is not None}
+            unknown = set(values) - columns
+            if unknown:
+                raise ValueError(f"Campos desconocidos en dolar: {sorted(unknown)}")
+            if values:
+                params.append({"id": dolar_id, **values})
+
+        if not params:
+            return 0
+
+        try:
+            # UPDATE masivo por primary key del ORM: agrupa por conjunto de campos
+            self.db.execute(sql_update(Dolar), params)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+
+        return len(params)
+
+    def _insert_many(self, rows: Iterable[DolarRow], update_existing: bool) -> List[Dolar]:
+        values = self._dedupe(rows, keep_last=update_existing)
+        if not values:
+            return []
+
+        insert = _dialect_insert(self.db)
+        saved = []
+        try:
+            for i in range(0, len(values), BATCH_SIZE):
+                stmt = insert(Dolar).values(values[i:i + BATCH_SIZE])
+                if update_existing:
+                    stmt = stmt.on_conflict_do_update(
+                        index_elements=["origen", "fecha"],
+                        set_={col: getattr(stmt.excluded, col) for col in UPSERT_COLUMNS},
+                    )
+                else:
+                    stmt = stmt.on_conflict_do_nothing(index_elements=["origen", "fecha"])
+
+                result = self.db.scalars(
+                    stmt.returning(Dolar),
+                    execution_options={"populate_existing": True},
+                )
+                saved.extend(result.all())
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+
+        return saved
+
+    @staticmethod
+    def _dedupe(rows: Iterable[DolarRow], keep_last: bool) -> List[Dict]:
+        """
+        Una fila por (origen, fecha): un mismo INSERT no puede afectar dos veces la misma fila.
+        Se ignoran los campos que no son columnas de dolar (ej: diferencia_ayer del schema).
+        """
+        columns = set(Dolar.__table__.columns.keys()) - {"id"}
+        now = datetime.utcnow()
+
+        by_key = {}
+        for row in rows:
+            data = row.model_dump() if isinstance(row, DolarCreate) else dict(row)
+            values = {k: v for k, v in data.items() if k in columns and v is not None}
+            values.setdefault("scraped_at", now)
+
+            key = (values["origen"], values["fecha"])
+            if keep_last or key not in by_key:
+                by_key[key] = values
+
+        return list(by_key.values())
+
     def update(
         self,
         dolar_id: int,
@@ -104,3 +354,72 @@ class DolarRepository:
         self.db.delete(dolar)
         self.db.commit()
         return dolar
+
+
+def _dialect_insert(db: Session):
+    """insert() con ON CONFLICT del dialecto de la sesión (PostgreSQL en producción, SQLite en pruebas)."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert
+    if dialect == "sqlite":
+        return sqlite.insert
+    raise ValueError(f"Dialecto no soportado: {dialect}")
+
+
+def _latest_per_origin_skip_scan(n: int):
+    """WITH RECURSIVE origenes (skip scan) JOIN LATERAL (... ORDER BY fecha DESC LIMIT n)."""
+    anchor = select(func.min(Dolar.origen).label("origen")).cte("origenes", recursive=True)
+    siguiente = aliased(Dolar)
+    origenes = anchor.union_all(
+        select(
+            select(func.min(siguiente.origen))
+            .where(siguiente.origen > anchor.c.origen)
+            .scalar_subquery()
+        ).where(anchor.c.origen.is_not(None))
+    )
+
+    ultimos = (
+        select(Dolar)
+        .where(Dolar.origen == origenes.c.origen)
+        .order_by(Dolar.fecha.desc())
+        .limit(n)
+        .lateral("ultimos")
+    )
+    fila = aliased(Dolar, ultimos)
+
+    return (
+        select(fila)
+        .select_from(origenes)
+        .join(ultimos, true())
+        .order_by(fila.origen, fila.fecha.desc())
+    )
+
+
+@lru_cache(maxsize=32)
+def _record_type(columns: Tuple[str, ...]):
+    # namedtuple define __slots__ = (): cada fila pesa lo que una tupla
+    return namedtuple("DolarRecord", columns)
+
+
+def _projection(
+    columns: Sequence[str],
+    origen: Optional[str],
+    fecha: Optional[date],
+    start: Optional[date],
+    end: Optional[date],
+):
+    unknown = [c for c in columns if c not in NUMPY_DTYPES]
+    if unknown or not columns:
+        raise ValueError(f"Columnas inválidas para dolar: {unknown or 'ninguna'}")
+
+    stmt = select(*(Dolar.__table__.c[c] for c in columns))
+    if origen is not None:
+        stmt = stmt.where(Dolar.origen == origen)
+    if fecha is not None:
+        stmt = stmt.where(Dolar.fecha == fecha)
+    if start is not None:
+        stmt = stmt.where(Dolar.fecha >= start)
+    if end is not None:
+        stmt = stmt.where(Dolar.fecha <= end)
+
+    return stmt.order_by(Dolar.fecha, Dolar.origen)
@@ -0,0 +1,147 @@
+"""
+Pool de navegadores headless reutilizables para los scrapers con Selenium
+Mantiene instancias calientes, las recicla tras N páginas o ante un crash
+"""
+import atexit
+import os
+import queue
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Callable, Dict
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+from app.core.config import settings
+
+
+@lru_cache(maxsize=1)
+def resolve_chromedriver() -> str:
+    """
+    Resuelve (y descarga si hace falta) el binario de chromedriver una sola vez por proceso.
+    """
+    from webdriver_manager.chrome import ChromeDriverManager
+
+    return ChromeDriverManager().install()
+
+
+class BrowserPool:
+    """
+    Pool de drivers de Selenium.
+
+    Uso:
+        with pool.driver() as driver:
+            driver.get(url)
+    """
+
+    def __init__(
+        self,
+        driver_factory: Callable,
+        size: int = settings.BROWSER_POOL_SIZE,
+        max_pages: int = settings.BROWSER_MAX_PAGES,
+    ):
+        self._factory = driver_factory
+        self._size = size
+        self._max_pages = max_pages
+        self._lock = threading.Lock()
+        self._reset()
+        atexit.register(self.close)
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._idle = queue.LifoQueue()
+        self._pages: Dict[int, int] = {}
+        self._created = 0
+
+    @contextmanager
+    def driver(self, timeout: float = 60):
+        """
+        Presta un driver del pool y lo devuelve al terminar.
+        Si el bloque lanza WebDriverException (salvo un timeout de espera)
+        el driver se descarta.
+        """
+        driver = self._acquire(timeout)
+        broken = False
+        try:
+            yield driver
+        except WebDriverException as e:
+            broken = not isinstance(e, TimeoutException)
+            raise
+        finally:
+            self._release(driver, broken)
+
+    def _acquire(self, timeout: float):
+        with self._lock:
+            # Tras un fork (Celery prefork) los navegadores del padre no son nuestros
+            if self._pid != os.getpid():
+                self._reset()
+
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                driver = None
+
+            if driver is None and self._created < self._size:
+                self._created += 1
+                create = True
+            else:
+                create = False
+
+        if create:
+            try:
+                driver = self._factory()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+            with self._lock:
+                self._pages[id(driver)] = 0
+            return driver
+
+        if driver is None:
+            driver = self._idle.get(timeout=timeout)
+
+        if not self._is_alive(driver):
+            self._discard(driver)
+            return self._acquire(timeout)
+
+        return driver
+
+    def _release(self, driver, broken: bool):
+        with self._lock:
+            pages = self._pages.get(id(driver), 0) + 1
+            self._pages[id(driver)] = pages
+
+        if broken or pages >= self._max_pages:
+            self._discard(driver)
+        else:
+            self._idle.put(driver)
+
+    def _discard(self, driver):
+        with self._lock:
+            self._pages.pop(id(driver), None)
+            self._created -= 1
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    @staticmethod
+    def _is_alive(driver) -> bool:
+        try:
+            driver.current_url
+            return True
+        except WebDriverException:
+            return False
+
+    def close(self):
+        """Cierra todos los navegadores inactivos del pool."""
+        if self._pid != os.getpid():
+            return
+
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(driver)
@@ -4,7 +4,9 @@ Extrae datos de precios de cuantoestaeldolar.pe
 """
 from typing import List, Dict
 import requests
-from bs4 import BeautifulSoup
+
+from app.scraper.http_client import fetch
+from app.scraper.cuantoestaeldolar_parser import extract_casas
 
 
 CUANTOESTAELDOLAR_URL = "https://cuantoestaeldolar.pe/"
@@ -27,77 +29,29 @@ def scrape_casas_cambio() -> List[Dict]:
         ]
     """
     try:
-        response = requests.get(CUANTOESTAELDOLAR_URL, timeout=20)
+        response = fetch(CUANTOESTAELDOLAR_URL)
         response.raise_for_status()
     except requests.RequestException as e:
         print(f"❌ Error al conectar con {CUANTOESTAELDOLAR_URL}: {e}")
         return []
     
-    soup = BeautifulSoup(response.text, "html.parser")
-    divs = soup.find_all(class_="ExchangeHouseItem_item_col__gudqq")
-    
-    casas = []
-    
-    for div in divs:
-        item = div.find("div", class_="ExchangeHouseItem_item__FLx1C")
-        if not item:
-            continue
-        
-        # Extraer datos
-        casa_data = _extract_casa_data(item)
-        
-        # Validar datos
-        if _is_valid_casa(casa_data):
-            casas.append(casa_data)
-    
-    print(f"✅ Scrapeadas {len(casas)} casas de cambio")
-    return casas
+    return parse_casas_cambio(response.content)
 
 
-def _extract_casa_data(item) -> Dict:
+def parse_casas_cambio(raw: bytes) -> List[Dict]:
     """
-    Extrae datos de un elemento HTML de casa de cambio.
+    Extrae y valida las casas de cambio de una página ya descargada.
     
     Args:
-        item: Elemento BeautifulSoup
+        raw: Cuerpo de la respuesta de cuantoestaeldolar.pe (bytes)
         
     Returns:
-        Dict con datos de la casa
+        Lista de casas válidas (mismo formato que scrape_casas_cambio)
     """
-    # URL y nombre
-    enlace = item.find("a", href=True)
-    img = item.find("img", alt=True)
-    url = enlace["href"] if enlace else ""
-    nombre = img["alt"].strip() if img else "Desconocido"
-    
-    # Precio de compra
-    compra = None
-    compra_tag = item.find("div", class_="ValueCurrency_content_buy__Z9pSf")
-    if compra_tag:
-        p = compra_tag.find("p")
-        if p:
-            try:
-                compra = float(p.text.strip())
-            except ValueError:
-                pass
+    casas = [casa for casa in extract_casas(raw) if _is_valid_casa(casa)]
     
-    # Precio de venta
-    venta = None
-    venta_tag = item.find("div", class_="ValueCurrency_content_sale__fdX_P")
-    if venta_tag:
-        p = venta_tag.find("p")
-        if p:
-            try:
-                venta = float(p.text.strip())
-            except ValueError:
-                pass
-    
-    return {
-        "nombre": nombre,
-        "url": url,
-        "compra": compra,
-        "venta": venta
-    }
+    print(f"✅ Scrapeadas {len(casas)} casas de cambio")
+    return casas
 
 
 def _is_valid_casa(casa: Dict) -> bool:
@@ -0,0 +1,186 @@
+"""
+Extractor de casas de cambio para cuantoestaeldolar.pe
+Lee el JSON embebido en __NEXT_DATA__ directamente de los bytes de la respuesta
+y solo construye un árbol HTML (lxml) cuando el JSON no está presente.
+"""
+import json
+import re
+from typing import Dict, List, Optional
+
+try:
+    from lxml import html as lxml_html
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+
+NEXT_DATA_MARKER = b'id="__NEXT_DATA__"'
+SCRIPT_END = b"</script>"
+
+# Las clases CSS llevan un hash que cambia con cada deploy (ej: ExchangeHouseItem_item__FLx1C),
+# por eso se compara solo el prefijo estable
+ITEM_CLASS = "ExchangeHouseItem_item__"
+BUY_CLASS = "ValueCurrency_content_buy"
+SALE_CLASS = "ValueCurrency_content_sale"
+
+
+def extract_casas(raw: bytes) -> List[Dict]:
+    """
+    Extrae las casas de cambio de la página de cuantoestaeldolar.pe.
+
+    Args:
+        raw: Cuerpo de la respuesta HTTP (bytes)
+
+    Returns:
+        Lista de dicts con nombre, url, compra y venta
+    """
+    casas = extract_casas_next_data(raw)
+    if casas is not None:
+        return casas
+
+    print("⚠️  __NEXT_DATA__ no encontrado, usando parser HTML")
+    return extract_casas_html(raw)
+
+
+def slice_next_data(raw: bytes) -> Optional[bytes]:
+    """
+    Recorta el payload JSON del script __NEXT_DATA__ sin construir el DOM.
+
+    Args:
+        raw: Cuerpo de la respuesta HTTP (bytes)
+
+    Returns:
+        Bytes del JSON o None si el script no existe
+    """
+    marker = raw.find(NEXT_DATA_MARKER)
+    if marker == -1:
+        return None
+
+    start = raw.find(b">", marker)
+    if start == -1:
+        return None
+
+    end = raw.find(SCRIPT_END, start)
+    if end == -1:
+        return None
+
+    return raw[start + 1:end]
+
+
+def extract_casas_next_data(raw: bytes) -> Optional[List[Dict]]:
+    """
+    Extrae las casas desde el JSON embebido.
+
+    Args:
+        raw: Cuerpo de la respuesta HTTP (bytes)
+
+    Returns:
+        Lista de casas, o None si el JSON no está o no tiene la estructura esperada
+    """
+    payload = slice_next_data(raw)
+    if payload is None:
+        return None
+
+    try:
+        items = json.loads(payload)["props"]["pageProps"]["data"]
+    except (ValueError, KeyError, TypeError) as e:
+        print(f"⚠️  __NEXT_DATA__ inválido: {e}")
+        return None
+
+    casas = []
+    for item in items:
+        rates = item.get("rates") or {}
+        casas.append({
+            "nombre": (item.get("title") or "Desconocido").strip(),
+            "url": item.get("site") or "",
+            "compra": _to_float((rates.get("buy") or {}).get("cost")),
+            "venta": _to_float((rates.get("sale") or {}).get("cost")),
+        })
+
+    return casas
+
+
+def prices_fingerprint(raw: bytes) -> Optional[bytes]:
+    """
+    Huella de los precios publicados (nombre, compra, venta), estable ante cambios
+    de noticias, buildId u otro contenido de la página.
+
+    Args:
+        raw: Cuerpo de la respuesta HTTP (bytes)
+
+    Returns:
+        Bytes a hashear, o None si la página no trae __NEXT_DATA__
+    """
+    casas = extract_casas_next_data(raw)
+    if casas is None:
+        return None
+
+    precios = sorted(([c["nombre"], c["compra"], c["venta"]] for c in casas), key=lambda p: p[0])
+    return json.dumps(precios).encode("utf-8")
+
+
+def extract_casas_html(raw: bytes) -> List[Dict]:
+    """
+    Fallback: extrae las casas recorriendo el HTML.
+    Usa lxml si está instalado; si no, BeautifulSoup con html.parser.
+
+    Args:
+        raw: Cuerpo de la respuesta HTTP (bytes)
+
+    Returns:
+        Lista de casas
+    """
+    if LXML_AVAILABLE:
+        return _extract_casas_lxml(raw)
+    return _extract_casas_bs4(raw)
+
+
+def _extract_casas_lxml(raw: bytes) -> List[Dict]:
+    tree = lxml_html.fromstring(raw)
+
+    casas = []
+    for item in tree.xpath(f'//div[contains(@class, "{ITEM_CLASS}")]'):
+        enlace = item.xpath(".//a[@href]/@href")
+        nombre = item.xpath(".//img[@alt]/@alt")
+        compra = item.xpath(f'.//div[contains(@class, "{BUY_CLASS}")]//p[1]/text()')
+        venta = item.xpath(f'.//div[contains(@class, "{SALE_CLASS}")]//p[1]/text()')
+
+        casas.append({
+            "nombre": nombre[0].strip() if nombre else "Desconocido",
+            "url": enlace[0] if enlace else "",
+            "compra": _to_float(compra[0]) if compra else None,
+            "venta": _to_float(venta[0]) if venta else None,
+        })
+
+    return casas
+
+
+def _extract_casas_bs4(raw: bytes) -> List[Dict]:
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(raw, "html.parser")
+
+    casas = []
+    for item in soup.find_all("div", class_=re.compile(f"^{ITEM_CLASS}")):
+        enlace = item.find("a", href=True)
+        img = item.find("img", alt=True)
+        compra_tag = item.find("div", class_=re.compile(f"^{BUY_CLASS}"))
+        venta_tag = item.find("div", class_=re.compile(f"^{SALE_CLASS}"))
+        compra_p = compra_tag.find("p") if compra_tag else None
+        venta_p = venta_tag.find("p") if venta_tag else None
+
+        casas.append({
+            "nombre": img["alt"].strip() if img else "Desconocido",
+            "url": enlace["href"] if enlace else "",
+            "compra": _to_float(compra_p.text) if compra_p else None,
+            "venta": _to_float(venta_p.text) if venta_p else None,
+        })
+
+    return casas
+
+
+def _to_float(value) -> Optional[float]:
+    try:
+        return float(str(value).strip())
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,108 @@
+"""
+Caché HTTP en disco con peticiones condicionales (ETag / Last-Modified)
+Permite saltar el parseo y el guardado cuando la página no cambió desde la última ejecución
+"""
+import hashlib
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from app.core.config import settings
+from app.scraper.http_client import fetch
+
+
+class CachedResponse:
+    """
+    Resultado de fetch_cached.
+
+    changed indica si el contenido difiere del último procesado con éxito
+    bajo el mismo namespace; mark_processed() lo registra como procesado.
+    """
+
+    def __init__(self, meta_path: Path, meta: Dict, body: bytes, from_cache: bool):
+        self._meta_path = meta_path
+        self._meta = meta
+        self.body = body
+        self.from_cache = from_cache
+
+    @property
+    def changed(self) -> bool:
+        return self._meta.get("sha256") != self._meta.get("processed_sha256")
+
+    def mark_processed(self):
+        self._meta["processed_sha256"] = self._meta.get("sha256")
+        self._meta["processed_at"] = datetime.now().isoformat()
+        _write_atomic(self._meta_path, json.dumps(self._meta).encode("utf-8"))
+
+
+def fetch_cached(
+    url: str,
+    namespace: str = "default",
+    fingerprint: Optional[Callable[[bytes], Optional[bytes]]] = None,
+    **kwargs,
+) -> CachedResponse:
+    """
+    Descarga una URL reutilizando validadores y cuerpo guardados en disco.
+
+    Args:
+        url: URL a consultar
+        namespace: Consumidor de la caché (cada uno lleva su propio "último procesado")
+        fingerprint: Función que extrae de la respuesta la parte relevante para el hash
+                     (ej: solo el JSON de datos). Por defecto se usa el cuerpo completo.
+        **kwargs: Argumentos extra para fetch()
+
+    Returns:
+        CachedResponse con el cuerpo y el flag changed
+    """
+    cache_dir = Path(settings.FETCH_CACHE_DIR)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+
+    key = hashlib.sha1(f"{namespace}:{url}".encode("utf-8")).hexdigest()
+    meta_path = cache_dir / f"{key}.json"
+    body_path = cache_dir / f"{key}.body"
+
+    meta = _read_meta(meta_path) if body_path.exists() else {}
+
+    headers = dict(kwargs.pop("headers", None) or {})
+    if meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
+
+    response = fetch(url, headers=headers, **kwargs)
+
+    if response.status_code == 304:
+        print(f"♻️  {url} sin cambios (304)")
+        return CachedResponse(meta_path, meta, body_path.read_bytes(), from_cache=True)
+
+    response.raise_for_status()
+    body = response.content
+
+    relevant = fingerprint(body) if fingerprint else None
+    meta.update({
+        "url": url,
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "sha256": hashlib.sha256(relevant if relevant is not None else body).hexdigest(),
+        "fetched_at": datetime.now().isoformat(),
+    })
+
+    _write_atomic(body_path, body)
+    _write_atomic(meta_path, json.dumps(meta).encode("utf-8"))
+
+    return CachedResponse(meta_path, meta, body, from_cache=False)
+
+
+def _read_meta(path: Path) -> Dict:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_atomic(path: Path, data: bytes):
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
@@ -1,6 +1,6 @@
-import requests
 from app.core.config import settings
-from app.db.supabase.config import supabase
+from app.scraper.http_client import fetch
+from app.db.supabase.client import get_supabase_client
 from datetime import datetime
 
 URL = "https://e-consulta.sunat.gob.pe/cl-at-ittipcam/tcS01Alias/listarTipoCambio"
@@ -19,6 +19,7 @@ def time_today():
 
 def insert_db(data):
     try:
+        supabase = get_supabase_client()
         #validate already data of dolar exists 
         fecha = data.get("fecha")
         existing = supabase.table("dolar").select("*").eq("origen", data.get("origen")).eq("fecha", fecha).execute()
@@ -32,7 +33,7 @@ def insert_db(data):
     
 def get_history(origen):
     return (
-        supabase.table("dolar")
+        get_supabase_client().table("dolar")
         .select("*")
         .eq("origen", origen)
         .order("fecha", desc=True)
@@ -48,7 +49,7 @@ def dolar_sunat_today():
     payload = {"anio": today.year, "mes": today.month - 1, "token": settings.TOKEN_SUNAT_API}
     
     try:
-        response = requests.post(URL, json=payload, headers=headers, timeout=10)
+        response = fetch(URL, method="POST", json=payload, headers=headers)
         
         if not response.ok:
             print(f"⚠️ Error API SUNAT: {response.status_code}")
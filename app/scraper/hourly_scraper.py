@@ -3,14 +3,26 @@ Scraper horario para capturar variaciones de precios durante el día
 """
 from datetime import datetime
 
-from app.scraper.casas_scraper import scrape_casas_cambio
-from app.db.supabase.config import supabase
+from app.core.cache import invalidate
+from app.core.config import settings
+from app.scraper.casas_scraper import CUANTOESTAELDOLAR_URL, parse_casas_cambio
+from app.scraper.cuantoestaeldolar_parser import prices_fingerprint
+from app.scraper.fetch_cache import fetch_cached
+from app.scraper.hourly_state import (
+    build_hourly_row,
+    heartbeat_rows,
+    load_last_prices,
+    save_last_prices,
+    select_delta_rows,
+    update_state,
+)
+from app.db.supabase.client import get_supabase_client
 
 
 def insert_hourly_data(data):
     """Inserta datos con timestamp exacto (hora incluida)"""
     try:
-        result = supabase.table("dolar_hourly").insert(data).execute()
+        result = get_supabase_client().table("dolar_hourly").insert(data).execute()
         print(f"✅ Insertado: {data['origen']} - {data['timestamp']}")
         return result
     except Exception as e:
@@ -18,36 +30,80 @@ def insert_hourly_data(data):
         return None
 
 
+def store_rows(rows, state=None):
+    """
+    Inserta filas en dolar_hourly.
+    Si se pasa el estado del modo delta, registra cada fila escrita.
+    
+    Returns:
+        Cantidad de filas insertadas
+    """
+    inserted = []
+    for data in rows:
+        result = insert_hourly_data(data)
+        if result:
+            inserted.append(data)
+            if state is not None:
+                update_state(state, data)
+    inserted_count = len(inserted)
+    
+    if state is not None:
+        save_last_prices(state)
+    
+    # Los endpoints de casas deben reflejar los precios nuevos
+    if inserted_count:
+        invalidate("casas")
+    
+    return inserted_count
+
+
 def scrape_and_store_hourly():
-    """Captura datos de todas las casas y los guarda con timestamp"""
+    """
+    Captura datos de todas las casas y los guarda con timestamp.
+    
+    Con HOURLY_DELTA_MODE solo se escriben las casas cuyo precio cambió,
+    más un heartbeat cada HOURLY_HEARTBEAT_HOURS con el último precio conocido.
+    """
     print(f"\n{'='*60}")
     print(f"🕐 Iniciando scraping horario: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print(f"{'='*60}\n")
     
     try:
-        casas = scrape_casas_cambio()
-        timestamp = datetime.now().isoformat()
-        fecha = datetime.now().strftime("%Y-%m-%d")
-        hora = datetime.now().strftime("%H:%M:%S")
+        delta_mode = settings.HOURLY_DELTA_MODE
+        state = load_last_prices() if delta_mode else None
+        now = datetime.now()
+        
+        # Petición condicional: si los precios no cambiaron no se parsea ni se guarda nada
+        page = fetch_cached(
+            CUANTOESTAELDOLAR_URL,
+            namespace="hourly",
+            fingerprint=prices_fingerprint,
+        )
+        if not page.changed:
+            print("💤 Sin cambios desde la última captura.")
+            if delta_mode:
+                rows = heartbeat_rows(state, now)
+                inserted_count = store_rows(rows, state)
+                print(f"💓 Heartbeats guardados: {inserted_count}/{len(rows)}")
+            return True
+        
+        casas = parse_casas_cambio(page.body)
+        rows = [
+            build_hourly_row(casa["nombre"], casa["compra"], casa["venta"], casa.get("url", ""), now)
+            for casa in casas
+        ]
+        
+        if delta_mode:
+            rows = select_delta_rows(rows, state, now)
+            print(f"🔀 Modo delta: {len(rows)}/{len(casas)} casas con cambios o heartbeat")
+        
+        inserted_count = store_rows(rows, state)
         
-        inserted_count = 0
-        for casa in casas:
-            data = {
-                "origen": casa["nombre"],
-                "fecha": fecha,
-                "hora": hora,
-                "timestamp": timestamp,
-                "precio_compra": casa["compra"],
-                "precio_venta": casa["venta"],
-                "spread": round(casa["venta"] - casa["compra"], 4),
-                "url": casa.get("url", ""),
-            }
-            
-            result = insert_hourly_data(data)
-            if result:
-                inserted_count += 1
+        # Solo se marca como procesada si se guardó todo; si no, se reintenta la próxima vez
+        if casas and inserted_count == len(rows):
+            page.mark_processed()
         
-        print(f"\n✅ Scraping completado: {inserted_count}/{len(casas)} casas guardadas")
+        print(f"\n✅ Scraping completado: {inserted_count}/{len(rows)} casas guardadas")
         return True
         
     except Exception as e:
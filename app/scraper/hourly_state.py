@@ -0,0 +1,127 @@
+"""
+Estado local del modo delta de dolar_hourly
+Guarda el último precio escrito por casa para decidir qué filas insertar
+"""
+import json
+import os
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List
+
+from app.core.config import settings
+
+
+def load_last_prices() -> Dict[str, Dict]:
+    """
+    Carga el último precio escrito por casa.
+    Si no hay estado local (ej: runner nuevo) lo reconstruye desde dolar_hourly.
+
+    Returns:
+        Dict origen -> {precio_compra, precio_venta, url, timestamp}
+    """
+    path = Path(settings.HOURLY_STATE_PATH)
+    if path.exists():
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except ValueError:
+            print(f"⚠️  Estado local corrupto en {path}, se reconstruye desde la BD")
+
+    from app.db.repositories.hourly_repository import get_latest_hourly_by_origen
+
+    return {
+        origen: _state_entry(row)
+        for origen, row in get_latest_hourly_by_origen().items()
+    }
+
+
+def save_last_prices(state: Dict[str, Dict]):
+    """Persiste el estado de forma atómica."""
+    path = Path(settings.HOURLY_STATE_PATH)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps(state), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def select_delta_rows(rows: List[Dict], state: Dict[str, Dict], now: datetime) -> List[Dict]:
+    """
+    Filtra las filas a escribir: solo cambios de precio o heartbeats vencidos.
+
+    Args:
+        rows: Filas completas de la captura actual
+        state: Último precio escrito por casa
+        now: Instante de la captura
+
+    Returns:
+        Filas que deben insertarse
+    """
+    selected = []
+    for row in rows:
+        last = state.get(row["origen"])
+        if _is_change(row, last) or _heartbeat_due(last, now):
+            selected.append(row)
+    return selected
+
+
+def heartbeat_rows(state: Dict[str, Dict], now: datetime) -> List[Dict]:
+    """
+    Filas de heartbeat para las casas cuyo último registro es más antiguo
+    que HOURLY_HEARTBEAT_HOURS, repitiendo el último precio conocido.
+
+    Args:
+        state: Último precio escrito por casa
+        now: Instante actual
+
+    Returns:
+        Filas listas para insertar en dolar_hourly
+    """
+    return [
+        build_hourly_row(origen, last["precio_compra"], last["precio_venta"], last.get("url", ""), now)
+        for origen, last in state.items()
+        if _heartbeat_due(last, now)
+    ]
+
+
+def update_state(state: Dict[str, Dict], row: Dict):
+    """Registra una fila escrita como último precio de su casa."""
+    state[row["origen"]] = _state_entry(row)
+
+
+def build_hourly_row(origen: str, compra: float, venta: float, url: str, now: datetime) -> Dict:
+    """Construye una fila de dolar_hourly."""
+    return {
+        "origen": origen,
+        "fecha": now.strftime("%Y-%m-%d"),
+        "hora": now.strftime("%H:%M:%S"),
+        "timestamp": now.isoformat(),
+        "precio_compra": compra,
+        "precio_venta": venta,
+        "spread": round(venta - compra, 4),
+        "url": url,
+    }
+
+
+def _state_entry(row: Dict) -> Dict:
+    return {
+        "precio_compra": float(row["precio_compra"]),
+        "precio_venta": float(row["precio_venta"]),
+        "url": row.get("url") or "",
+        "timestamp": row["timestamp"],
+    }
+
+
+def _is_change(row: Dict, last: Dict) -> bool:
+    if not last:
+        return True
+    return (
+        float(row["precio_compra"]) != last["precio_compra"]
+        or float(row["precio_venta"]) != last["precio_venta"]
+    )
+
+
+def _heartbeat_due(last: Dict, now: datetime) -> bool:
+    if not last:
+        return True
+    written = datetime.fromisoformat(last["timestamp"]).replace(tzinfo=None)
+    return now - written >= timedelta(hours=settings.HOURLY_HEARTBEAT_HOURS)
@@ -0,0 +1,160 @@
+"""
+Cliente HTTP compartido para todas las fuentes de datos
+Sesión con pool de conexiones keep-alive, timeouts y reintentos por fuente
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/141.0.0.0 Safari/537.36",
+}
+
+# Configuración por fuente: prefijo de URL, timeout (conexión, lectura) y reintentos.
+# Cada prefijo recibe su propio adapter, así el presupuesto de reintentos
+# y el pool de conexiones no se comparten entre fuentes.
+SOURCES = {
+    "cuantoestaeldolar": {
+        "prefix": "https://cuantoestaeldolar.pe/",
+        "timeout": (5, 20),
+        "retries": 2,
+    },
+    "wise": {
+        "prefix": "https://wise.com/",
+        "timeout": (5, 15),
+        "retries": 2,
+    },
+    "kambista": {
+        "prefix": "https://kambista.com/",
+        "timeout": (5, 15),
+        "retries": 2,
+    },
+    "sunat": {
+        "prefix": "https://e-consulta.sunat.gob.pe/",
+        "timeout": (5, 10),
+        "retries": 1,
+        # listarTipoCambio es una consulta; reintentar el POST es seguro
+        "methods": ["GET", "POST"],
+    },
+    "bcrp": {
+        "prefix": "https://estadisticas.bcrp.gob.pe/",
+        "timeout": (5, 30),
+        "retries": 3,
+    },
+}
+
+DEFAULT_SOURCE = {"timeout": (5, 20), "retries": 1}
+
+POOL_MAXSIZE = 10
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+_session: Optional[requests.Session] = None
+_session_pid: Optional[int] = None
+_lock = threading.Lock()
+
+
+def _build_retry(config: Dict) -> Retry:
+    return Retry(
+        total=config["retries"],
+        backoff_factor=0.5,
+        status_forcelist=RETRY_STATUS,
+        allowed_methods=config.get("methods", ["GET"]),
+        raise_on_status=False,
+    )
+
+
+def _build_session() -> requests.Session:
+    session = requests.Session()
+    session.headers.update(DEFAULT_HEADERS)
+
+    session.mount(
+        "https://",
+        HTTPAdapter(pool_maxsize=POOL_MAXSIZE, max_retries=_build_retry(DEFAULT_SOURCE)),
+    )
+    for config in SOURCES.values():
+        session.mount(
+            config["prefix"],
+            HTTPAdapter(pool_maxsize=POOL_MAXSIZE, max_retries=_build_retry(config)),
+        )
+
+    return session
+
+
+def get_session() -> requests.Session:
+    """
+    Retorna la sesión HTTP compartida del proceso.
+    Se recrea tras un fork (workers prefork de Celery) para no compartir sockets.
+    """
+    global _session, _session_pid
+
+    pid = os.getpid()
+    if _session is None or _session_pid != pid:
+        with _lock:
+            if _session is None or _session_pid != pid:
+                _session = _build_session()
+                _session_pid = pid
+
+    return _session
+
+
+def _source_config(url: str) -> Dict:
+    for config in SOURCES.values():
+        if url.startswith(config["prefix"]):
+            return config
+    return DEFAULT_SOURCE
+
+
+def fetch(url: str, method: str = "GET", **kwargs) -> requests.Response:
+    """
+    Ejecuta una petición con la sesión compartida.
+
+    Args:
+        url: URL a consultar
+        method: Método HTTP
+        **kwargs: Argumentos extra para requests (json, headers, stream...)
+
+    Returns:
+        Respuesta de requests (reintentos ya aplicados según la fuente)
+    """
+    kwargs.setdefault("timeout", _source_config(url)["timeout"])
+    return get_session().request(method, url, **kwargs)
+
+
+def run_concurrently(
+    tasks: Dict[str, Callable[[], Any]],
+    max_workers: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Ejecuta varias extracciones en paralelo.
+    La latencia total es la de la fuente más lenta, no la suma.
+
+    Args:
+        tasks: Dict nombre -> función sin argumentos
+        max_workers: Máximo de hilos (por defecto uno por tarea)
+
+    Returns:
+        Dict nombre -> resultado (None si la tarea lanzó excepción)
+    """
+    if not tasks:
+        return {}
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=max_workers or len(tasks)) as executor:
+        futures = {name: executor.submit(task) for name, task in tasks.items()}
+
+        for name, future in futures.items():
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                print(f"❌ Error en extracción '{name}': {e}")
+                results[name] = None
+
+    return results
@@ -1,7 +1,8 @@
 # Scraper logic placeholder
-import requests
 from bs4 import BeautifulSoup
 
+from app.scraper.http_client import fetch
+
 WISE_URL = (
     "https://wise.com/es/currency-converter/usd-to-pen-rate?amount=1"  # para un dolar
 )
@@ -12,7 +13,7 @@ CUANTOESTAELDOLAR_URL = "https://cuantoestaeldolar.pe/"
 
 
 def scrape(url: str):
-    r = requests.get(url)
+    r = fetch(url)
     if r.status_code == 200:
         soup = BeautifulSoup(r.text, "html.parser")
         return soup, r.text
@@ -75,9 +76,7 @@ def extract_dolar_value_kambista(html: str) -> dict:
         )
 
 
-import requests
-import json
-from bs4 import BeautifulSoup
+from app.scraper.cuantoestaeldolar_parser import extract_casas_next_data
 
 CUANTOESTAELDOLAR_URL = "https://cuantoestaeldolar.pe/"
 
@@ -91,32 +90,23 @@ def get_exchange_rates_casas() -> list[dict]:
         list[dict]: lista de diccionarios con nombre, compra, venta y URL.
     """
     # Obtener HTML base
-    response = requests.get(CUANTOESTAELDOLAR_URL, timeout=20)
+    response = fetch(CUANTOESTAELDOLAR_URL)
     if response.status_code != 200:
         raise ConnectionError(f"Error HTTP {response.status_code}")
 
-    soup = BeautifulSoup(response.text, "html.parser")
-
-    # Buscar el script con los datos JSON
-    script_tag = soup.find("script", id="__NEXT_DATA__")
-    if not script_tag:
+    # Leer el JSON embebido sin construir el DOM
+    casas = extract_casas_next_data(response.content)
+    if casas is None:
         raise ValueError("No se encontró el script '__NEXT_DATA__' en la página.")
 
-    # Cargar el JSON
-    data = json.loads(script_tag.string)
-    casas = data["props"]["pageProps"]["data"]
-
-    # Procesar las casas de cambio
     resultados = []
     for c in casas:
-        nombre = c.get("title")
-        site = c.get("site", "")
-        rates = c.get("rates", {})
-        compra = float(rates["buy"]["cost"])
-        venta = float(rates["sale"]["cost"])
-
+        # Sin compra o venta no se puede calcular spread ni comparar: se omite la casa
+        if c["compra"] is None or c["venta"] is None:
+            print(f"⚠️  {c['nombre']}: sin precio de compra/venta, se omite")
+            continue
         resultados.append(
-            {"nombre": nombre, "compra": compra, "venta": venta, "sitio": site}
+            {"nombre": c["nombre"], "compra": c["compra"], "venta": c["venta"], "sitio": c["url"]}
         )
 
     return resultados
@@ -3,10 +3,9 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
-import undetected_chromedriver as uc
 from bs4 import BeautifulSoup
 
-import time
+from app.scraper.browser_pool import BrowserPool
 
 # SELENIUM
 TKAMBIO_URL = "https://tkambio.com/?gad_source=1&gad_campaignid=17557936036&gbraid=0AAAAACn9oC-oQZQZR0qR1oHnPIEEoiBEN&gclid=CjwKCAjwlOrFBhBaEiwAw4bYDe1tFs5M2TPyEAQb4sgA2_yYao4EJntVAKC-B6Yz7xbBN4H_4Wwy-hoCRVYQAvD_BwE#gad_source_1"
@@ -19,7 +18,6 @@ SUNAT_DOLAR_TODAY = "https://www.sunat.gob.pe/"
 def config_driver():
 
     options = uc.ChromeOptions()
-    options.headless = False  # Si quieres ver el navegador, usa False
 
     # Opciones anti-detección
     options.add_argument("--disable-blink-features=AutomationControlled")
@@ -28,16 +26,18 @@ def config_driver():
     options.add_argument("--disable-infobars")
     options.add_argument("--disable-extensions")
     options.add_argument("--disable-gpu")
-    options.add_argument("--start-maximized")
+    options.add_argument("--window-size=1920,1080")
 
-    driver = uc.Chrome(options=options)
+    driver = uc.Chrome(options=options, headless=True)
     return driver
 
 
-def get_html_with_selenium(url: str) -> str:
-    driver = config_driver()
+# Navegadores calientes compartidos entre llamadas
+driver_pool = BrowserPool(config_driver)
 
-    try:
+
+def get_html_with_selenium(url: str) -> str:
+    with driver_pool.driver() as driver:
         driver.get(url)
 
         # Espera hasta que algún <span class="price"> tenga texto dentro
@@ -45,11 +45,7 @@ def get_html_with_selenium(url: str) -> str:
             lambda d: d.find_element(By.CSS_SELECTOR, "span.price").text.strip() != ""
         )
 
-        html = driver.page_source
-        return html
-    finally:
-        time.sleep(2)  # opcional: para ver el navegador un momento
-        driver.quit()
+        return driver.page_source
 
 
 def extract_dolar_value_tkambio(html: str) -> dict:
@@ -78,5 +74,6 @@ def extract_dolar_value_tkambio(html: str) -> dict:
 
 
 # Ejemplo
-html = get_html_with_selenium(SOURCE_URL)
-print(html)
+if __name__ == "__main__":
+    html = get_html_with_selenium(SOURCE_URL)
+    print(html)
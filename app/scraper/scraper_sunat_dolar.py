@@ -3,18 +3,18 @@ from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.by import By
-from webdriver_manager.chrome import ChromeDriverManager
 from bs4 import BeautifulSoup
 import re
-import time
+
+from app.scraper.browser_pool import BrowserPool, resolve_chromedriver
 
 URL_SUNAT = "https://e-consulta.sunat.gob.pe/cl-at-ittipcam/tcS01Alias"
 
 
 def setup_driver():
-    ruta = ChromeDriverManager().install()
+    ruta = resolve_chromedriver()
     options = webdriver.ChromeOptions()
-    # options.add_argument("--headless=new")  # comenta esta línea si quieres ver el navegador
+    options.add_argument("--headless=new")
     options.add_argument("--window-size=1920,1080")
     options.add_argument("--disable-blink-features=AutomationControlled")
     options.add_argument("--disable-dev-shm-usage")
@@ -23,6 +23,10 @@ def setup_driver():
     return webdriver.Chrome(service=Service(ruta), options=options)
 
 
+# Navegadores calientes compartidos entre llamadas
+driver_pool = BrowserPool(setup_driver)
+
+
 def extract_number(texto):
     try:
         # Buscar cualquier número decimal en el texto
@@ -35,16 +39,19 @@ def extract_number(texto):
 
 
 def get_today_exchange_rate():
-    driver = setup_driver()
-    
     try:
-        print("⏳ Cargando página de SUNAT...")
-        driver.get(URL_SUNAT)
-        
-        # Esperar a que la página cargue completamente
-        time.sleep(5)
+        with driver_pool.driver() as driver:
+            print("⏳ Cargando página de SUNAT...")
+            driver.get(URL_SUNAT)
+            
+            # Esperar a que el calendario esté renderizado
+            WebDriverWait(driver, 15).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, "td.calendar-day"))
+            )
+            
+            html = driver.page_source
         
-        soup = BeautifulSoup(driver.page_source, "html.parser")
+        soup = BeautifulSoup(html, "html.parser")
         
         print("🔍 Buscando tipo de cambio...")
         
@@ -112,9 +119,6 @@ def get_today_exchange_rate():
         import traceback
         traceback.print_exc()
         return None
-        
-    finally:
-        driver.quit()
 
 
 if __name__ == "__main__":
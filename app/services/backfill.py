@@ -0,0 +1,160 @@
+"""
+Backfill histórico por ventanas
+Divide el rango en ventanas, las procesa en paralelo (con límite) y guarda
+un checkpoint local de las ventanas completadas para poder reanudar.
+"""
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.bcrp_service import get_bcrp_data
+from app.services.market_service import get_international_data
+
+
+# Las ventanas que tocan los últimos días no se marcan como completas:
+# BCRP y Yahoo pueden publicar o corregir esos datos más tarde
+SETTLE_DAYS = 3
+
+# Una ventana sin datos de mercado con al menos estos días hábiles se considera fallida
+# (yfinance no lanza excepción ante errores de red, solo retorna vacío)
+MIN_BUSINESS_DAYS_FOR_DATA = 5
+
+
+def split_windows(start_date: str, end_date: str, window_days: int) -> List[Tuple[str, str]]:
+    """
+    Divide un rango de fechas en ventanas consecutivas.
+
+    Args:
+        start_date: Fecha inicio 'YYYY-MM-DD'
+        end_date: Fecha fin 'YYYY-MM-DD' (inclusive)
+        window_days: Días por ventana
+
+    Returns:
+        Lista de tuplas (inicio, fin) en formato 'YYYY-MM-DD'
+    """
+    start = datetime.strptime(start_date, "%Y-%m-%d")
+    end = datetime.strptime(end_date, "%Y-%m-%d")
+
+    windows = []
+    while start <= end:
+        window_end = min(start + timedelta(days=window_days - 1), end)
+        windows.append((start.strftime("%Y-%m-%d"), window_end.strftime("%Y-%m-%d")))
+        start = window_end + timedelta(days=1)
+
+    return windows
+
+
+def run_backfill(
+    start_date: str,
+    end_date: str,
+    window_days: Optional[int] = None,
+    max_workers: Optional[int] = None,
+    resume: bool = True,
+) -> Dict:
+    """
+    Ejecuta el backfill de BCRP y mercado internacional por ventanas.
+
+    Args:
+        start_date: Fecha inicio 'YYYY-MM-DD'
+        end_date: Fecha fin 'YYYY-MM-DD'
+        window_days: Días por ventana (por defecto BACKFILL_WINDOW_DAYS)
+        max_workers: Ventanas en paralelo (por defecto BACKFILL_MAX_WORKERS)
+        resume: Si es False ignora el checkpoint y reprocesa todo
+
+    Returns:
+        Dict con ventanas totales, completadas, omitidas (ya hechas) y fallidas
+    """
+    # Import diferido: data_ingestion importa este módulo
+    from app.services.data_ingestion import insert_bcrp_data, insert_market_data
+
+    window_days = window_days or settings.BACKFILL_WINDOW_DAYS
+    max_workers = max_workers or settings.BACKFILL_MAX_WORKERS
+
+    state = _load_state() if resume else {"completed": []}
+    done = set(state["completed"])
+
+    windows = split_windows(start_date, end_date, window_days)
+    pending = [w for w in windows if _window_key(w) not in done]
+
+    print(f"🧩 Backfill {start_date} → {end_date}: {len(windows)} ventanas de {window_days} días")
+    print(f"   ⏭️  Ya completadas: {len(windows) - len(pending)} | Pendientes: {len(pending)}\n")
+
+    def process(window: Tuple[str, str]) -> Dict:
+        bcrp_records = get_bcrp_data(*window, raise_errors=True)
+        market_records = get_international_data(*window, raise_errors=True)
+
+        if not market_records and np.busday_count(window[0], window[1]) >= MIN_BUSINESS_DAYS_FOR_DATA:
+            raise ValueError("Yahoo Finance no retornó datos")
+
+        bcrp_result = insert_bcrp_data(bcrp_records)
+        market_result = insert_market_data(market_records)
+
+        if bcrp_result["errors"] or market_result["errors"]:
+            raise RuntimeError(
+                f"{bcrp_result['errors']} filas BCRP y {market_result['errors']} filas de mercado sin guardar"
+            )
+
+        return {"bcrp": bcrp_result["inserted"], "market": market_result["inserted"]}
+
+    settle_limit = (datetime.now() - timedelta(days=SETTLE_DAYS)).strftime("%Y-%m-%d")
+    completed = 0
+    failed = []
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(process, w): w for w in pending}
+
+        for future in as_completed(futures):
+            window = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                failed.append({"desde": window[0], "hasta": window[1], "error": str(e)})
+                print(f"❌ Ventana {window[0]} → {window[1]}: {e}")
+                continue
+
+            completed += 1
+            print(f"✅ Ventana {window[0]} → {window[1]}: BCRP {result['bcrp']}, Market {result['market']}")
+
+            # Checkpoint tras cada ventana (solo este hilo escribe el estado)
+            if window[1] < settle_limit:
+                state["completed"].append(_window_key(window))
+                _save_state(state)
+
+    summary = {
+        "windows": len(windows),
+        "completed": completed,
+        "skipped": len(windows) - len(pending),
+        "failed": failed,
+    }
+    print(f"\n✨ Backfill: {completed} completadas, {summary['skipped']} omitidas, {len(failed)} fallidas")
+    if failed:
+        print("   🔄 Vuelve a ejecutar para reintentar solo las ventanas fallidas")
+
+    return summary
+
+
+def _window_key(window: Tuple[str, str]) -> str:
+    return f"{window[0]}:{window[1]}"
+
+
+def _load_state() -> Dict:
+    path = Path(settings.BACKFILL_STATE_PATH)
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {"completed": []}
+
+
+def _save_state(state: Dict):
+    path = Path(settings.BACKFILL_STATE_PATH)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps(state, indent=2), encoding="utf-8")
+    os.replace(tmp, path)
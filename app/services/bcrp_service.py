@@ -1,90 +1,207 @@
-import requests
-import pandas as pd
-from datetime import datetime
-from typing import List, Dict
+import codecs
+import json
+import math
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from app.scraper.http_client import fetch
 
 # Configuración
 BASE_URL = "https://estadisticas.bcrp.gob.pe/estadisticas/series/api"
 FORMAT = "json"
 
+# Series por defecto: código BCRP -> columna en bcrp_data
+BCRP_SERIES = {
+    "PD04640PD": "tc_interbancario_venta",  # TC Venta Interbancario
+    "PD04639PD": "tasa_interbancaria",      # Tasa Interbancaria
+}
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
 # Mapeo de meses en español (La API devuelve "Ene", "Feb", etc.)
 MONTH_MAP = {
     "Ene": "01", "Feb": "02", "Mar": "03", "Abr": "04", "May": "05", "Jun": "06",
     "Jul": "07", "Ago": "08", "Sep": "09", "Oct": "10", "Nov": "11", "Dic": "12"
 }
 
-def parse_bcrp_date(date_str: str) -> str:
+# Tablas precalculadas para las fechas del BCRP:
+# diarias 'DD.MMM.YY' (ej: '24.Dic.25') y mensuales 'MMM.YYYY' (ej: 'Dic.2025')
+_DAY_MONTH_TABLE = {
+    f"{day_key}.{month_key}": f"{month}-{day:02d}"
+    for mes, month in MONTH_MAP.items()
+    for month_key in (mes, mes.upper(), mes.lower())
+    for day in range(1, 32)
+    for day_key in {str(day), f"{day:02d}"}
+}
+_MONTH_TABLE = {
+    month_key: month
+    for mes, month in MONTH_MAP.items()
+    for month_key in (mes, mes.upper(), mes.lower())
+}
+_YEAR_TABLE = {f"{yy:02d}": f"20{yy:02d}" for yy in range(100)}  # Asumimos siglo 21
+
+def parse_bcrp_date(date_str: str) -> Optional[str]:
     """
-    Convierte fechas del BCRP (ej: '24.Dic.25') a formato SQL (ej: '2025-12-24')
+    Convierte fechas del BCRP (ej: '24.Dic.25') a formato SQL (ej: '2025-12-24').
+    Las fechas mensuales (ej: 'Dic.2025') se llevan al primer día del mes.
     """
-    try:
-        # Formato esperado: DD.MMM.YY (ej: 24.Dic.25)
-        parts = date_str.split('.')
-        if len(parts) != 3:
-            return None
+    head, _, year = date_str.rpartition(".")
+    
+    month_day = _DAY_MONTH_TABLE.get(head)
+    if month_day and year in _YEAR_TABLE:
+        return f"{_YEAR_TABLE[year]}-{month_day}"
+    
+    month = _MONTH_TABLE.get(head)
+    if month and len(year) == 4:
+        return f"{year}-{month}-01"
+    
+    return None
+
+def iter_periods(chunks: Iterable[bytes]) -> Iterator[Dict]:
+    """
+    Recorre el arreglo 'periods' de la respuesta JSON a medida que llegan los bytes,
+    sin cargar la respuesta completa en memoria.
+    
+    Args:
+        chunks: Bloques de bytes de la respuesta (ej: response.iter_content())
         
-        day = parts[0].zfill(2)
-        month_str = parts[1].capitalize()
-        year = "20" + parts[2] # Asumimos siglo 21
+    Yields:
+        Cada período {"name": ..., "values": [...]}
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    buffer = ""
+    pos = 0
+    in_periods = False
+    
+    for chunk in chunks:
+        buffer = buffer[pos:] + utf8.decode(chunk)
+        pos = 0
         
-        month_num = MONTH_MAP.get(month_str)
+        if not in_periods:
+            key = buffer.find('"periods"')
+            if key == -1:
+                # Se conserva la cola por si la clave quedó partida entre bloques
+                pos = max(0, len(buffer) - len('"periods"'))
+                continue
+            start = buffer.find("[", key)
+            if start == -1:
+                pos = key
+                continue
+            in_periods = True
+            pos = start + 1
         
-        if month_num:
-            return f"{year}-{month_num}-{day}"
-        return None
-    except Exception as e:
-        print(f"Error parsing date {date_str}: {e}")
-        return None
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+            if pos >= len(buffer):
+                break
+            if buffer[pos] == "]":
+                return
+            try:
+                period, pos = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                break  # Período incompleto: esperar el siguiente bloque
+            yield period
 
-def get_bcrp_data(start_date: str, end_date: str) -> List[Dict]:
+def parse_periods_columnar(chunks: Iterable[bytes], n_series: int) -> Dict:
     """
-    Consulta la API del BCRP.
-    start_date y end_date deben ser 'YYYY-MM-DD'
+    Parsea la respuesta del BCRP en columnas.
+    
+    Args:
+        chunks: Bloques de bytes de la respuesta
+        n_series: Cantidad de series pedidas (en el orden del request)
+        
+    Returns:
+        Dict con "fecha" (lista 'YYYY-MM-DD') y "values" (un array('d') por serie,
+        NaN donde el BCRP reporta "n.d.")
     """
-    # Códigos: TC Venta Interbancario (PD04640PD) y Tasa Interbancaria (PD04639PD)
-    series = "PD04640PD-PD04639PD"
+    fechas: List[str] = []
+    values = [array("d") for _ in range(n_series)]
+    
+    for period in iter_periods(chunks):
+        fecha_sql = parse_bcrp_date(period.get("name", ""))
+        if not fecha_sql:
+            continue
+        
+        fechas.append(fecha_sql)
+        raw = period.get("values") or []
+        for i, column in enumerate(values):
+            column.append(_to_float(raw[i]) if i < len(raw) else math.nan)
     
+    return {"fecha": fechas, "values": values}
+
+def get_bcrp_series(
+    codes: List[str],
+    start_date: str,
+    end_date: str,
+    raise_errors: bool = False,
+) -> Dict[str, object]:
+    """
+    Consulta una o varias series del BCRP leyendo la respuesta en streaming.
+    start_date y end_date deben ser 'YYYY-MM-DD' (o 'YYYY-MM' para series mensuales).
+    
+    Args:
+        codes: Códigos de series (ej: ["PD04640PD", "PD04639PD"])
+        start_date: Fecha inicio
+        end_date: Fecha fin
+        raise_errors: Propagar errores en vez de retornar columnas vacías
+        
+    Returns:
+        Dict columnar: "fecha" -> lista de fechas y código -> array('d')
+    """
     # Construcción de URL según documentación (Página 3)
-    url = f"{BASE_URL}/{series}/{FORMAT}/{start_date}/{end_date}"
+    url = f"{BASE_URL}/{'-'.join(codes)}/{FORMAT}/{start_date}/{end_date}"
     
     print(f"Fetching BCRP: {url}")
     
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
-        
-        records = []
+        with fetch(url, stream=True) as response:
+            response.raise_for_status()
+            parsed = parse_periods_columnar(response.iter_content(STREAM_CHUNK_SIZE), len(codes))
         
-        # La API devuelve una lista de 'periods'
-        if 'periods' in data:
-            for period in data['periods']:
-                # period['name'] es la fecha (ej: 24.Dic.25)
-                # period['values'] es una lista con los valores de las series pedidas
-                
-                fecha_sql = parse_bcrp_date(period['name'])
-                
-                if fecha_sql:
-                    tc_venta = period['values'][0]
-                    tasa_interbancaria = period['values'][1]
-                    
-                    # Validar que no sean "n.d." (no disponible)
-                    record = {
-                        "fecha": fecha_sql,
-                        "tc_interbancario_venta": float(tc_venta) if tc_venta != "n.d." else None,
-                        "tasa_interbancaria": float(tasa_interbancaria) if tasa_interbancaria != "n.d." else None,
-                        "origen": "BCRP_API"
-                    }
-                    records.append(record)
-                    
-        return records
+        return {"fecha": parsed["fecha"], **dict(zip(codes, parsed["values"]))}
 
     except Exception as e:
         print(f"Error en BCRP Service: {e}")
-        return []
+        if raise_errors:
+            raise
+        return {"fecha": [], **{code: array("d") for code in codes}}
+
+def get_bcrp_data(
+    start_date: str,
+    end_date: str,
+    raise_errors: bool = False,
+    series: Optional[Dict[str, str]] = None,
+) -> List[Dict]:
+    """
+    Consulta la API del BCRP y retorna registros listos para bcrp_data.
+    start_date y end_date deben ser 'YYYY-MM-DD'
+    Con raise_errors=True los errores se propagan en vez de retornar [].
+    
+    Args:
+        series: Mapeo código BCRP -> columna (por defecto BCRP_SERIES)
+    """
+    series = series or BCRP_SERIES
+    data = get_bcrp_series(list(series), start_date, end_date, raise_errors=raise_errors)
+    
+    columns = [data[code] for code in series]
+    keys = ["fecha", *series.values(), "origen"]
+    
+    # "n.d." (no disponible) llega como NaN y se guarda como null
+    return [
+        dict(zip(keys, (fecha, *(None if math.isnan(v) else v for v in row), "BCRP_API")))
+        for fecha, *row in zip(data["fecha"], *columns)
+    ]
+
+def _to_float(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
 
 # --- PRUEBA RÁPIDA ---
 if __name__ == "__main__":
     # Probamos traer la última semana
     data = get_bcrp_data("2025-12-18", "2025-12-24")
-    print(data)
\ No newline at end of file
+    print(data)
@@ -2,15 +2,35 @@
 Data Ingestion Service
 Ingesta datos de BCRP, mercado internacional y casas de cambio a Supabase.
 """
+import time
 from datetime import datetime, timedelta
-from typing import Dict, List
+from typing import Dict, List, Optional
 
+from postgrest import ReturnMethod
+
+from app.core.cache import invalidate
+from app.core.config import settings
+from app.services.backfill import run_backfill
 from app.services.bcrp_service import get_bcrp_data
-from app.services.market_service import get_international_data
+from app.services.market_service import (
+    close_to_records,
+    get_closes,
+    get_international_data,
+    get_market_series,
+)
+from app.db.repositories.market_repository import get_latest_market_dates
 from app.scraper.casas_scraper import scrape_casas_cambio
+from app.scraper.http_client import run_concurrently
 from app.db.supabase.client import get_supabase_client
 
 
+RETRY_BACKOFF = 0.5  # segundos, se duplica en cada reintento
+
+# La ingesta diaria corre con la sesión de EE.UU. abierta: los últimos cierres
+# guardados se vuelven a escribir para reemplazar el precio intradía
+MARKET_OVERLAP_DAYS = 3
+
+
 def insert_casas_data(casas: List[Dict], fecha: str) -> Dict[str, int]:
     """
     Inserta datos de casas de cambio en Supabase.
@@ -62,42 +82,88 @@ def insert_casas_data(casas: List[Dict], fecha: str) -> Dict[str, int]:
     return {"inserted": inserted, "errors": errors}
 
 
-def insert_bcrp_data(records: List[Dict]) -> Dict[str, int]:
+def upsert_in_chunks(
+    table: str,
+    records: List[Dict],
+    on_conflict: str = "fecha",
+    chunk_size: Optional[int] = None,
+    max_retries: Optional[int] = None,
+) -> Dict:
     """
-    Inserta o actualiza datos del BCRP en Supabase.
+    Upsert multi-fila en chunks, con reintentos por chunk.
     
     Args:
-        records: Lista de diccionarios con datos del BCRP
+        table: Tabla destino
+        records: Registros a insertar o actualizar
+        on_conflict: Columna(s) de conflicto
+        chunk_size: Filas por request (por defecto INGEST_CHUNK_SIZE)
+        max_retries: Reintentos por chunk (por defecto INGEST_MAX_RETRIES)
         
     Returns:
-        Dict con contadores de insertados y errores
+        Dict con contadores de insertados y errores, y la lista de chunks
+        fallidos (desde, hasta, error) para reintentar solo esos rangos
     """
-    if not records:
-        print("⚠️  No hay datos del BCRP para insertar")
-        return {"inserted": 0, "errors": 0}
+    chunk_size = chunk_size or settings.INGEST_CHUNK_SIZE
+    max_retries = settings.INGEST_MAX_RETRIES if max_retries is None else max_retries
+    
+    # Postgres no permite que un mismo upsert afecte dos veces la misma fila:
+    # si la clave se repite, gana el último registro
+    keys = on_conflict.split(",")
+    unique = {tuple(r.get(k) for k in keys): r for r in records}
+    rows = list(unique.values())
     
     supabase = get_supabase_client()
     inserted = 0
     errors = 0
+    failed_chunks = []
     
-    for record in records:
-        try:
-            supabase.table("bcrp_data").upsert(
-                record,
-                on_conflict="fecha"
-            ).execute()
-            
-            inserted += 1
-            tc = record.get('tc_interbancario_venta', 'N/A')
-            print(f"✅ BCRP: {record['fecha']} - TC: {tc}")
-            
-        except Exception as e:
-            errors += 1
-            print(f"❌ Error BCRP {record.get('fecha')}: {e}")
+    for i in range(0, len(rows), chunk_size):
+        chunk = rows[i:i + chunk_size]
+        
+        for attempt in range(max_retries + 1):
+            try:
+                supabase.table(table).upsert(
+                    chunk,
+                    on_conflict=on_conflict,
+                    returning=ReturnMethod.minimal,
+                ).execute()
+                inserted += len(chunk)
+                break
+            except Exception as e:
+                if attempt < max_retries:
+                    time.sleep(RETRY_BACKOFF * 2 ** attempt)
+                    continue
+                errors += len(chunk)
+                failed_chunks.append({
+                    "desde": chunk[0].get(keys[0]),
+                    "hasta": chunk[-1].get(keys[0]),
+                    "filas": len(chunk),
+                    "error": str(e),
+                })
+                print(f"❌ Error {table} chunk {chunk[0].get(keys[0])} → {chunk[-1].get(keys[0])}: {e}")
     
-    return {"inserted": inserted, "errors": errors}
+    print(f"✅ {table}: {inserted} filas en {-(-len(rows) // chunk_size)} chunks, {errors} con error")
+    return {"inserted": inserted, "errors": errors, "failed_chunks": failed_chunks}
+
+
+def insert_bcrp_data(records: List[Dict]) -> Dict:
+    """
+    Inserta o actualiza datos del BCRP en Supabase.
+    
+    Args:
+        records: Lista de diccionarios con datos del BCRP
+        
+    Returns:
+        Dict con contadores de insertados y errores, y chunks fallidos
+    """
+    if not records:
+        print("⚠️  No hay datos del BCRP para insertar")
+        return {"inserted": 0, "errors": 0, "failed_chunks": []}
+    
+    return upsert_in_chunks("bcrp_data", records)
 
-def insert_market_data(records: List[Dict]) -> Dict[str, int]:
+
+def insert_market_data(records: List[Dict]) -> Dict:
     """
     Inserta o actualiza datos de mercado internacional en Supabase.
     
@@ -105,75 +171,126 @@ def insert_market_data(records: List[Dict]) -> Dict[str, int]:
         records: Lista de diccionarios con datos de Yahoo Finance
         
     Returns:
-        Dict con contadores de insertados y errores
+        Dict con contadores de insertados y errores, y chunks fallidos
     """
     if not records:
         print("⚠️  No hay datos de mercado para insertar")
-        return {"inserted": 0, "errors": 0}
+        return {"inserted": 0, "errors": 0, "failed_chunks": []}
     
-    supabase = get_supabase_client()
-    inserted = 0
-    errors = 0
+    return upsert_in_chunks("market_data", records)
+
+
+def ingest_market_incremental(end_date: Optional[str] = None, default_start: str = "2020-01-01") -> Dict:
+    """
+    Ingesta incremental de las series de mercado registradas: cada serie se pide
+    desde su última fecha guardada en market_data (o desde default_start si es nueva),
+    con un único yf.download para todos los tickers.
     
-    for record in records:
-        try:
-            supabase.table("market_data").upsert(
-                record,
-                on_conflict="fecha"
-            ).execute()
-            
-            inserted += 1
-            cobre = record.get('precio_cobre', 'N/A')
-            dxy = record.get('indice_dxy', 'N/A')
-            print(f"✅ Market: {record['fecha']} - Cobre: {cobre}, DXY: {dxy}")
-            
-        except Exception as e:
-            errors += 1
-            print(f"❌ Error Market {record.get('fecha')}: {e}")
+    Args:
+        end_date: Fecha fin 'YYYY-MM-DD' (por defecto hoy)
+        default_start: Fecha inicio para series sin datos
+        
+    Returns:
+        Dict con contadores de insertados y errores, y chunks fallidos
+    """
+    end_date = end_date or datetime.now().strftime("%Y-%m-%d")
+    series = get_market_series()
+    latest = get_latest_market_dates(set(series.values()))
     
-    return {"inserted": inserted, "errors": errors}
+    # Series con la misma fecha de inicio se guardan juntas; cada grupo
+    # solo escribe sus columnas para no pisar las demás con null
+    groups: Dict[str, Dict[str, str]] = {}
+    for ticker, column in series.items():
+        last = latest.get(column)
+        if last:
+            since = (datetime.strptime(last, "%Y-%m-%d") - timedelta(days=MARKET_OVERLAP_DAYS)).strftime("%Y-%m-%d")
+        else:
+            since = default_start
+        groups.setdefault(min(since, end_date), {})[ticker] = column
+    
+    totals = {"inserted": 0, "errors": 0, "failed_chunks": []}
+    
+    try:
+        df_close = get_closes(list(series), min(groups), end_date)
+    except Exception as e:
+        print(f"❌ Error en Yahoo Finance Service: {e}")
+        return totals
+    
+    for since, group in sorted(groups.items()):
+        print(f"🌎 {list(group)} desde {since}")
+        records = close_to_records(df_close.loc[since:], group) if not df_close.empty else []
+        result = insert_market_data(records)
+        totals["inserted"] += result["inserted"]
+        totals["errors"] += result["errors"]
+        totals["failed_chunks"].extend(result["failed_chunks"])
+    
+    return totals
+
+
+def _print_failed_chunks(result: Dict) -> None:
+    for chunk in result.get("failed_chunks", []):
+        print(f"   ⚠️  Pendiente: {chunk['desde']} → {chunk['hasta']} ({chunk['filas']} filas): {chunk['error']}")
+
 
-def ingest_data(start_date: str, end_date: str) -> None:
+def ingest_data(start_date: str, end_date: str, incremental_market: bool = False) -> None:
     """
     Orquesta la ingesta completa de datos.
     
     Args:
         start_date: Fecha inicio en formato 'YYYY-MM-DD'
         end_date: Fecha fin en formato 'YYYY-MM-DD'
+        incremental_market: Ingestar mercado desde la última fecha guardada
+                            de cada serie en vez de usar el rango
     """
     print(f"\n{'='*60}")
     print(f"🚀 Ingesta de datos: {start_date} → {end_date}")
     print(f"{'='*60}\n")
     
-    # Extraer datos
-    print("📊 Extrayendo datos del BCRP...")
-    bcrp_records = get_bcrp_data(start_date, end_date)
-    print(f"   Obtenidos: {len(bcrp_records)} registros\n")
+    # Extraer datos (las tres fuentes en paralelo)
+    print("📡 Extrayendo datos del BCRP, Yahoo Finance y casas de cambio...")
+    # En modo incremental la tarea de mercado descarga y guarda por su cuenta
+    market_task = (
+        (lambda: ingest_market_incremental(end_date))
+        if incremental_market
+        else (lambda: get_international_data(start_date, end_date))
+    )
+    extracted = run_concurrently({
+        "bcrp": lambda: get_bcrp_data(start_date, end_date),
+        "market": market_task,
+        "casas": scrape_casas_cambio,
+    })
+    bcrp_records = extracted["bcrp"] or []
+    casas = extracted["casas"] or []
     
-    print("🌎 Extrayendo datos de Yahoo Finance...")
-    market_records = get_international_data(start_date, end_date)
-    print(f"   Obtenidos: {len(market_records)} registros\n")
-    
-    print("🏦 Extrayendo datos de casas de cambio...")
-    casas = scrape_casas_cambio()
-    print(f"   Obtenidas: {len(casas)} casas\n")
+    print(f"   📊 BCRP: {len(bcrp_records)} registros")
+    if not incremental_market:
+        print(f"   🌎 Yahoo Finance: {len(extracted['market'] or [])} registros")
+    print(f"   🏦 Casas: {len(casas)} casas\n")
     
     # Insertar datos
     print("💾 Insertando datos del BCRP...")
     bcrp_result = insert_bcrp_data(bcrp_records)
     print(f"   ✅ Insertados: {bcrp_result['inserted']}")
     print(f"   ❌ Errores: {bcrp_result['errors']}\n")
+    _print_failed_chunks(bcrp_result)
     
     print("💾 Insertando datos de mercado...")
-    market_result = insert_market_data(market_records)
+    if incremental_market:
+        market_result = extracted["market"] or {"inserted": 0, "errors": 0, "failed_chunks": []}
+    else:
+        market_result = insert_market_data(extracted["market"] or [])
     print(f"   ✅ Insertados: {market_result['inserted']}")
     print(f"   ❌ Errores: {market_result['errors']}\n")
+    _print_failed_chunks(market_result)
     
     print("💾 Insertando datos de casas...")
     casas_result = insert_casas_data(casas, end_date)
     print(f"   ✅ Insertados: {casas_result['inserted']}")
     print(f"   ❌ Errores: {casas_result['errors']}\n")
     
+    # Los endpoints de lectura deben reflejar los datos nuevos
+    invalidate("bcrp", "market", "casas")
+    
     # Resumen
     total = bcrp_result['inserted'] + market_result['inserted'] + casas_result['inserted']
     print(f"{'='*60}")
@@ -181,20 +298,37 @@ def ingest_data(start_date: str, end_date: str) -> None:
     print(f"{'='*60}\n")
 
 def ingest_today() -> None:
-    """Ingesta datos del día actual."""
+    """Ingesta datos del día actual (mercado: lo que falte desde la última fecha guardada)."""
     today = datetime.now().strftime("%Y-%m-%d")
-    ingest_data(today, today)
+    ingest_data(today, today, incremental_market=True)
 
-def ingest_historical(start_year: int = 2020) -> None:
+def ingest_historical(start_year: int = 2020, resume: bool = True) -> Dict:
     """
     Ingesta datos históricos desde un año específico.
+    BCRP y mercado se procesan por ventanas en paralelo con checkpoint local,
+    así una ejecución interrumpida continúa donde se quedó.
     
     Args:
         start_year: Año de inicio (ej: 2020)
+        resume: Reanudar desde el checkpoint (False para reprocesar todo)
+        
+    Returns:
+        Resumen del backfill
     """
     start_date = f"{start_year}-01-01"
     end_date = datetime.now().strftime("%Y-%m-%d")
-    ingest_data(start_date, end_date)
+    
+    summary = run_backfill(start_date, end_date, resume=resume)
+    
+    print("\n🏦 Extrayendo datos de casas de cambio...")
+    casas = scrape_casas_cambio()
+    casas_result = insert_casas_data(casas, end_date)
+    print(f"   ✅ Insertados: {casas_result['inserted']}")
+    print(f"   ❌ Errores: {casas_result['errors']}\n")
+    
+    invalidate("bcrp", "market", "casas")
+    
+    return summary
 
 if __name__ == "__main__":
     # Ingesta hoy
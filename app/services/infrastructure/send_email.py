@@ -44,7 +44,7 @@ def send_gmail_with_dolar():
         print("❌ No se pudieron obtener las casas de cambio.")
         return
 
-    # referencia Sunat
+    # referencia Sunat (solo si hay casas: dolar_sunat_today también guarda en la BD)
     s_data   = dolar_sunat_today()
     s_compra = s_data["compra"]
     s_venta  = s_data["venta"]
@@ -1,60 +1,250 @@
+import json
+import os
+import re
+import threading
+
 import yfinance as yf
 import pandas as pd
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
 
-def get_international_data(start_date: str, end_date: str):
-    """
-    Obtiene datos de Yahoo Finance.
-    Tickers:
-    - HG=F: Futuros de Cobre (High Grade Copper) - Vital para Perú
-    - DX-Y.NYB: Índice Dólar (DXY) - Vital para tendencia global
+from app.core.config import settings
+
+# Registro de series: ticker de Yahoo -> columna en market_data
+# (MARKET_SERIES en el .env agrega tickers o cambia la columna de uno existente;
+# la columna debe existir en market_data)
+DEFAULT_MARKET_SERIES = {
+    "HG=F": "precio_cobre",      # Futuros de Cobre (High Grade Copper) - Vital para Perú
+    "DX-Y.NYB": "indice_dxy",    # Índice Dólar (DXY) - Vital para tendencia global
+}
+
+# Los cierres de los últimos días pueden cambiar (sesión en curso, correcciones):
+# la caché local no los da por buenos y se vuelven a descargar
+CACHE_SETTLE_DAYS = 3
+
+# yf.download guarda resultados en estado global: no es seguro llamarlo en paralelo
+# (el lock también protege los archivos de caché)
+_download_lock = threading.Lock()
+
+_EMPTY_CLOSES = pd.Series(dtype=float, index=pd.DatetimeIndex([]))
+
+def get_market_series() -> Dict[str, str]:
     """
+    Series de mercado a ingestar.
     
-    # Nota: yfinance el 'end_date' es exclusivo, así que sumamos 1 día para asegurar
-    # que traiga la data hasta la fecha final solicitada.
-    end_dt_obj = datetime.strptime(end_date, "%Y-%m-%d") + timedelta(days=1)
-    adjusted_end = end_dt_obj.strftime("%Y-%m-%d")
+    Returns:
+        Dict ticker -> columna destino en market_data
+    """
+    return {**DEFAULT_MARKET_SERIES, **settings.MARKET_SERIES}
 
-    tickers = ["HG=F", "DX-Y.NYB"]
+def get_international_data(
+    start_date: str,
+    end_date: str,
+    raise_errors: bool = False,
+    series: Optional[Dict[str, str]] = None,
+):
+    """
+    Obtiene datos de Yahoo Finance para las series registradas.
+    Con raise_errors=True los errores se propagan en vez de retornar [].
     
-    print(f"Fetching Yahoo Finance: {tickers} from {start_date} to {end_date}")
+    Args:
+        start_date: Fecha inicio 'YYYY-MM-DD'
+        end_date: Fecha fin 'YYYY-MM-DD' (inclusive)
+        raise_errors: Propagar errores
+        series: Mapeo ticker -> columna (por defecto get_market_series())
+        
+    Returns:
+        Lista de registros para market_data
+    """
+    series = series or get_market_series()
+    
+    print(f"Fetching Yahoo Finance: {list(series)} from {start_date} to {end_date}")
     
     try:
-        # Descargamos la data
-        data = yf.download(tickers, start=start_date, end=adjusted_end, progress=False)
-        
-        # Yahoo devuelve un DataFrame MultiIndex. Nos interesa solo el precio de Cierre ('Close')
-        df_close = data['Close']
+        df_close = get_closes(list(series), start_date, end_date)
         
-        records = []
+        # Rango sin sesiones de mercado (feriados, fines de semana)
+        if df_close.empty:
+            return []
         
-        # Iteramos por las fechas
-        for index, row in df_close.iterrows():
-            # Convertir Timestamp a string
-            fecha_str = index.strftime('%Y-%m-%d')
-            
-            # Extraer valores (Manejando posibles NaNs si un mercado cerró y el otro no)
-            cobre_val = row.get('HG=F')
-            dxy_val = row.get('DX-Y.NYB')
-            
-            # Solo agregamos si tenemos al menos un dato válido
-            if pd.notna(cobre_val) or pd.notna(dxy_val):
-                record = {
-                    "fecha": fecha_str,
-                    "precio_cobre": round(float(cobre_val), 4) if pd.notna(cobre_val) else None,
-                    "indice_dxy": round(float(dxy_val), 4) if pd.notna(dxy_val) else None,
-                    "origen": "YAHOO"
-                }
-                records.append(record)
-                
-        return records
+        return close_to_records(df_close, series)
 
     except Exception as e:
         print(f"❌ Error en Yahoo Finance Service: {e}")
+        if raise_errors:
+            raise
         return []
 
+def get_closes(tickers: List[str], start_date: str, end_date: str) -> pd.DataFrame:
+    """
+    Precios de cierre por ticker, usando la caché local por ticker y fecha.
+    Solo se descarga lo que falta, y todos los tickers incompletos van en
+    un único yf.download.
+    
+    Args:
+        tickers: Tickers de Yahoo
+        start_date: Fecha inicio 'YYYY-MM-DD'
+        end_date: Fecha fin 'YYYY-MM-DD' (inclusive)
+        
+    Returns:
+        DataFrame con índice de fechas y una columna por ticker
+    """
+    settled_until = (date.today() - timedelta(days=CACHE_SETTLE_DAYS)).isoformat()
+    
+    with _download_lock:
+        caches = {ticker: _load_cache(ticker) for ticker in tickers}
+        
+        missing = {}
+        for ticker, cache in caches.items():
+            window = _missing_window(cache, start_date, end_date, settled_until)
+            if not window:
+                continue
+            if pd.bdate_range(*window).empty:
+                # Solo fin de semana: no hay sesiones que descargar
+                _merge_cache(cache, _EMPTY_CLOSES, *window)
+                _save_cache(ticker, cache)
+            else:
+                missing[ticker] = window
+        
+        if missing:
+            download_start = min(w[0] for w in missing.values())
+            download_end = max(w[1] for w in missing.values())
+            
+            print(f"   ⬇️  yf.download {list(missing)} {download_start} → {download_end}")
+            df_close = _download_closes(list(missing), download_start, download_end)
+            
+            # yfinance no lanza excepción ante errores de red, solo retorna vacío.
+            # Los tickers vacíos se piden de nuevo con una semana más hacia atrás:
+            # si ahí traen datos, el rango pedido no tuvo sesiones (feriado) y se cachea
+            empty = [t for t in missing if _close_column(df_close, t).empty]
+            retry_start = _shift(download_start, -7)
+            df_retry = _download_closes(empty, retry_start, download_end) if empty else pd.DataFrame()
+            
+            for ticker in missing:
+                column, covered_from = _close_column(df_close, ticker), download_start
+                if column.empty:
+                    column, covered_from = _close_column(df_retry, ticker), retry_start
+                # Sin ningún dato no hay cómo distinguir un feriado de un error: no se marca como cubierto
+                if column.empty:
+                    continue
+                _merge_cache(caches[ticker], column, covered_from, download_end)
+                _save_cache(ticker, caches[ticker])
+    
+    df = pd.DataFrame({
+        ticker: pd.Series(cache["closes"], dtype=float)
+        for ticker, cache in caches.items()
+    })
+    if df.empty:
+        return df
+    
+    df = df.sort_index()
+    df = df.loc[start_date:end_date]
+    df.index = pd.to_datetime(df.index)
+    return df
+
+def close_to_records(df_close: pd.DataFrame, columns: Optional[Dict[str, str]] = None) -> List[Dict]:
+    """
+    Convierte el DataFrame de cierres en registros para market_data, por columnas:
+    redondeo, máscara de NaN y formato de fecha vectorizados, un solo pase al final.
+    
+    Args:
+        df_close: DataFrame con índice de fechas y una columna por ticker
+        columns: Mapeo ticker -> columna destino (por defecto get_market_series())
+        
+    Returns:
+        Lista de registros; se omiten las fechas sin ningún dato válido
+        (mercado cerrado en todos los tickers)
+    """
+    columns = columns or get_market_series()
+    
+    df = df_close.reindex(columns=list(columns)).round(4)
+    df = df[df.notna().any(axis=1)]
+    
+    # NaN -> None para que el JSON lleve null
+    values = df.to_numpy(dtype=object)
+    values[pd.isna(values)] = None
+    
+    fechas = df.index.strftime("%Y-%m-%d").tolist()
+    keys = ["fecha", *columns.values(), "origen"]
+    
+    return [dict(zip(keys, (fecha, *row, "YAHOO"))) for fecha, row in zip(fechas, values.tolist())]
+
+def _download_closes(tickers: List[str], start_date: str, end_date: str) -> pd.DataFrame:
+    # Nota: yfinance el 'end_date' es exclusivo, así que sumamos 1 día para asegurar
+    # que traiga la data hasta la fecha final solicitada.
+    adjusted_end = _shift(end_date, 1)
+    
+    data = yf.download(tickers, start=start_date, end=adjusted_end, progress=False)
+    if data.empty:
+        return pd.DataFrame()
+    
+    # Yahoo devuelve un DataFrame MultiIndex. Nos interesa solo el precio de Cierre ('Close')
+    df_close = data["Close"]
+    if isinstance(df_close, pd.Series):
+        df_close = df_close.to_frame(tickers[0])
+    return df_close
+
+def _close_column(df_close: pd.DataFrame, ticker: str) -> pd.Series:
+    return df_close[ticker].dropna() if ticker in df_close else _EMPTY_CLOSES
+
+def _missing_window(
+    cache: Dict,
+    start_date: str,
+    end_date: str,
+    settled_until: str,
+) -> Optional[Tuple[str, str]]:
+    """Rango a descargar para un ticker: lo pedido que no cubre la caché."""
+    desde = cache.get("desde")
+    hasta = min(cache.get("hasta") or "", settled_until)
+    
+    # Sin caché, o rango cubierto disjunto del pedido
+    if not desde or desde > hasta or start_date > _shift(hasta, 1) or end_date < _shift(desde, -1):
+        return start_date, end_date
+    
+    falta_antes = start_date < desde
+    falta_despues = end_date > hasta
+    if not falta_antes and not falta_despues:
+        return None
+    
+    return (
+        start_date if falta_antes else _shift(hasta, 1),
+        end_date if falta_despues else _shift(desde, -1),
+    )
+
+def _merge_cache(cache: Dict, column: pd.Series, start_date: str, end_date: str):
+    fechas = column.index.strftime("%Y-%m-%d")
+    cache["closes"].update(zip(fechas, column.round(6).tolist()))
+    
+    desde, hasta = cache.get("desde"), cache.get("hasta")
+    contiguo = desde and start_date <= _shift(hasta, 1) and end_date >= _shift(desde, -1)
+    if contiguo:
+        cache["desde"], cache["hasta"] = min(desde, start_date), max(hasta, end_date)
+    else:
+        cache["desde"], cache["hasta"] = start_date, end_date
+
+def _cache_path(ticker: str) -> Path:
+    return Path(settings.MARKET_CACHE_DIR) / f"{re.sub(r'[^A-Za-z0-9._-]', '_', ticker)}.json"
+
+def _load_cache(ticker: str) -> Dict:
+    try:
+        return json.loads(_cache_path(ticker).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {"ticker": ticker, "desde": None, "hasta": None, "closes": {}}
+
+def _save_cache(ticker: str, cache: Dict):
+    path = _cache_path(ticker)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps(cache), encoding="utf-8")
+    os.replace(tmp, path)
+
+def _shift(fecha: str, days: int) -> str:
+    return (datetime.strptime(fecha, "%Y-%m-%d") + timedelta(days=days)).strftime("%Y-%m-%d")
+
 # --- PRUEBA RÁPIDA ---
 if __name__ == "__main__":
     # Probamos con las mismas fechas que tu BCRP
     data = get_international_data("2025-12-18", "2025-12-24")
-    print(data)
\ No newline at end of file
+    print(data)
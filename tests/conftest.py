@@ -0,0 +1,25 @@
+import importlib
+import sys
+import types
+
+# app/analytics/__init__.py re-exporta app.analytics.data_loader, que no está en este árbol.
+# Sin él no se puede importar ningún módulo de app.analytics (price_store, online_stats):
+# se registra un módulo vacío solo si el real no existe.
+_DATA_LOADER = "app.analytics.data_loader"
+_DATA_LOADER_NAMES = (
+    "get_historical_data",
+    "get_data_by_origen",
+    "get_data_by_date_range",
+    "get_latest_by_origen",
+    "get_all_origenes",
+)
+
+try:
+    importlib.import_module(_DATA_LOADER)
+except ModuleNotFoundError as e:
+    if e.name != _DATA_LOADER:
+        raise
+    stub = types.ModuleType(_DATA_LOADER)
+    for name in _DATA_LOADER_NAMES:
+        setattr(stub, name, None)
+    sys.modules[_DATA_LOADER] = stub
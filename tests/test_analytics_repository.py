@@ -0,0 +1,78 @@
+from types import SimpleNamespace
+from datetime import date
+
+from app.db.repositories import analytics_repository
+
+
+class FakeQuery:
+    """Registra la consulta y devuelve páginas de `total` filas"""
+
+    def __init__(self, total, log):
+        self.total = total
+        self.log = log
+
+    def select(self, *a):
+        return self
+
+    def gte(self, *a):
+        self.log.append(("gte",) + a)
+        return self
+
+    def lte(self, *a):
+        return self
+
+    def eq(self, *a):
+        self.log.append(("eq",) + a)
+        return self
+
+    def order(self, *a, **k):
+        return self
+
+    def range(self, start, end):
+        self.page = range(start, min(end + 1, self.total))
+        return self
+
+    def execute(self):
+        return SimpleNamespace(data=[{"n": i} for i in self.page])
+
+
+def test_get_daily_ohlc_pagina_mas_alla_de_max_rows(monkeypatch):
+    log = []
+    client = SimpleNamespace(table=lambda name: log.append(name) or FakeQuery(2500, log))
+    monkeypatch.setattr(analytics_repository, "get_supabase_client", lambda: client)
+
+    rows = analytics_repository.get_daily_ohlc(date(2024, 1, 1), origen="Rextie")
+
+    assert len(rows) == 2500
+    assert log.count("mv_casa_daily_ohlc") == 3
+    assert ("eq", "origen", "Rextie") in log
+
+
+def test_get_casa_stats_usa_rpc(monkeypatch):
+    calls = []
+
+    def rpc(name, params=None):
+        calls.append((name, params))
+        return SimpleNamespace(execute=lambda: SimpleNamespace(data=[{"origen": "Rextie"}]))
+
+    monkeypatch.setattr(analytics_repository, "get_supabase_client", lambda: SimpleNamespace(rpc=rpc))
+
+    assert analytics_repository.get_casa_stats(30) == [{"origen": "Rextie"}]
+    assert calls == [("get_casa_stats", {"p_days": 30})]
+
+
+def test_refresh_analytics_views_usa_cliente_admin(monkeypatch):
+    calls = []
+
+    def rpc(name, params=None):
+        calls.append(name)
+        return SimpleNamespace(execute=lambda: SimpleNamespace(data=None))
+
+    def anon():
+        raise AssertionError("refresh_casa_analytics solo la ejecuta service_role")
+
+    monkeypatch.setattr(analytics_repository, "get_supabase_client", anon)
+    monkeypatch.setattr(analytics_repository, "get_supabase_admin_client", lambda: SimpleNamespace(rpc=rpc))
+
+    analytics_repository.refresh_analytics_views()
+    assert calls == ["refresh_casa_analytics"]
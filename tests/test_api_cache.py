@@ -0,0 +1,164 @@
+import time
+
+import pytest
+
+from app.core import cache
+from app.core.config import settings
+
+
+@pytest.fixture(autouse=True)
+def cache_limpia(monkeypatch):
+    monkeypatch.setattr(settings, "REDIS_URL", "")
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def _handler(ttl, stale_ttl=60, tags=("casas",)):
+    calls = []
+
+    def handler(days: int = 7):
+        calls.append(days)
+        return {"days": days, "version": len(calls)}
+
+    # La clave incluye el nombre del handler
+    handler.__name__ = f"handler_{'_'.join(tags)}"
+    return cache.cached(ttl=ttl, tags=tags, stale_ttl=stale_ttl)(handler), calls
+
+
+def test_hit_dentro_del_ttl_y_clave_por_parametros():
+    handler, calls = _handler(ttl=60)
+
+    assert handler(days=7) == handler(days=7)
+    handler(days=30)
+
+    assert calls == [7, 30]
+
+
+def test_stale_while_revalidate(monkeypatch):
+    handler, calls = _handler(ttl=10)
+    ahora = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: ahora[0])
+
+    assert handler()["version"] == 1
+
+    # Vencida pero dentro de stale_ttl: responde el valor anterior y refresca en segundo plano
+    ahora[0] += 15
+    assert handler()["version"] == 1
+    for _ in range(100):
+        if len(calls) == 2 and not cache._refreshing:
+            break
+        time.sleep(0.01)
+    assert handler()["version"] == 2
+
+    # Fuera de stale_ttl: se recalcula en el request
+    ahora[0] += 1000
+    assert handler()["version"] == 3
+
+
+def test_invalidate_por_tag():
+    casas, casas_calls = _handler(ttl=60, tags=("casas",))
+    bcrp, bcrp_calls = _handler(ttl=60, tags=("bcrp",))
+    casas()
+    bcrp()
+
+    cache.invalidate("casas")
+    casas()
+    bcrp()
+
+    assert len(casas_calls) == 2
+    assert len(bcrp_calls) == 1
+
+
+def test_no_guarda_excepciones():
+    calls = []
+
+    @cache.cached(ttl=60)
+    def handler():
+        calls.append(1)
+        raise LookupError("sin datos")
+
+    for _ in range(2):
+        with pytest.raises(LookupError):
+            handler()
+
+    assert len(calls) == 2
+
+
+def test_handler_async_con_refresco_en_el_loop(monkeypatch):
+    import asyncio
+
+    calls = []
+
+    @cache.cached(ttl=10, stale_ttl=60)
+    async def handler_async():
+        calls.append(1)
+        await asyncio.sleep(0)
+        return len(calls)
+
+    ahora = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: ahora[0])
+
+    async def escenario():
+        assert await handler_async() == 1
+        assert await handler_async() == 1
+
+        ahora[0] += 15
+        assert await handler_async() == 1  # Stale: responde y refresca como tarea
+        await asyncio.gather(*cache._background_tasks)
+        return await handler_async()
+
+    assert asyncio.run(escenario()) == 2
+    assert len(calls) == 2
+
+
+
+def test_handler_async_lee_redis_fuera_del_event_loop(monkeypatch):
+    import asyncio
+    import threading
+
+    generacion = [0]
+    hilos = []
+
+    class RedisFalso:
+        def mget(self, keys):
+            hilos.append(threading.get_ident())
+            return [generacion[0]] * len(keys)
+
+    monkeypatch.setattr(cache, "get_redis", lambda: RedisFalso())
+    monkeypatch.setattr(settings, "API_CACHE_REDIS_POLL_SECONDS", 0)
+
+    calls = []
+
+    @cache.cached(ttl=60, tags=("casas",))
+    async def handler_redis():
+        calls.append(1)
+        return len(calls)
+
+    async def escenario():
+        assert await handler_redis() == 1
+        assert await handler_redis() == 1
+        generacion[0] = 1  # Otro proceso invalidó "casas"
+        return await handler_redis(), threading.get_ident()
+
+    valor, hilo_loop = asyncio.run(escenario())
+
+    assert valor == 2
+    assert hilos and hilo_loop not in hilos
+
+def test_response_class_guarda_bytes_serializados():
+    from app.core.responses import JSONResponse
+
+    calls = []
+
+    @cache.cached(ttl=60, response_class=JSONResponse)
+    def handler():
+        calls.append(1)
+        return {"fecha": "2024-01-02", "precio": 3.75}
+
+    primera, segunda = handler(), handler()
+
+    assert calls == [1]
+    assert primera is not segunda
+    assert primera.body == segunda.body == b'{"fecha":"2024-01-02","precio":3.75}'
+    assert isinstance(next(iter(cache._store.values()))["value"], bytes)
@@ -0,0 +1,71 @@
+import json
+import math
+
+from app.services import bcrp_service
+from app.services.bcrp_service import parse_bcrp_date, parse_periods_columnar
+
+
+RESPONSE = json.dumps({
+    "config": {"title": "Tipo de cambio", "series": [{"name": "TC Venta"}, {"name": "Tasa"}]},
+    "periods": [
+        {"name": "02.Ene.24", "values": ["3.7012", "6.75"]},
+        {"name": "03.Ene.24", "values": ["n.d.", "6.74"]},
+        {"name": "fecha rara", "values": ["1", "2"]},
+        {"name": "24.Dic.25", "values": ["3.3640", "4.25"]},
+    ],
+}, ensure_ascii=False).encode("utf-8")
+
+
+def _chunks(raw, size):
+    return [raw[i:i + size] for i in range(0, len(raw), size)]
+
+
+def test_parse_bcrp_date():
+    assert parse_bcrp_date("24.Dic.25") == "2025-12-24"
+    assert parse_bcrp_date("2.ene.24") == "2024-01-02"
+    assert parse_bcrp_date("Dic.2025") == "2025-12-01"
+    assert parse_bcrp_date("32.Ene.24") is None
+    assert parse_bcrp_date("24.Xyz.25") is None
+
+
+def test_parser_en_streaming_con_bloques_partidos():
+    for size in (1, 7, len(RESPONSE)):
+        parsed = parse_periods_columnar(_chunks(RESPONSE, size), n_series=2)
+
+        assert parsed["fecha"] == ["2024-01-02", "2024-01-03", "2025-12-24"]
+        venta, tasa = parsed["values"]
+        assert math.isnan(venta[1])
+        assert list(tasa) == [6.75, 6.74, 4.25]
+
+
+def test_get_bcrp_data_multiserie(monkeypatch):
+    urls = []
+
+    class FakeResponse:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def raise_for_status(self):
+            pass
+
+        def iter_content(self, size):
+            return _chunks(RESPONSE, 16)
+
+    def fake_fetch(url, **kwargs):
+        urls.append(url)
+        return FakeResponse()
+
+    monkeypatch.setattr(bcrp_service, "fetch", fake_fetch)
+
+    records = bcrp_service.get_bcrp_data("2024-01-01", "2025-12-31")
+
+    assert urls[0].endswith("/PD04640PD-PD04639PD/json/2024-01-01/2025-12-31")
+    assert records[1] == {
+        "fecha": "2024-01-03",
+        "tc_interbancario_venta": None,
+        "tasa_interbancaria": 6.74,
+        "origen": "BCRP_API",
+    }
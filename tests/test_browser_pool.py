@@ -0,0 +1,81 @@
+import pytest
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+from app.scraper.browser_pool import BrowserPool
+
+
+class FakeDriver:
+    def __init__(self):
+        self.quit_called = False
+        self.current_url = "about:blank"
+
+    def quit(self):
+        self.quit_called = True
+
+
+def test_reutiliza_y_recicla_tras_max_pages():
+    creados = []
+    pool = BrowserPool(lambda: creados.append(FakeDriver()) or creados[-1], size=1, max_pages=2)
+
+    with pool.driver() as d1:
+        pass
+    with pool.driver() as d2:
+        pass
+    with pool.driver() as d3:
+        pass
+
+    assert d1 is d2
+    assert d1.quit_called
+    assert d3 is not d1
+    assert len(creados) == 2
+
+
+def test_descarta_driver_tras_crash():
+    pool = BrowserPool(FakeDriver, size=1, max_pages=10)
+
+    with pytest.raises(WebDriverException):
+        with pool.driver() as d1:
+            raise WebDriverException("chrome not reachable")
+
+    with pool.driver() as d2:
+        pass
+
+    assert d1.quit_called
+    assert d2 is not d1
+
+
+def test_timeout_no_descarta_driver():
+    pool = BrowserPool(FakeDriver, size=1, max_pages=10)
+
+    with pytest.raises(TimeoutException):
+        with pool.driver() as d1:
+            raise TimeoutException()
+
+    with pool.driver() as d2:
+        pass
+
+    assert d2 is d1
+
+
+def test_conteo_de_paginas_concurrente():
+    import sys
+    import threading
+
+    pool = BrowserPool(FakeDriver, size=4, max_pages=10_000)
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        def usar():
+            for _ in range(200):
+                with pool.driver():
+                    pass
+
+        threads = [threading.Thread(target=usar) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        sys.setswitchinterval(interval)
+
+    assert sum(pool._pages.values()) == 8 * 200
@@ -0,0 +1,55 @@
+from pathlib import Path
+
+from app.scraper import cuantoestaeldolar_parser as parser
+
+FIXTURE = Path(__file__).parent / "fixtures" / "cuantoestaeldolar.html"
+
+
+def _raw():
+    return FIXTURE.read_bytes()
+
+
+def _sin_next_data(raw):
+    start = raw.find(b'<script id="__NEXT_DATA__"')
+    end = raw.find(b"</script>", start) + len(b"</script>")
+    return raw[:start] + raw[end:]
+
+
+def test_json_y_html_coinciden():
+    raw = _raw()
+    desde_json = parser.extract_casas_next_data(raw)
+    desde_html = parser.extract_casas_html(raw)
+
+    assert len(desde_json) == 40
+    assert desde_json == desde_html
+    assert desde_json[0]["nombre"] == "Rextie"
+    assert desde_json[0]["url"].startswith("https://rextie.pe/")
+
+
+def test_fallback_html_sin_next_data():
+    raw = _sin_next_data(_raw())
+
+    assert parser.slice_next_data(raw) is None
+    assert parser.extract_casas(raw) == parser.extract_casas_next_data(_raw())
+
+
+def test_fallback_bs4_sin_lxml():
+    raw = _raw()
+    assert parser._extract_casas_bs4(raw) == parser._extract_casas_lxml(raw)
+
+
+def test_exchange_rates_omite_casas_sin_precio(monkeypatch):
+    from types import SimpleNamespace
+
+    from app.scraper import scraper
+
+    casas = [
+        {"nombre": "Rextie", "url": "https://rextie.pe/", "compra": 3.75, "venta": 3.78},
+        {"nombre": "SinVenta", "url": "", "compra": 3.70, "venta": None},
+    ]
+    monkeypatch.setattr(scraper, "fetch", lambda url: SimpleNamespace(status_code=200, content=b""))
+    monkeypatch.setattr(scraper, "extract_casas_next_data", lambda raw: casas)
+
+    assert scraper.get_exchange_rates_casas() == [
+        {"nombre": "Rextie", "compra": 3.75, "venta": 3.78, "sitio": "https://rextie.pe/"}
+    ]
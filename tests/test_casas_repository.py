@@ -0,0 +1,38 @@
+from types import SimpleNamespace
+
+from app.db.repositories import casas_repository
+
+
+class FakeTable:
+    def __init__(self, existing):
+        self.existing = existing
+        self.calls = []
+
+    def upsert(self, rows, **kwargs):
+        self.calls.append((rows, kwargs))
+        self._rows = rows
+        return self
+
+    def execute(self):
+        inserted = [r for r in self._rows if r["origen"] not in self.existing]
+        return SimpleNamespace(data=inserted)
+
+
+def test_insert_casas_batch_un_solo_upsert(monkeypatch):
+    table = FakeTable(existing={"Rextie"})
+    fake_client = SimpleNamespace(table=lambda name: table)
+    monkeypatch.setattr(casas_repository, "get_supabase_client", lambda: fake_client)
+
+    casas = [
+        {"nombre": "Rextie", "compra": 3.75, "venta": 3.78},
+        {"nombre": "Kambista", "compra": 3.76, "venta": 3.79},
+        {"nombre": "Tkambio", "compra": 3.74, "venta": 3.80},
+    ]
+    result = casas_repository.insert_casas_batch(casas, "2025-12-30")
+
+    assert result == {"inserted": 2, "skipped": 1}
+    assert len(table.calls) == 1
+    rows, kwargs = table.calls[0]
+    assert len(rows) == 3
+    assert kwargs["on_conflict"] == "origen,fecha"
+    assert kwargs["ignore_duplicates"] is True
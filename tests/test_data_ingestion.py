@@ -0,0 +1,119 @@
+from types import SimpleNamespace
+
+from app.services import data_ingestion
+
+
+class FakeTable:
+    def __init__(self, fail_first_n):
+        self.fail_first_n = fail_first_n
+        self.calls = []
+
+    def upsert(self, rows, **kwargs):
+        self.calls.append(rows)
+        return self
+
+    def execute(self):
+        if len(self.calls) <= self.fail_first_n:
+            raise RuntimeError("timeout")
+        return SimpleNamespace(data=[])
+
+
+def _records(n):
+    return [{"fecha": f"2024-01-{d:02d}", "tc_interbancario_venta": 3.7} for d in range(1, n + 1)]
+
+
+def test_upsert_en_chunks_con_reintento(monkeypatch):
+    table = FakeTable(fail_first_n=1)
+    monkeypatch.setattr(data_ingestion, "get_supabase_client", lambda: SimpleNamespace(table=lambda t: table))
+    monkeypatch.setattr(data_ingestion, "RETRY_BACKOFF", 0)
+
+    result = data_ingestion.upsert_in_chunks("bcrp_data", _records(25), chunk_size=10, max_retries=1)
+
+    assert result == {"inserted": 25, "errors": 0, "failed_chunks": []}
+    assert [len(c) for c in table.calls] == [10, 10, 10, 5]
+
+
+def test_reporta_chunks_fallidos(monkeypatch):
+    table = FakeTable(fail_first_n=2)
+    monkeypatch.setattr(data_ingestion, "get_supabase_client", lambda: SimpleNamespace(table=lambda t: table))
+    monkeypatch.setattr(data_ingestion, "RETRY_BACKOFF", 0)
+
+    records = _records(15) + _records(1)  # fecha repetida: se deduplica
+    result = data_ingestion.upsert_in_chunks("bcrp_data", records, chunk_size=10, max_retries=1)
+
+    assert result["inserted"] == 5
+    assert result["errors"] == 10
+    assert result["failed_chunks"][0]["desde"] == "2024-01-01"
+    assert result["failed_chunks"][0]["hasta"] == "2024-01-10"
+
+
+def test_split_windows():
+    from app.services.backfill import split_windows
+
+    windows = split_windows("2024-01-01", "2024-03-05", 30)
+
+    assert windows == [
+        ("2024-01-01", "2024-01-30"),
+        ("2024-01-31", "2024-02-29"),
+        ("2024-03-01", "2024-03-05"),
+    ]
+
+
+def test_backfill_reanuda_desde_checkpoint(monkeypatch, tmp_path):
+    from app.core.config import settings
+    from app.services import backfill
+
+    monkeypatch.setattr(settings, "BACKFILL_STATE_PATH", str(tmp_path / "state.json"))
+    fetched = []
+    caido = {"2024-01-31"}
+
+    def fake_bcrp(start, end, raise_errors=False):
+        fetched.append(start)
+        if start in caido:
+            raise ConnectionError("BCRP caído")
+        return [{"fecha": start}]
+
+    monkeypatch.setattr(backfill, "get_bcrp_data", fake_bcrp)
+    monkeypatch.setattr(backfill, "get_international_data", lambda s, e, raise_errors=False: [{"fecha": s}])
+    ok = {"inserted": 1, "errors": 0, "failed_chunks": []}
+    monkeypatch.setattr(data_ingestion, "insert_bcrp_data", lambda r: ok)
+    monkeypatch.setattr(data_ingestion, "insert_market_data", lambda r: ok)
+
+    primera = backfill.run_backfill("2024-01-01", "2024-03-05", window_days=30, max_workers=1)
+    assert primera["completed"] == 2
+    assert [f["desde"] for f in primera["failed"]] == ["2024-01-31"]
+
+    fetched.clear()
+    caido.clear()
+    segunda = backfill.run_backfill("2024-01-01", "2024-03-05", window_days=30, max_workers=1)
+    assert fetched == ["2024-01-31"]
+    assert segunda["skipped"] == 2
+    assert segunda["failed"] == []
+
+
+def test_ingesta_de_mercado_incremental(monkeypatch):
+    import pandas as pd
+
+    monkeypatch.setattr(data_ingestion, "get_market_series", lambda: {"HG=F": "precio_cobre", "GC=F": "precio_oro"})
+    monkeypatch.setattr(data_ingestion, "get_latest_market_dates", lambda cols: {"precio_cobre": "2024-01-10", "precio_oro": None})
+    monkeypatch.setattr(data_ingestion, "MARKET_OVERLAP_DAYS", 0)
+
+    pedidos = []
+
+    def fake_closes(tickers, start, end):
+        pedidos.append((sorted(tickers), start, end))
+        index = pd.date_range("2024-01-01", end)
+        return pd.DataFrame({"HG=F": 4.0, "GC=F": 2000.0}, index=index)
+
+    guardados = []
+    monkeypatch.setattr(data_ingestion, "get_closes", fake_closes)
+    monkeypatch.setattr(data_ingestion, "insert_market_data", lambda r: guardados.append(r) or {"inserted": len(r), "errors": 0, "failed_chunks": []})
+
+    result = data_ingestion.ingest_market_incremental("2024-01-12", default_start="2024-01-01")
+
+    assert pedidos == [(["GC=F", "HG=F"], "2024-01-01", "2024-01-12")]
+    oro, cobre = guardados
+    assert len(oro) == 12 and set(oro[0]) == {"fecha", "precio_oro", "origen"}
+    assert [r["fecha"] for r in cobre] == ["2024-01-10", "2024-01-11", "2024-01-12"]
+    assert set(cobre[0]) == {"fecha", "precio_cobre", "origen"}
+    assert result["inserted"] == 15
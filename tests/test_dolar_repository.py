@@ -0,0 +1,112 @@
+from datetime import date
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+
+from app.db.models import Dolar
+from app.db.models.models import Base
+from app.repository.dolar_repository import DolarRepository
+
+
+@pytest.fixture
+def repo():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=[Dolar.__table__])
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *a: statements.append(a[2]))
+
+    with Session(engine) as db:
+        repository = DolarRepository(db)
+        repository.statements = statements
+        yield repository
+
+
+def _fila(origen, precio, fecha=date(2025, 1, 2)):
+    return {"origen": origen, "fecha": fecha, "precio_compra": precio, "precio_venta": precio + 0.03}
+
+
+def test_create_many_un_insert_y_omite_existentes(repo):
+    creadas = repo.create_many([_fila(f"Casa {i}", 3.7) for i in range(40)])
+    assert len(creadas) == 40
+    assert sum(s.startswith("INSERT") for s in repo.statements) == 1
+
+    # Repetidas en el lote y ya existentes: solo entra la nueva
+    nuevas = repo.create_many([_fila("Casa 0", 3.9), _fila("SUNAT", 3.75), _fila("SUNAT", 3.8)])
+    assert [(d.origen, d.precio_compra) for d in nuevas] == [("SUNAT", 3.75)]
+    assert repo.get_latest_by_origen("Casa 0").precio_compra == 3.7
+
+
+def test_upsert_many_actualiza_precios_y_retorna_filas(repo):
+    repo.create_many([_fila("Rextie", 3.70)])
+
+    filas = repo.upsert_many([_fila("Rextie", 3.72), _fila("Kambista", 3.71)])
+
+    assert {d.origen: d.precio_compra for d in filas} == {"Rextie": 3.72, "Kambista": 3.71}
+    assert repo.get_latest_by_origen("Rextie").precio_compra == 3.72
+    assert len(repo.get_all()) == 2
+
+
+def test_update_many_sin_releer_por_id(repo):
+    ids = [d.id for d in repo.create_many([_fila("Rextie", 3.70), _fila("Kambista", 3.71)])]
+    repo.statements.clear()
+
+    n = repo.update_many([(ids[0], {"precio_venta": 3.80}), (ids[1], {"precio_venta": 3.81, "precio_compra": None})])
+
+    assert n == 2
+    assert not any(s.startswith("SELECT") for s in repo.statements)
+    assert sorted(d.precio_venta for d in repo.get_all()) == [3.80, 3.81]
+
+    with pytest.raises(ValueError):
+        repo.update_many([(ids[0], {"diferencia": 1})])
+
+
+def test_latest_por_origen(repo):
+    repo.create_many(
+        [_fila("Rextie", 3.70 + d / 100, date(2025, 1, d)) for d in range(1, 6)]
+        + [_fila("Kambista", 3.60 + d / 100, date(2025, 1, d)) for d in range(1, 3)]
+    )
+
+    latest = {d.origen: d.fecha for d in repo.get_latest_all_origins()}
+    assert latest == {"Rextie": date(2025, 1, 5), "Kambista": date(2025, 1, 2)}
+
+    ultimas = [(d.origen, d.fecha.day) for d in repo.get_latest_n_per_origin(3)]
+    assert ultimas == [("Kambista", 2), ("Kambista", 1), ("Rextie", 5), ("Rextie", 4), ("Rextie", 3)]
+
+
+def test_iter_rows_proyecta_columnas_sin_instancias_orm(repo):
+    repo.create_many([_fila("Rextie", 3.70 + d / 100, date(2025, 1, d)) for d in range(1, 6)] + [_fila("Kambista", 3.6)])
+    repo.db.expunge_all()
+
+    filas = list(repo.iter_rows(("fecha", "precio_compra"), origen="Rextie", start=date(2025, 1, 2), batch_size=2))
+
+    assert [f.fecha.day for f in filas] == [2, 3, 4, 5]
+    assert filas[0]._fields == ("fecha", "precio_compra")
+    assert len(repo.db.identity_map) == 0
+
+    with pytest.raises(ValueError):
+        list(repo.iter_rows(("fecha", "diferencia_ayer")))
+
+
+def test_to_array_estructurado(repo):
+    repo.create_many([_fila(f"Casa {c}", 3.70 + c / 100, date(2025, 1, d)) for d in range(1, 4) for c in range(3)])
+
+    arr = repo.to_array(batch_size=4)
+
+    assert arr.dtype.names == ("origen", "fecha", "precio_compra", "precio_venta")
+    assert len(arr) == 9
+    assert arr["fecha"][0] == np.datetime64("2025-01-01")
+    assert arr["precio_compra"][arr["origen"] == "Casa 2"].tolist() == [3.72, 3.72, 3.72]
+    assert len(repo.to_array(origen="Nadie")) == 0
+
+
+def test_dialecto_no_soportado():
+    from types import SimpleNamespace
+
+    from app.repository.dolar_repository import _dialect_insert
+
+    db = SimpleNamespace(get_bind=lambda: SimpleNamespace(dialect=SimpleNamespace(name="mysql")))
+    with pytest.raises(ValueError, match="Dialecto no soportado: mysql"):
+        _dialect_insert(db)
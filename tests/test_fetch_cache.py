@@ -0,0 +1,54 @@
+from types import SimpleNamespace
+
+from app.core.config import settings
+from app.scraper import fetch_cache
+
+
+def _fake_fetch(responses, calls):
+    def fetch(url, headers=None, **kwargs):
+        calls.append(headers or {})
+        return responses.pop(0)
+    return fetch
+
+
+def _response(status, body=b"", headers=None):
+    return SimpleNamespace(
+        status_code=status,
+        content=body,
+        headers=headers or {},
+        raise_for_status=lambda: None,
+    )
+
+
+def test_peticion_condicional_y_cambio(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "FETCH_CACHE_DIR", str(tmp_path))
+    calls = []
+    responses = [
+        _response(200, b"precios-1", {"ETag": '"v1"'}),
+        _response(304),
+        _response(200, b"precios-2", {"ETag": '"v2"'}),
+    ]
+    monkeypatch.setattr(fetch_cache, "fetch", _fake_fetch(responses, calls))
+
+    primera = fetch_cache.fetch_cached("https://example.com/", namespace="test")
+    assert primera.changed
+    primera.mark_processed()
+
+    segunda = fetch_cache.fetch_cached("https://example.com/", namespace="test")
+    assert calls[1]["If-None-Match"] == '"v1"'
+    assert segunda.from_cache
+    assert segunda.body == b"precios-1"
+    assert not segunda.changed
+
+    tercera = fetch_cache.fetch_cached("https://example.com/", namespace="test")
+    assert tercera.changed
+
+
+def test_sin_mark_processed_sigue_pendiente(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "FETCH_CACHE_DIR", str(tmp_path))
+    responses = [_response(200, b"a"), _response(200, b"a")]
+    monkeypatch.setattr(fetch_cache, "fetch", _fake_fetch(responses, []))
+
+    assert fetch_cache.fetch_cached("https://example.com/").changed
+    # El guardado falló y no se marcó: la siguiente ejecución vuelve a procesarlo
+    assert fetch_cache.fetch_cached("https://example.com/").changed
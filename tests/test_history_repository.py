@@ -0,0 +1,114 @@
+from types import SimpleNamespace
+from datetime import date
+
+import pytest
+
+from app.db.repositories import history_repository
+
+
+class FakeTable:
+    """Tabla en memoria ordenada por (fecha, id) que interpreta el filtro keyset"""
+
+    def __init__(self, rows, log):
+        self.rows = rows
+        self.log = log
+        self.after = None
+
+    def select(self, *a):
+        return self
+
+    def gte(self, *a):
+        return self
+
+    def lte(self, *a):
+        return self
+
+    def or_(self, expr):
+        self.log.append(expr)
+        self.after = self._parse(expr)
+        return self
+
+    def order(self, *a, **k):
+        return self
+
+    def limit(self, n):
+        self.n = n
+        return self
+
+    def execute(self):
+        rows = sorted(self.rows, key=lambda r: (r["fecha"], r["id"]), reverse=True)
+        if self.after:
+            rows = [r for r in rows if (r["fecha"], r["id"]) < self.after]
+        return SimpleNamespace(data=rows[:self.n])
+
+    @staticmethod
+    def _parse(expr):
+        # fecha.lt."2024-01-03",and(fecha.eq."2024-01-03",id.lt.7)
+        value = expr.split('"')[1]
+        row_id = int(expr.rsplit(".", 1)[1].rstrip(")"))
+        return (value, row_id)
+
+
+def _rows():
+    # Varias filas por fecha para probar el desempate por id
+    return [{"id": i, "fecha": f"2024-01-{i // 3 + 1:02d}"} for i in range(10)]
+
+
+def test_cursor_ida_y_vuelta():
+    cursor = history_repository.encode_cursor({"fecha": "2024-01-03", "id": 7})
+    assert history_repository.decode_cursor(cursor) == ("2024-01-03", 7)
+
+
+def test_cursor_invalido():
+    with pytest.raises(ValueError):
+        history_repository.decode_cursor("no-es-un-cursor")
+
+
+def test_cursor_con_timestamp():
+    row = {"timestamp": "2024-01-03T10:00:00+00:00", "id": 7}
+    cursor = history_repository.encode_cursor(row, "timestamp")
+    assert history_repository.decode_cursor(cursor) == ("2024-01-03T10:00:00+00:00", 7)
+
+
+@pytest.mark.parametrize("key", [
+    ['2024-01-03",origen.eq."Rextie', 7],          # cierra las comillas y agrega un filtro
+    ["2024-01-03),or(id.gt.0", 7],                  # cierra el and(...) del keyset
+    ["2024-01-03", "7,id.gt.0"],                    # id que no es entero
+    ["2024-01-03", True],
+    [20240103, 7],
+])
+def test_cursor_malicioso(key):
+    import base64
+    import json
+
+    cursor = base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+    with pytest.raises(ValueError):
+        history_repository.decode_cursor(cursor)
+
+
+def test_paginas_por_keyset_sin_repetir_ni_saltar_filas(monkeypatch):
+    log = []
+    rows = _rows()
+    client = SimpleNamespace(table=lambda name: FakeTable(rows, log))
+    monkeypatch.setattr(history_repository, "get_supabase_client", lambda: client)
+
+    seen, cursor = [], None
+    while True:
+        page, cursor = history_repository.get_history_page("bcrp_data", date(2024, 1, 1), limit=4, cursor=cursor)
+        seen.extend(r["id"] for r in page)
+        if cursor is None:
+            break
+
+    assert seen == sorted(range(10), key=lambda i: (rows[i]["fecha"], i), reverse=True)
+    assert log[0].startswith('fecha.lt."2024-01-')
+
+
+def test_iter_history_recorre_todas_las_paginas(monkeypatch):
+    log = []
+    client = SimpleNamespace(table=lambda name: FakeTable(_rows(), log))
+    monkeypatch.setattr(history_repository, "get_supabase_client", lambda: client)
+
+    rows = list(history_repository.iter_history("market_data", page_size=3))
+
+    assert len(rows) == 10
+    assert len(log) == 3  # 4 páginas (3+3+3+1): solo la primera va sin cursor
@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta
+
+from app.core.config import settings
+from app.db.repositories.hourly_repository import expand_step_series
+from app.scraper.hourly_state import (
+    build_hourly_row,
+    heartbeat_rows,
+    select_delta_rows,
+    update_state,
+)
+
+T0 = datetime(2025, 12, 30, 9, 0)
+
+
+def test_solo_cambios_y_casas_nuevas():
+    state = {}
+    update_state(state, build_hourly_row("Rextie", 3.75, 3.78, "", T0))
+    update_state(state, build_hourly_row("Kambista", 3.76, 3.79, "", T0))
+
+    now = T0 + timedelta(hours=2)
+    rows = [
+        build_hourly_row("Rextie", 3.75, 3.78, "", now),
+        build_hourly_row("Kambista", 3.77, 3.79, "", now),
+        build_hourly_row("Tkambio", 3.74, 3.80, "", now),
+    ]
+
+    assert [r["origen"] for r in select_delta_rows(rows, state, now)] == ["Kambista", "Tkambio"]
+
+
+def test_heartbeat_vencido():
+    state = {}
+    update_state(state, build_hourly_row("Rextie", 3.75, 3.78, "https://rextie.com", T0))
+
+    antes = T0 + timedelta(hours=settings.HOURLY_HEARTBEAT_HOURS - 1)
+    despues = T0 + timedelta(hours=settings.HOURLY_HEARTBEAT_HOURS)
+
+    assert heartbeat_rows(state, antes) == []
+    latido = heartbeat_rows(state, despues)
+    assert len(latido) == 1
+    assert latido[0]["precio_compra"] == 3.75
+    assert latido[0]["url"] == "https://rextie.com"
+
+
+def test_reconstruye_serie_escalonada():
+    rows = [
+        build_hourly_row("Rextie", 3.75, 3.78, "", T0),
+        build_hourly_row("Rextie", 3.76, 3.79, "", T0 + timedelta(hours=4)),
+    ]
+    grid = [T0 - timedelta(hours=1)] + [T0 + timedelta(hours=h) for h in range(0, 7, 2)]
+
+    serie = expand_step_series(rows, grid)
+
+    assert [p["precio_compra"] for p in serie] == [3.75, 3.75, 3.76, 3.76]
@@ -0,0 +1,53 @@
+from datetime import date, datetime, timezone
+from types import SimpleNamespace
+
+from app.db.repositories import hourly_repository
+
+
+def fake_client(calls, data):
+    def rpc(name, params=None):
+        calls.append((name, params))
+        return SimpleNamespace(execute=lambda: SimpleNamespace(data=data))
+
+    return SimpleNamespace(rpc=rpc)
+
+
+def test_partition_months_cruza_el_año():
+    assert hourly_repository.partition_months(date(2024, 11, 30), 3) == [
+        date(2024, 11, 1), date(2024, 12, 1), date(2025, 1, 1), date(2025, 2, 1),
+    ]
+    assert hourly_repository.partition_months(date(2024, 1, 1), 0) == [date(2024, 1, 1)]
+
+
+def test_retention_bounds_conserva_el_mes_del_corte():
+    # 90 días antes del 15 de mayo es el 15 de febrero: se elimina enero, febrero se conserva entero
+    before_month, cutoff = hourly_repository.retention_bounds(datetime(2024, 5, 15, 12, tzinfo=timezone.utc), 90)
+    assert before_month == date(2024, 2, 1)
+    assert cutoff == datetime(2024, 2, 15, 12, tzinfo=timezone.utc)
+
+    # Corte justo en el inicio de un mes: el mes anterior ya expiró completo
+    before_month, _ = hourly_repository.retention_bounds(datetime(2024, 3, 31, tzinfo=timezone.utc), 30)
+    assert before_month == date(2024, 3, 1)
+
+
+def test_create_hourly_partitions_usa_rpc(monkeypatch):
+    calls = []
+    data = [{"partition_name": "dolar_hourly_p2026_01"}, {"partition_name": "dolar_hourly_p2026_02"}]
+    monkeypatch.setattr(hourly_repository, "get_supabase_admin_client", lambda: fake_client(calls, data))
+
+    created = hourly_repository.create_hourly_partitions(2, today=date(2025, 12, 20))
+
+    assert created == ["dolar_hourly_p2026_01", "dolar_hourly_p2026_02"]
+    assert calls == [("create_dolar_hourly_partitions", {"p_months": ["2025-12-01", "2026-01-01", "2026-02-01"]})]
+
+
+def test_drop_expired_hourly_partitions_sin_particiones(monkeypatch):
+    calls = []
+    monkeypatch.setattr(hourly_repository, "get_supabase_admin_client", lambda: fake_client(calls, None))
+
+    now = datetime(2024, 5, 15, tzinfo=timezone.utc)
+    assert hourly_repository.drop_expired_hourly_partitions(90, drop=False, now=now) == []
+    assert calls == [(
+        "drop_expired_dolar_hourly_partitions",
+        {"p_before_month": "2024-02-01", "p_cutoff": "2024-02-15T00:00:00+00:00", "p_drop": False},
+    )]
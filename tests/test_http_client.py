@@ -0,0 +1,99 @@
+import threading
+
+import requests
+from requests.adapters import BaseAdapter
+
+from app.scraper import http_client
+
+
+class FakeAdapter(BaseAdapter):
+    """Transporte falso: registra cada request y responde 200 sin red"""
+
+    def __init__(self):
+        super().__init__()
+        self.sent = []
+
+    def send(self, request, **kwargs):
+        self.sent.append((request, kwargs))
+        response = requests.Response()
+        response.status_code = 200
+        response.request = request
+        response.url = request.url
+        response._content = b"ok"
+        return response
+
+    def close(self):
+        pass
+
+
+def fake_session(monkeypatch):
+    session = requests.Session()
+    session.headers.update(http_client.DEFAULT_HEADERS)
+    adapter = FakeAdapter()
+    session.mount("https://", adapter)
+    monkeypatch.setattr(http_client, "get_session", lambda: session)
+    return adapter
+
+
+def test_fetch_usa_timeout_de_la_fuente(monkeypatch):
+    adapter = fake_session(monkeypatch)
+
+    http_client.fetch("https://wise.com/pe/currency-converter/usd-to-pen-rate")
+    http_client.fetch("https://e-consulta.sunat.gob.pe/cl-at-ittipcam/tcS01Alias/listarTipoCambio", method="POST")
+    http_client.fetch("https://otra-fuente.pe/")
+
+    timeouts = [kwargs["timeout"] for _, kwargs in adapter.sent]
+    assert timeouts == [(5, 15), (5, 10), (5, 20)]
+    assert adapter.sent[1][0].method == "POST"
+
+
+def test_fetch_respeta_timeout_explicito(monkeypatch):
+    adapter = fake_session(monkeypatch)
+
+    response = http_client.fetch("https://kambista.com/", timeout=1)
+
+    assert response.text == "ok"
+    assert adapter.sent[0][1]["timeout"] == 1
+    assert adapter.sent[0][0].headers["User-Agent"] == http_client.DEFAULT_HEADERS["User-Agent"]
+
+
+def test_adapter_y_reintentos_por_fuente():
+    session = http_client._build_session()
+
+    bcrp = session.get_adapter("https://estadisticas.bcrp.gob.pe/estadisticas/series/api/")
+    sunat = session.get_adapter("https://e-consulta.sunat.gob.pe/cl-at-ittipcam/")
+    other = session.get_adapter("https://otra-fuente.pe/")
+
+    assert bcrp is not sunat and bcrp is not other
+    assert bcrp.max_retries.total == 3
+    assert sunat.max_retries.total == 1
+    assert "POST" in sunat.max_retries.allowed_methods
+    assert "POST" not in bcrp.max_retries.allowed_methods
+    assert other.max_retries.total == http_client.DEFAULT_SOURCE["retries"]
+
+
+def test_get_session_se_recrea_tras_fork(monkeypatch):
+    monkeypatch.setattr(http_client, "_session", None)
+    monkeypatch.setattr(http_client, "_session_pid", None)
+
+    first = http_client.get_session()
+    assert http_client.get_session() is first
+
+    monkeypatch.setattr(http_client.os, "getpid", lambda: -1)
+    assert http_client.get_session() is not first
+
+
+def test_run_concurrently_en_paralelo_y_errores_como_none():
+    # Las dos tareas deben estar en curso a la vez para pasar la barrera
+    barrier = threading.Barrier(2, timeout=5)
+
+    def ok():
+        barrier.wait()
+        return "casas"
+
+    def falla():
+        barrier.wait()
+        raise RuntimeError("timeout")
+
+    assert http_client.run_concurrently({"casas": ok, "sunat": falla}) == {"casas": "casas", "sunat": None}
+    assert http_client.run_concurrently({}) == {}
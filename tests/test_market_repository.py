@@ -0,0 +1,62 @@
+from types import SimpleNamespace
+
+from app.db.repositories import market_repository
+
+
+class FakeQuery:
+    """Registra cada consulta y devuelve las filas configuradas según el filtro"""
+
+    def __init__(self, log, rows):
+        self.log = log
+        self.rows = rows
+        self.not_ = self
+
+    def select(self, columns):
+        self.log.append(columns)
+        return self
+
+    def or_(self, *a):
+        return self
+
+    def is_(self, column, value):
+        self.column = column
+        return self
+
+    def order(self, *a, **k):
+        return self
+
+    def limit(self, n):
+        return self
+
+    def execute(self):
+        if hasattr(self, "column"):
+            return SimpleNamespace(data=[r for r in self.rows if r.get(self.column) is not None][:1])
+        return SimpleNamespace(data=self.rows)
+
+
+def test_get_latest_market_dates_una_consulta(monkeypatch):
+    log = []
+    rows = [
+        {"fecha": "2024-01-10", "precio_cobre": 4.1, "indice_dxy": None},
+        {"fecha": "2024-01-09", "precio_cobre": 4.0, "indice_dxy": 101.5},
+    ]
+    client = SimpleNamespace(table=lambda name: FakeQuery(log, rows))
+    monkeypatch.setattr(market_repository, "get_supabase_client", lambda: client)
+
+    latest = market_repository.get_latest_market_dates(["precio_cobre", "indice_dxy"])
+
+    assert latest == {"precio_cobre": "2024-01-10", "indice_dxy": "2024-01-09"}
+    assert log == ["fecha, precio_cobre, indice_dxy"]
+
+
+def test_get_latest_market_dates_serie_nueva(monkeypatch):
+    log = []
+    rows = [{"fecha": "2024-01-10", "precio_cobre": 4.1, "precio_oro": None}]
+    client = SimpleNamespace(table=lambda name: FakeQuery(log, rows))
+    monkeypatch.setattr(market_repository, "get_supabase_client", lambda: client)
+
+    latest = market_repository.get_latest_market_dates(["precio_cobre", "precio_oro"])
+
+    # La serie sin dato en las filas recientes se consulta aparte
+    assert latest == {"precio_cobre": "2024-01-10", "precio_oro": None}
+    assert log == ["fecha, precio_cobre, precio_oro", "fecha"]
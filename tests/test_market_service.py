@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+
+from app.services.market_service import close_to_records
+
+
+def test_close_to_records():
+    df = pd.DataFrame(
+        {
+            "HG=F": [4.123456, np.nan, np.nan],
+            "DX-Y.NYB": [101.5, 102.25, np.nan],
+            "GC=F": [2000.0, 2001.0, 2002.0],
+        },
+        index=pd.to_datetime(["2024-01-02", "2024-01-03", "2024-01-04"]),
+    )
+
+    assert close_to_records(df) == [
+        {"fecha": "2024-01-02", "precio_cobre": 4.1235, "indice_dxy": 101.5, "origen": "YAHOO"},
+        {"fecha": "2024-01-03", "precio_cobre": None, "indice_dxy": 102.25, "origen": "YAHOO"},
+    ]
+
+
+def _fake_download(calls):
+    def download(tickers, start, end, progress=False):
+        calls.append((list(tickers), start, end))
+        index = pd.bdate_range(start, pd.Timestamp(end) - pd.Timedelta(days=1))
+        close = pd.DataFrame({t: np.arange(len(index), dtype=float) + 1 for t in tickers}, index=index)
+        return pd.concat({"Close": close}, axis=1)
+    return download
+
+
+def test_get_closes_descarga_solo_lo_faltante(monkeypatch, tmp_path):
+    from app.core.config import settings
+    from app.services import market_service
+
+    monkeypatch.setattr(settings, "MARKET_CACHE_DIR", str(tmp_path))
+    calls = []
+    monkeypatch.setattr(market_service.yf, "download", _fake_download(calls))
+
+    market_service.get_closes(["HG=F", "DX-Y.NYB"], "2024-01-01", "2024-01-31")
+    df = market_service.get_closes(["HG=F", "DX-Y.NYB"], "2024-01-15", "2024-02-15")
+
+    # Un solo yf.download por llamada, y la segunda solo pide lo que no está en caché
+    assert calls == [
+        (["HG=F", "DX-Y.NYB"], "2024-01-01", "2024-02-01"),
+        (["HG=F", "DX-Y.NYB"], "2024-02-01", "2024-02-16"),
+    ]
+    assert df.index[0] == pd.Timestamp("2024-01-15")
+    assert df.index[-1] == pd.Timestamp("2024-02-15")
+
+    # Un ticker nuevo se descarga solo, el resto sale de la caché
+    calls.clear()
+    market_service.get_closes(["HG=F", "DX-Y.NYB", "GC=F"], "2024-01-01", "2024-02-15")
+    assert calls == [(["GC=F"], "2024-01-01", "2024-02-16")]
+
+
+def test_registro_de_series_configurable(monkeypatch):
+    from app.core.config import settings
+    from app.services.market_service import get_market_series
+
+    monkeypatch.setattr(settings, "MARKET_SERIES", {"GC=F": "precio_oro"})
+
+    assert get_market_series() == {
+        "HG=F": "precio_cobre",
+        "DX-Y.NYB": "indice_dxy",
+        "GC=F": "precio_oro",
+    }
+
+
+def test_get_closes_cachea_rangos_sin_sesiones(monkeypatch, tmp_path):
+    from app.core.config import settings
+    from app.services import market_service
+
+    monkeypatch.setattr(settings, "MARKET_CACHE_DIR", str(tmp_path))
+    calls = []
+    download = _fake_download(calls)
+
+    def download_con_feriado(tickers, start, end, progress=False):
+        data = download(tickers, start, end, progress)
+        return data.drop(index=pd.Timestamp("2024-12-25"), errors="ignore")
+
+    monkeypatch.setattr(market_service.yf, "download", download_con_feriado)
+
+    # Fin de semana: se marca como cubierto sin descargar
+    assert market_service.get_closes(["HG=F"], "2024-12-21", "2024-12-22").empty
+    assert calls == []
+
+    # Feriado: un reintento con una semana previa confirma que el rango está vacío
+    assert market_service.get_closes(["HG=F"], "2024-12-25", "2024-12-25").empty
+    assert calls == [(["HG=F"], "2024-12-25", "2024-12-26"), (["HG=F"], "2024-12-18", "2024-12-26")]
+
+    calls.clear()
+    market_service.get_closes(["HG=F"], "2024-12-21", "2024-12-25")
+    assert calls == []
+
+
+def test_get_closes_no_cachea_descarga_fallida(monkeypatch, tmp_path):
+    from app.core.config import settings
+    from app.services import market_service
+
+    monkeypatch.setattr(settings, "MARKET_CACHE_DIR", str(tmp_path))
+    calls = []
+    monkeypatch.setattr(
+        market_service.yf, "download",
+        lambda tickers, start, end, progress=False: calls.append(start) or pd.DataFrame(),
+    )
+
+    market_service.get_closes(["HG=F"], "2024-01-02", "2024-01-05")
+    market_service.get_closes(["HG=F"], "2024-01-02", "2024-01-05")
+
+    # Sin datos ni en el reintento: se vuelve a pedir en cada llamada
+    assert calls == ["2024-01-02", "2023-12-26", "2024-01-02", "2023-12-26"]
@@ -0,0 +1,112 @@
+import statistics
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.analytics import online_stats
+
+
+def _row(origen, ts, compra, venta):
+    return {"origen": origen, "timestamp": ts.isoformat(), "precio_compra": compra, "precio_venta": venta}
+
+
+def test_ventana_deslizante_igual_al_recalculo():
+    stats = online_stats.OnlineStats(window_days=[1, 7])
+    start = datetime(2024, 1, 1)
+    rows = [
+        _row("A", start + timedelta(hours=2 * i), 3.70 + (i % 7) / 100, 3.75 + (i % 5) / 100)
+        for i in range(120)  # 10 días cada 2 horas
+    ]
+    stats.update(rows)
+
+    now = start + timedelta(hours=2 * 119)
+    a = {r["origen"]: r for r in stats.analyze(days=1, now=now)}["A"]
+
+    # Recalculo completo de la última ventana de 24h
+    ventana = [r for r in rows if datetime.fromisoformat(r["timestamp"]) >= now - timedelta(days=1)]
+    compras = [r["precio_compra"] for r in ventana]
+    assert a["count"] == len(ventana)
+    assert a["mean_compra"] == pytest.approx(statistics.mean(compras))
+    assert a["volatility_compra"] == pytest.approx(statistics.stdev(compras))
+    assert a["min_compra"] == min(compras)
+    assert a["max_venta"] == max(r["precio_venta"] for r in ventana)
+
+
+def test_variaciones_por_horizonte():
+    stats = online_stats.OnlineStats(window_days=[1])
+    start = datetime(2024, 1, 1, 8)
+    stats.update([
+        _row("A", start, 3.70, 3.75),
+        _row("A", start + timedelta(hours=2), 3.71, 3.76),
+        _row("A", start + timedelta(hours=26), 3.75, 3.80),
+    ])
+
+    a = stats.analyze(days=1, now=start + timedelta(hours=26))[0]
+
+    assert a["variation_1h_venta"] == pytest.approx(0.04)   # contra la captura de las 10:00
+    assert a["variation_24h_compra"] == pytest.approx(0.05)  # contra el último precio anterior a hace 24h
+    assert a["variation_7d_compra"] is None                  # todavía sin historia de 7 días
+
+
+def test_casa_sin_datos_recientes_y_ventana_no_mantenida():
+    stats = online_stats.OnlineStats(window_days=[1])
+    stats.update([_row("A", datetime(2024, 1, 1), 3.70, 3.75)])
+
+    assert stats.analyze(days=1, now=datetime(2024, 1, 5)) == []
+    with pytest.raises(ValueError):
+        stats.analyze(days=30)
+
+
+def test_get_online_stats_sincroniza_con_la_bd(monkeypatch):
+    from app.db.repositories import hourly_repository
+
+    start = datetime(2024, 1, 1)
+    rows = [_row("A", start, 3.70, 3.75), _row("B", start, 3.71, 3.74)]
+    calls = []
+
+    def get_hourly_rows(desde, hasta):
+        calls.append(desde)
+        return [r for r in rows if datetime.fromisoformat(r["timestamp"]) >= desde]
+
+    now = {"value": start + timedelta(hours=1)}
+    monkeypatch.setattr(hourly_repository, "get_hourly_rows", get_hourly_rows)
+    monkeypatch.setattr(online_stats, "datetime", type("Now", (datetime,), {"now": staticmethod(lambda: now["value"])}))
+    monkeypatch.setattr(online_stats, "_online_stats", None)
+
+    assert len(online_stats.analyze_all_casas(7)) == 2
+
+    # El scraper escribe desde otro proceso: la siguiente llamada lee solo lo nuevo
+    rows.append(_row("A", start + timedelta(hours=2), 3.72, 3.77))
+    now["value"] = start + timedelta(hours=3)
+    a = {r["origen"]: r for r in online_stats.analyze_all_casas(7)}["A"]
+
+    assert a["count"] == 2
+    assert a["last_compra"] == 3.72
+    assert calls[-1] == start
+
+    # Pasada la ventana sin datos nuevos no queda nada, pero sigue leyendo desde el último timestamp
+    now["value"] = start + timedelta(days=10)
+    assert online_stats.analyze_all_casas(7) == []
+    assert calls[-1] == start + timedelta(hours=2)
+
+    # Una ventana no mantenida reconstruye las estadísticas con ella
+    now["value"] = start + timedelta(hours=3)
+    stats = online_stats.get_online_stats(days=2)
+    assert 2 in stats.window_days and 7 in stats.window_days
+
+
+def test_get_online_stats_lee_la_bd_sin_el_lock_del_modulo(monkeypatch):
+    from app.db.repositories import hourly_repository
+
+    bloqueado = []
+
+    def get_hourly_rows(desde, hasta):
+        bloqueado.append(online_stats._online_stats_lock.locked())
+        return [_row("A", hasta - timedelta(hours=1), 3.70, 3.75)]
+
+    monkeypatch.setattr(hourly_repository, "get_hourly_rows", get_hourly_rows)
+    monkeypatch.setattr(online_stats, "_online_stats", None)
+
+    stats = online_stats.get_online_stats()
+    assert online_stats.get_online_stats() is stats
+    assert bloqueado == [False, False]
@@ -0,0 +1,82 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from app.analytics import price_store
+
+
+def _rows():
+    return [
+        {"origen": "A", "timestamp": "2024-01-01T08:00:00", "precio_compra": 3.70, "precio_venta": 3.75},
+        {"origen": "B", "timestamp": "2024-01-01T08:00:00", "precio_compra": 3.72, "precio_venta": 3.74},
+        {"origen": "A", "timestamp": "2024-01-01T10:00:00", "precio_compra": 3.72, "precio_venta": 3.76},
+        {"origen": "A", "timestamp": "2024-01-03T10:00:00", "precio_compra": 3.74, "precio_venta": 3.77},
+        {"origen": "B", "timestamp": "2024-01-03T10:00:00", "precio_compra": None, "precio_venta": 3.74},
+    ]
+
+
+def test_store_columnar():
+    store = price_store.PriceStore(capacity=2)
+    store.append_rows(_rows())
+
+    assert store.size == 4
+    assert store.names == ["A", "B"]
+    assert store.view()["ts"].dtype == np.int64
+    assert store.last_ts == price_store.epoch(datetime(2024, 1, 3, 10))
+
+
+def test_group_stats_y_ranking():
+    store = price_store.PriceStore()
+    store.append_rows(_rows())
+
+    stats = store.group_stats()
+    a = stats["A"]
+    assert a["count"] == 3
+    assert a["mean_compra"] == pytest.approx(3.72)
+    assert a["volatility_compra"] == pytest.approx(np.std([3.70, 3.72, 3.74], ddof=1))
+    assert (a["min_compra"], a["max_compra"], a["last_compra"]) == (3.70, 3.74, 3.74)
+    assert a["avg_spread"] == pytest.approx(np.mean([0.05, 0.04, 0.03]))
+    assert a["last_timestamp"] == "2024-01-03T10:00:00"
+    assert np.isnan(stats["B"]["volatility_compra"])
+
+    # Ventana de 1 día: solo la última captura de A
+    ventana = store.group_stats(days=1, now=datetime(2024, 1, 3, 12))
+    assert list(ventana) == ["A"]
+    assert ventana["A"]["count"] == 1
+    assert [name for name, _ in store.ranking("avg_spread")] == ["B", "A"]
+
+
+def test_evict_before():
+    store = price_store.PriceStore()
+    store.append_rows(_rows())
+
+    store.evict_before(price_store.epoch(datetime(2024, 1, 2)))
+
+    assert store.size == 1
+    assert store.group_stats()["A"]["count"] == 1
+
+
+def test_sync_price_store_solo_trae_filas_nuevas(monkeypatch):
+    from app.db.repositories import hourly_repository
+
+    rows = _rows()[:3]
+    calls = []
+
+    def get_hourly_rows(start, end):
+        calls.append(start)
+        return [r for r in rows if datetime.fromisoformat(r["timestamp"]) >= start]
+
+    monkeypatch.setattr(hourly_repository, "get_hourly_rows", get_hourly_rows)
+    monkeypatch.setattr(price_store, "datetime", type("FixedNow", (datetime,), {"now": staticmethod(lambda: datetime(2024, 1, 4))}))
+
+    store = price_store.PriceStore()
+    price_store.sync_price_store(store)
+    assert store.size == 3
+
+    # Una captura nueva: se relee desde el último timestamp sin duplicar A a las 10:00
+    rows.append({"origen": "B", "timestamp": "2024-01-01T10:00:00", "precio_compra": 3.71, "precio_venta": 3.73})
+    price_store.sync_price_store(store)
+
+    assert store.size == 4
+    assert calls[-1] == datetime(2024, 1, 1, 10, 0)
@@ -0,0 +1,150 @@
+import pytest
+
+from app.core import cache
+from app.db.repositories import snapshot_repository
+
+
+class FakeRedis:
+    """Subconjunto de redis.Redis usado por el repository"""
+
+    def __init__(self):
+        self.data = {}
+
+    def incr(self, key):
+        self.data[key] = int(self.data.get(key, 0)) + 1
+        return self.data[key]
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+    def mget(self, keys):
+        return [self.data.get(k) for k in keys]
+
+    def pipeline(self):
+        return self
+
+    def execute(self):
+        return []
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    fake = FakeRedis()
+    monkeypatch.setattr(snapshot_repository, "get_redis", lambda: fake)
+    monkeypatch.setattr(cache, "get_redis", lambda: fake)
+    return fake
+
+
+def test_snapshots_versionados_por_ventana(redis):
+    assert snapshot_repository.get_latest_snapshot("analytics", 7) is None
+
+    snapshot_repository.save_snapshot("analytics", 7, [{"casa": "A"}])
+    snapshot_repository.save_snapshot("analytics", 7, [{"casa": "A"}, {"casa": "B"}])
+    snapshot_repository.save_snapshot("analytics", 30, [])
+
+    latest = snapshot_repository.get_latest_snapshot("analytics", 7)
+    assert latest["version"] == 2
+    assert len(latest["data"]) == 2
+    assert snapshot_repository.get_snapshot_version("analytics", 7, 1)["data"] == [{"casa": "A"}]
+    assert snapshot_repository.get_latest_snapshot("analytics", 30)["version"] == 1
+
+
+def test_refresco_pendiente_se_encola_una_vez(redis):
+    assert snapshot_repository.claim_snapshot_refresh("opportunities", "latest")
+    assert not snapshot_repository.claim_snapshot_refresh("opportunities", "latest")
+
+    # Al guardar el snapshot se libera la marca
+    snapshot_repository.save_snapshot("opportunities", "latest", {"arbitrage": {"possible": False}})
+    assert snapshot_repository.claim_snapshot_refresh("opportunities", "latest")
+
+
+def test_sin_redis(monkeypatch):
+    monkeypatch.setattr(snapshot_repository, "get_redis", lambda: None)
+
+    assert snapshot_repository.save_snapshot("analytics", 7, []) is None
+    assert snapshot_repository.get_latest_snapshot("analytics", 7) is None
+
+
+class FakeTask:
+    def __init__(self, error=None):
+        self.calls = []
+        self.error = error
+
+    def apply_async(self, args, retry=True):
+        if self.error:
+            raise self.error
+        self.calls.append((args, retry))
+
+
+def test_api_sin_redis_calcula_en_el_request(monkeypatch):
+    from app.api.v1 import dolar
+
+    monkeypatch.setattr(snapshot_repository, "get_redis", lambda: None)
+    task = FakeTask()
+
+    snapshot = dolar._snapshot("analytics", 7, task, lambda days: [{"casa": "A", "days": days}], 7)
+
+    assert snapshot["data"] == [{"casa": "A", "days": 7}]
+    assert snapshot["version"] is None
+    assert task.calls == []
+
+
+def test_api_encola_sin_reintentos_de_broker(redis):
+    from app.api.v1 import dolar
+
+    task = FakeTask()
+
+    assert dolar._snapshot("analytics", 7, task, lambda days: [], 7) is None
+    assert task.calls == [((7,), False)]
+
+
+def test_api_broker_caido_no_rompe_la_lectura(redis, monkeypatch):
+    from app.api.v1 import dolar
+    from app.core.config import settings
+
+    task = FakeTask(error=ConnectionError("broker caído"))
+
+    # Sin snapshot se calcula en el request
+    assert dolar._snapshot("analytics", 7, task, lambda days: ["vivo"], 7)["data"] == ["vivo"]
+
+    # Con un snapshot vencido se sirve ese aunque no se pueda encolar el refresco
+    snapshot_repository.save_snapshot("opportunities", "latest", {"arbitrage": {}})
+    monkeypatch.setattr(settings, "SNAPSHOT_REFRESH_SECONDS", -1)
+    snapshot = dolar._snapshot("opportunities", "latest", task, lambda: {"vivo": True})
+    assert snapshot["version"] == 1
+
+
+def test_resumen_dashboard_con_un_calculo_fallido(monkeypatch):
+    import asyncio
+    import json
+
+    from app.api.v1 import dolar
+    from app.core.config import settings
+
+    monkeypatch.setattr(snapshot_repository, "get_redis", lambda: None)
+    monkeypatch.setattr(settings, "API_CACHE_ENABLED", False)
+
+    async def latest_row(table):
+        return {"tabla": table}
+
+    def sin_modulo():
+        raise ModuleNotFoundError("No module named 'app.analytics.price_analysis'")
+
+    monkeypatch.setattr(dolar, "_latest_row", latest_row)
+    monkeypatch.setattr(dolar, "_compute_analytics", lambda days: [{"casa": "A"}])
+    monkeypatch.setattr(dolar, "_compute_opportunities", sin_modulo)
+
+    summary = json.loads(asyncio.run(dolar.get_dashboard_summary()).body)
+
+    assert summary["bcrp"] == {"tabla": "bcrp_data"}
+    assert summary["casas_count"] == 1
+    assert summary["opportunities"] is None
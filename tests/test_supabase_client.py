@@ -0,0 +1,58 @@
+import pytest
+
+from app.db.supabase import client as supabase_client
+
+
+def test_pool_metrics_saturacion_y_fin_idempotente():
+    metrics = supabase_client.PoolMetrics(max_connections=2)
+
+    done = [metrics.start() for _ in range(3)]
+    assert metrics.in_flight == 3
+    assert metrics.saturated == 1
+
+    for d in done:
+        d()
+    done[0](error=True)  # una respuesta cerrada dos veces no descuenta de nuevo
+
+    stats = metrics.stats()
+    assert stats["in_flight"] == 0
+    assert stats["peak_in_flight"] == 3
+    assert stats["requests"] == 3
+    assert stats["errors"] == 0
+
+
+def test_cliente_por_proceso_se_recrea_tras_fork(monkeypatch):
+    pid = [100]
+    creados = []
+    monkeypatch.setattr(supabase_client, "is_configured", lambda: True)
+    monkeypatch.setattr(supabase_client.os, "getpid", lambda: pid[0])
+    monkeypatch.setattr(supabase_client, "_create_client", lambda: creados.append(pid[0]) or object())
+    monkeypatch.setattr(supabase_client, "_client", None)
+
+    padre = supabase_client.get_supabase_client()
+    assert supabase_client.get_supabase_client() is padre
+
+    # Worker prefork de Celery: mismo módulo, otro pid
+    pid[0] = 101
+    hijo = supabase_client.get_supabase_client()
+
+    assert hijo is not padre
+    assert creados == [100, 101]
+
+
+def test_cliente_admin_separado_y_exige_service_role(monkeypatch):
+    monkeypatch.setattr(supabase_client, "_admin_client", None)
+    monkeypatch.setattr(supabase_client, "is_admin_configured", lambda: False)
+
+    with pytest.raises(Exception, match="SUPABASE_SERVICE_ROLE_KEY"):
+        supabase_client.get_supabase_admin_client()
+
+    anon, admin = object(), object()
+    monkeypatch.setattr(supabase_client, "is_configured", lambda: True)
+    monkeypatch.setattr(supabase_client, "is_admin_configured", lambda: True)
+    monkeypatch.setattr(supabase_client, "_create_client", lambda: anon)
+    monkeypatch.setattr(supabase_client, "_create_admin_client", lambda: admin)
+    monkeypatch.setattr(supabase_client, "_client", None)
+
+    assert supabase_client.get_supabase_admin_client() is admin
+    assert supabase_client.get_supabase_client() is anon
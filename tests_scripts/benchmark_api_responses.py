@@ -0,0 +1,124 @@
+"""
+Benchmark de serialización y compresión de respuestas de la API
+Compara el camino por defecto de FastAPI (jsonable_encoder + json.dumps) con orjson
+y con el cuerpo ya serializado que guarda la caché, y mide el tamaño con gzip.
+Ejecuta: python tests_scripts/benchmark_api_responses.py [días] [casas]
+"""
+import gzip
+import json
+import sys
+import timeit
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from fastapi import FastAPI
+from fastapi.encoders import jsonable_encoder
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.testclient import TestClient
+from starlette.responses import JSONResponse as StarletteJSONResponse
+
+from app.core import cache
+from app.core.responses import JSONResponse, dumps
+
+CAPTURAS_POR_DIA = 12  # cada 2 horas
+REPEAT = 5
+REQUESTS = 200
+
+
+def historial_sintetico(days: int, casas: int):
+    """Respuesta tipo historial horario: muchas casas, filas de dolar_hourly"""
+    start = datetime.now() - timedelta(days=days)
+    rows = []
+    for i in range(days * CAPTURAS_POR_DIA):
+        ts = start + timedelta(hours=2 * i)
+        for c in range(casas):
+            compra = round(3.70 + (i * 7 + c) % 50 / 1000, 4)
+            rows.append({
+                "id": len(rows) + 1,
+                "origen": f"Casa {c:02d}",
+                "fecha": ts.strftime("%Y-%m-%d"),
+                "hora": ts.strftime("%H:%M:%S"),
+                "timestamp": ts.isoformat(),
+                "precio_compra": compra,
+                "precio_venta": round(compra + 0.03, 4),
+                "spread": 0.03,
+                "url": f"https://casa{c}.pe",
+            })
+    return {"data": rows, "count": len(rows), "next_cursor": None}
+
+
+def fastapi_por_defecto(payload):
+    """Lo que hace FastAPI con un dict devuelto por el handler"""
+    return StarletteJSONResponse(jsonable_encoder(payload)).body
+
+
+def throughput(app: FastAPI, headers=None) -> float:
+    client = TestClient(app)
+    client.get("/historial", headers=headers)  # calienta la caché
+    elapsed = timeit.timeit(lambda: client.get("/historial", headers=headers), number=REQUESTS)
+    return REQUESTS / elapsed
+
+
+def crear_apps(payload):
+    antes = FastAPI()
+
+    @antes.get("/historial")
+    def historial_antes():
+        return payload
+
+    despues = FastAPI(default_response_class=JSONResponse)
+    despues.add_middleware(GZipMiddleware, minimum_size=1000, compresslevel=6)
+
+    @despues.get("/historial")
+    @cache.cached(ttl=600, response_class=JSONResponse)
+    def historial_despues():
+        return payload
+
+    return antes, despues
+
+
+def run_benchmark(days: int, casas: int):
+    payload = historial_sintetico(days, casas)
+
+    print(f"\n{'='*60}")
+    print(f"📦 Historial {days} días x {casas} casas ({payload['count']:,} filas)")
+    print(f"{'='*60}")
+
+    body_std = fastapi_por_defecto(payload)
+    body_orjson = dumps(payload)
+    assert json.loads(body_std) == json.loads(body_orjson)
+    print(f"   ✅ Mismo contenido: {len(body_std):,} vs {len(body_orjson):,} bytes")
+
+    t_std = min(timeit.repeat(lambda: fastapi_por_defecto(payload), number=1, repeat=REPEAT))
+    t_orjson = min(timeit.repeat(lambda: JSONResponse(payload).body, number=1, repeat=REPEAT))
+    t_bytes = min(timeit.repeat(lambda: JSONResponse(body_orjson).body, number=1, repeat=REPEAT))
+
+    print(f"\n   jsonable_encoder + json:  {t_std * 1000:8.2f} ms")
+    print(f"   orjson (miss de caché):   {t_orjson * 1000:8.2f} ms  ({t_std / t_orjson:.0f}x)")
+    print(f"   bytes cacheados (hit):    {t_bytes * 1000:8.3f} ms")
+
+    for level in (1, 6, 9):
+        t_gzip = min(timeit.repeat(lambda: gzip.compress(body_orjson, level), number=1, repeat=REPEAT))
+        size = len(gzip.compress(body_orjson, level))
+        print(f"   gzip nivel {level}:             {size / 1024:8.1f} KB  "
+              f"({len(body_orjson) / size:.0f}x menor, {t_gzip * 1000:.1f} ms)")
+
+    antes, despues = crear_apps(payload)
+    rps_antes = throughput(antes)
+    rps_despues = throughput(despues, headers={"Accept-Encoding": "gzip"})
+
+    print(f"\n   Payload antes:    {len(body_std) / 1024:8.1f} KB")
+    print(f"   Payload después:  {len(gzip.compress(body_orjson, 6)) / 1024:8.1f} KB (gzip)")
+    print(f"\n   Requests/s antes:    {rps_antes:8.1f}")
+    print(f"   Requests/s después:  {rps_despues:8.1f}  (caché + gzip)")
+    print(f"\n   ⚡ {rps_despues / rps_antes:.1f}x más throughput")
+
+
+if __name__ == "__main__":
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 7
+    casas = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+    run_benchmark(days, casas)
@@ -0,0 +1,61 @@
+"""
+Micro-benchmark del extractor de cuantoestaeldolar.pe
+Compara el parser anterior (BeautifulSoup + html.parser) con el slice de
+__NEXT_DATA__ y el fallback lxml, usando el HTML guardado en tests/fixtures.
+Ejecuta: python tests_scripts/benchmark_casas_parser.py [ruta_html ...]
+"""
+import sys
+import timeit
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from bs4 import BeautifulSoup
+
+from app.scraper import cuantoestaeldolar_parser as parser
+
+FIXTURES = [project_root / "tests" / "fixtures" / "cuantoestaeldolar.html"]
+REPEAT = 5
+
+
+def html_parser_anterior(raw: bytes):
+    """Ruta previa: árbol completo con html.parser y clases con hash"""
+    soup = BeautifulSoup(raw.decode("utf-8"), "html.parser")
+    return soup.find_all(class_="ExchangeHouseItem_item_col__gudqq")
+
+
+def sin_next_data(raw: bytes) -> bytes:
+    start = raw.find(b'<script id="__NEXT_DATA__"')
+    end = raw.find(b"</script>", start) + len(b"</script>")
+    return raw[:start] + raw[end:]
+
+
+def medir(nombre: str, func, raw: bytes, number: int):
+    tiempos = timeit.repeat(lambda: func(raw), number=number, repeat=REPEAT)
+    ms = min(tiempos) / number * 1000
+    print(f"   {nombre:32} {ms:9.3f} ms/página")
+    return ms
+
+
+def run_benchmark(paths):
+    for path in paths:
+        raw = path.read_bytes()
+        raw_sin_json = sin_next_data(raw)
+
+        print(f"\n{'='*60}")
+        print(f"📄 {path} ({len(raw) / 1024:.1f} KB)")
+        print(f"{'='*60}")
+
+        base = medir("html.parser (anterior)", html_parser_anterior, raw, 5)
+        json_ms = medir("__NEXT_DATA__ slice", parser.extract_casas_next_data, raw, 50)
+        lxml_ms = medir("fallback lxml", parser._extract_casas_lxml, raw_sin_json, 10)
+
+        print(f"\n   ⚡ __NEXT_DATA__: {base / json_ms:.1f}x más rápido")
+        print(f"   ⚡ lxml:          {base / lxml_ms:.1f}x más rápido")
+
+
+if __name__ == "__main__":
+    paths = [Path(p) for p in sys.argv[1:]] or FIXTURES
+    run_benchmark(paths)
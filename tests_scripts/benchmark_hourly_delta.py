@@ -0,0 +1,103 @@
+"""
+Simulación del modo delta de dolar_hourly
+Compara filas guardadas y tiempo de escaneo (full vs delta) sobre un día y
+sobre la ventana de retención de 90 días, con datos sintéticos realistas.
+Ejecuta: python tests_scripts/benchmark_hourly_delta.py [prob_cambio]
+"""
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.core.config import settings
+from app.db.repositories.hourly_repository import expand_step_series
+from app.scraper.hourly_state import build_hourly_row, select_delta_rows, update_state
+
+CASAS = 40
+CAPTURAS_HORAS = [8, 10, 12, 14, 16, 18, 20]  # cada 2h de 8am a 8pm
+DIAS_RETENCION = 90
+BYTES_POR_FILA = 140  # fila de dolar_hourly + índices, aproximado
+
+
+def simular(dias: int, prob_cambio: float, seed: int = 42):
+    random.seed(seed)
+    precios = {f"Casa {i:02d}": 3.70 + random.random() * 0.06 for i in range(CASAS)}
+    state = {}
+    full, delta = [], []
+    inicio = datetime(2025, 10, 1)
+
+    for d in range(dias):
+        for hora in CAPTURAS_HORAS:
+            now = inicio + timedelta(days=d, hours=hora)
+            rows = []
+            for casa, compra in precios.items():
+                if random.random() < prob_cambio:
+                    compra = round(compra + random.choice([-1, 1]) * 0.001 * random.randint(1, 5), 4)
+                    precios[casa] = compra
+                rows.append(build_hourly_row(casa, round(compra, 4), round(compra + 0.02, 4), "", now))
+
+            full.extend(rows)
+            for row in select_delta_rows(rows, state, now):
+                delta.append(row)
+                update_state(state, row)
+
+    return full, delta
+
+
+def escanear(rows):
+    """
+    Escaneo típico de analytics: agrupa por casa y recorre los precios.
+    Mide el costo de escanear; métricas exactas sobre datos delta deben usar la serie reconstruida.
+    """
+    por_casa = {}
+    for row in rows:
+        por_casa.setdefault(row["origen"], []).append(row["precio_compra"])
+    return {casa: statistics.pstdev(v) for casa, v in por_casa.items()}
+
+
+def medir(func, *args, repeat: int = 5) -> float:
+    mejor = float("inf")
+    for _ in range(repeat):
+        t = time.perf_counter()
+        func(*args)
+        mejor = min(mejor, time.perf_counter() - t)
+    return mejor * 1000
+
+
+def reconstruir(rows):
+    por_casa = {}
+    for row in rows:
+        por_casa.setdefault(row["origen"], []).append(row)
+    grid = sorted({datetime.fromisoformat(r["timestamp"]) for r in rows})
+    return {casa: expand_step_series(v, grid) for casa, v in por_casa.items()}
+
+
+def reporte(titulo: str, dias: int, prob_cambio: float):
+    full, delta = simular(dias, prob_cambio)
+
+    print(f"\n{'='*60}")
+    print(f"📊 {titulo} ({dias} días, {CASAS} casas, prob. cambio {prob_cambio:.0%})")
+    print(f"{'='*60}")
+    print(f"   Filas full:   {len(full):>8}  (~{len(full) * BYTES_POR_FILA / 1024:,.0f} KB)")
+    print(f"   Filas delta:  {len(delta):>8}  (~{len(delta) * BYTES_POR_FILA / 1024:,.0f} KB)")
+    print(f"   Reducción:    {1 - len(delta) / len(full):.1%}")
+
+    full_ms = medir(escanear, full)
+    delta_ms = medir(escanear, delta)
+    rec_ms = medir(reconstruir, delta, repeat=1)
+    print(f"\n   Escaneo full:               {full_ms:8.2f} ms")
+    print(f"   Escaneo delta:              {delta_ms:8.2f} ms")
+    print(f"   Reconstrucción escalonada:  {rec_ms:8.2f} ms (solo cuando se pide la serie completa)")
+
+
+if __name__ == "__main__":
+    prob = float(sys.argv[1]) if len(sys.argv) > 1 else 0.25
+    print(f"💓 Heartbeat cada {settings.HOURLY_HEARTBEAT_HOURS}h")
+    reporte("Día típico", 1, prob)
+    reporte("Ventana de retención", DIAS_RETENCION, prob)
@@ -0,0 +1,112 @@
+"""
+Benchmark del último precio por casa en la tabla dolar
+Compara la consulta anterior (GROUP BY + join a dolar) con get_latest_all_origins y
+get_latest_n_per_origin (skip scan + LATERAL en PostgreSQL, GROUP BY/ROW_NUMBER en otros motores).
+Ejecuta: python tests_scripts/benchmark_latest_per_origin.py [filas] [url]
+Sin url usa un SQLite en .cache/, que solo valida resultados: el camino rápido es de PostgreSQL.
+Con la URL de una base PostgreSQL de pruebas mide el plan real; su tabla dolar se reemplaza
+(el modelo ya crea uq_dolar_origen_fecha con INCLUDE).
+"""
+import sys
+import timeit
+from datetime import date, timedelta
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.db.models import Dolar
+from app.repository.dolar_repository import DolarRepository
+
+CASAS = 40
+BATCH = 50_000
+REPEAT = 5
+
+
+def poblar(engine, filas: int):
+    Dolar.__table__.drop(engine, checkfirst=True)
+    Dolar.__table__.create(engine)
+
+    dias = filas // CASAS
+    inicio = date(2025, 1, 1) - timedelta(days=dias)
+    with engine.begin() as conn:
+        lote = []
+        for d in range(dias):
+            fecha = inicio + timedelta(days=d)
+            for c in range(CASAS):
+                precio = 3.5 + ((d * 7 + c) % 300) / 1000
+                lote.append({
+                    "origen": f"Casa {c:02d}",
+                    "fecha": fecha,
+                    "precio_compra": precio,
+                    "precio_venta": precio + 0.03,
+                })
+            if len(lote) >= BATCH:
+                conn.execute(insert(Dolar), lote)
+                lote = []
+        if lote:
+            conn.execute(insert(Dolar), lote)
+    return dias * CASAS
+
+
+def latest_group_by(db: Session):
+    """Consulta anterior (con func corregido): GROUP BY origen y join de vuelta a dolar"""
+    subquery = (
+        select(Dolar.origen, func.max(Dolar.fecha).label("max_fecha"))
+        .group_by(Dolar.origen)
+        .subquery()
+    )
+    stmt = select(Dolar).join(
+        subquery,
+        (Dolar.origen == subquery.c.origen) & (Dolar.fecha == subquery.c.max_fecha),
+    )
+    return list(db.scalars(stmt))
+
+
+def medir(fn) -> float:
+    return min(timeit.repeat(fn, number=1, repeat=REPEAT))
+
+
+def run_benchmark(filas: int, url: str):
+    engine = create_engine(url)
+    total = poblar(engine, filas)
+
+    print(f"\n{'='*60}")
+    print(f"💵 dolar: {total:,} filas, {CASAS} casas ({engine.dialect.name})")
+    print(f"{'='*60}")
+
+    if engine.dialect.name == "postgresql":
+        # Visibility map y estadísticas al día para el index-only scan (VACUUM no va en transacción)
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.exec_driver_sql("VACUUM ANALYZE dolar")
+
+    with Session(engine) as db:
+        repo = DolarRepository(db)
+
+        esperado = {(d.origen, d.fecha) for d in latest_group_by(db)}
+        obtenido = {(d.origen, d.fecha) for d in repo.get_latest_all_origins()}
+        assert esperado == obtenido and len(obtenido) == CASAS
+        print(f"   ✅ Mismo resultado para {len(obtenido)} casas")
+
+        t_old = medir(lambda: (db.expunge_all(), latest_group_by(db)))
+        t_new = medir(lambda: (db.expunge_all(), repo.get_latest_all_origins()))
+        t_n = medir(lambda: (db.expunge_all(), repo.get_latest_n_per_origin(5)))
+
+    print(f"\n   GROUP BY + join:             {t_old * 1000:8.1f} ms")
+    print(f"   get_latest_all_origins:      {t_new * 1000:8.1f} ms  ({t_old / t_new:.1f}x)")
+    print(f"   get_latest_n_per_origin(5):  {t_n * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    filas = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    if len(sys.argv) > 2:
+        url = sys.argv[2]
+    else:
+        cache = project_root / ".cache"
+        cache.mkdir(exist_ok=True)
+        url = f"sqlite:///{cache / 'benchmark_dolar.db'}"
+    run_benchmark(filas, url)
@@ -0,0 +1,104 @@
+"""
+Benchmark del store columnar de precios
+Compara estadísticas por casa sobre una lista de dicts (como llegan de Supabase)
+contra las reducciones agrupadas de PriceStore, en tiempo y memoria.
+Ejecuta: python tests_scripts/benchmark_price_store.py [días] [casas]
+"""
+import statistics
+import sys
+import timeit
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import numpy as np
+
+from app.analytics.price_store import PriceStore
+
+CAPTURAS_POR_DIA = 12  # cada 2 horas
+REPEAT = 5
+
+
+def filas_sinteticas(days: int, casas: int):
+    rng = np.random.default_rng(7)
+    start = datetime.now() - timedelta(days=days)
+    rows = []
+    for i in range(days * CAPTURAS_POR_DIA):
+        ts = (start + timedelta(hours=2 * i)).isoformat()
+        compra = 3.70 + rng.normal(0, 0.01, casas)
+        for c in range(casas):
+            rows.append({
+                "origen": f"Casa {c:02d}",
+                "timestamp": ts,
+                "precio_compra": round(float(compra[c]), 4),
+                "precio_venta": round(float(compra[c]) + 0.03, 4),
+                "spread": 0.03,
+                "url": f"https://casa{c}.pe",
+            })
+    return rows
+
+
+def stats_dicts(rows):
+    """Recorrido por dicts: agrupar por casa y calcular con statistics"""
+    por_casa = {}
+    for r in rows:
+        por_casa.setdefault(r["origen"], []).append(r)
+    result = {}
+    for casa, filas in por_casa.items():
+        compras = [f["precio_compra"] for f in filas]
+        spreads = [f["precio_venta"] - f["precio_compra"] for f in filas]
+        result[casa] = {
+            "volatility_compra": statistics.stdev(compras),
+            "avg_spread": statistics.mean(spreads),
+            "min_compra": min(compras),
+            "max_compra": max(compras),
+        }
+    return result
+
+
+def memoria(fn):
+    tracemalloc.start()
+    obj = fn()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, current
+
+
+def run_benchmark(days: int, casas: int):
+    rows, m_dicts = memoria(lambda: filas_sinteticas(days, casas))
+
+    def cargar():
+        store = PriceStore()
+        store.append_rows(rows)
+        return store
+
+    store, m_store = memoria(cargar)
+
+    print(f"\n{'='*60}")
+    print(f"🏦 {days} días x {casas} casas ({len(rows):,} filas)")
+    print(f"{'='*60}")
+
+    esperado = stats_dicts(rows)
+    obtenido = store.group_stats()
+    for casa, s in esperado.items():
+        assert abs(s["volatility_compra"] - obtenido[casa]["volatility_compra"]) < 1e-9
+    print(f"   ✅ Estadísticas idénticas para {len(esperado)} casas")
+
+    t_dicts = min(timeit.repeat(lambda: stats_dicts(rows), number=1, repeat=REPEAT))
+    t_store = min(timeit.repeat(store.group_stats, number=1, repeat=REPEAT))
+
+    print(f"\n   Memoria lista de dicts:  {m_dicts / 1e6:8.1f} MB")
+    print(f"   Memoria store columnar:  {m_store / 1e6:8.1f} MB")
+    print(f"\n   Stats sobre dicts:       {t_dicts * 1000:8.1f} ms")
+    print(f"   Stats vectorizadas:      {t_store * 1000:8.1f} ms")
+    print(f"\n   ⚡ {t_dicts / t_store:.1f}x más rápido, {m_dicts / m_store:.0f}x menos memoria")
+
+
+if __name__ == "__main__":
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 90
+    casas = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+    run_benchmark(days, casas)